@@ -0,0 +1,55 @@
+"""Merge cycle checkpoints
+
+A merge plan is applied one committed batch at a time, so a killed or timed
+out cycle resumes from its last batch instead of starting over. Staged pairs
+carry their batch (and the per-request lookups are keyed by it), plans record
+how many batches are applied, and cycles count their resumed runs.
+
+Revision ID: 0b9e4f2d7a63
+Revises: f71c0a3e5b86
+Create Date: 2026-10-16 23:27:51
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b9e4f2d7a63'
+down_revision = 'f71c0a3e5b86'
+branch_labels = None
+depends_on = None
+
+# table, column
+CHECKPOINT_COLUMNS = (
+    ('merge_cycles', sa.Column('retries', sa.Integer(), server_default='0', nullable=False)),
+    ('merge_plans', sa.Column('batch_count', sa.Integer(), server_default='0', nullable=False)),
+    ('merge_plans', sa.Column('batches_applied', sa.Integer(), server_default='0', nullable=False)),
+    ('merge_plans', sa.Column('updated_at', sa.DateTime(), nullable=True)),
+    ('merge_plan_pairs', sa.Column('batch', sa.Integer(), server_default='0', nullable=False)),
+)
+
+# index, request column - applying a batch sums its staged amounts per request
+STAGED_PAIR_INDEXES = (
+    ('idx_merge_plan_pair_funding', 'funding_request_id'),
+    ('idx_merge_plan_pair_withdrawal', 'withdrawal_request_id'),
+)
+
+
+def upgrade() -> None:
+    for table, column in CHECKPOINT_COLUMNS:
+        op.add_column(table, column.copy())
+
+    for index, column in STAGED_PAIR_INDEXES:
+        op.drop_index(index, table_name='merge_plan_pairs')
+        op.create_index(index, 'merge_plan_pairs', ['merge_plan_id', 'batch', column])
+
+
+def downgrade() -> None:
+    for index, column in STAGED_PAIR_INDEXES:
+        op.drop_index(index, table_name='merge_plan_pairs')
+        op.create_index(index, 'merge_plan_pairs', ['merge_plan_id', column])
+
+    for table, column in reversed(CHECKPOINT_COLUMNS):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column(column.name, mssql_drop_default=True)
@@ -0,0 +1,32 @@
+"""Baseline: the schema create_tables.py built before migrations
+
+Databases created before this chain existed (create_tables.py plus the
+add_*_fields.py scripts) have no alembic_version. Mark them as this revision
+and upgrade from there:
+
+    alembic stamp 2a7f5c9e1d04
+    alembic upgrade head
+
+A database created by the current create_tables.py already has every later
+change and is stamped at head by that script.
+
+Revision ID: 2a7f5c9e1d04
+Revises:
+Create Date: 2026-10-16 23:41:17
+
+"""
+
+
+# revision identifiers, used by Alembic.
+revision = '2a7f5c9e1d04'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
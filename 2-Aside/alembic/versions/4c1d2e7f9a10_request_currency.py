@@ -0,0 +1,54 @@
+"""Denormalize currency onto funding and withdrawal requests
+
+Matching and admin queries filtered requests by joining wallets for their
+currency. The currency is copied onto each request (backfilled from its
+wallet) and covered by a per-currency pending index.
+
+Revision ID: 4c1d2e7f9a10
+Revises: 2a7f5c9e1d04
+Create Date: 2026-10-16 14:55:46
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1d2e7f9a10'
+down_revision = '2a7f5c9e1d04'
+branch_labels = None
+depends_on = None
+
+CURRENCY = sa.Enum('NAIRA', 'USDT', name='currencyenum')
+
+# table, index, key columns
+PENDING_INDEXES = (
+    ('funding_requests', 'idx_funding_currency_pending',
+     ['currency', 'is_fully_matched', 'is_completed', 'requested_at']),
+    ('withdrawal_requests', 'idx_withdrawal_currency_pending',
+     ['currency', 'is_fully_matched', 'is_completed', 'is_priority', 'priority_timestamp', 'requested_at']),
+)
+
+
+def upgrade() -> None:
+    for table, index, columns in PENDING_INDEXES:
+        op.add_column(table, sa.Column('currency', CURRENCY, nullable=True))
+
+        # Backfill from the owning wallet - a request never changes wallet
+        op.execute(
+            f"UPDATE {table} SET currency = "
+            f"(SELECT wallets.currency FROM wallets WHERE wallets.id = {table}.wallet_id) "
+            f"WHERE currency IS NULL"
+        )
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('currency', existing_type=CURRENCY, nullable=False)
+
+        op.create_index(index, table, columns, mssql_include=['amount_remaining', 'wallet_id'])
+
+
+def downgrade() -> None:
+    for table, index, _ in PENDING_INDEXES:
+        op.drop_index(index, table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('currency')
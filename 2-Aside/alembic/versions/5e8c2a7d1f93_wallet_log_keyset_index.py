@@ -0,0 +1,29 @@
+"""Wallet log keyset index
+
+Transaction history pages newest first on (created_at, id) within a wallet, so
+idx_wallet_log_wallet_created carries id as its last key column: a page after
+a cursor is one seek, including between entries logged in the same instant.
+
+Revision ID: 5e8c2a7d1f93
+Revises: 0b9e4f2d7a63
+Create Date: 2026-10-16 23:58:12
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8c2a7d1f93'
+down_revision = '0b9e4f2d7a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('idx_wallet_log_wallet_created', table_name='wallet_logs')
+    op.create_index('idx_wallet_log_wallet_created', 'wallet_logs', ['wallet_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_wallet_log_wallet_created', table_name='wallet_logs')
+    op.create_index('idx_wallet_log_wallet_created', 'wallet_logs', ['wallet_id', 'created_at'])
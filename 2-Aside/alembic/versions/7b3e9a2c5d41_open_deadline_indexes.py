@@ -0,0 +1,47 @@
+"""Filtered indexes on open payment deadlines
+
+Deadline sweeps filter funding_match_pairs on the deadline columns of pairs
+still awaiting a proof or a confirmation. Without an index each sweep read
+the whole pairs table; these indexes only hold the open pairs, so a sweep
+costs time proportional to them rather than to all history.
+
+Revision ID: 7b3e9a2c5d41
+Revises: 4c1d2e7f9a10
+Create Date: 2026-10-16 17:42:10
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e9a2c5d41'
+down_revision = '4c1d2e7f9a10'
+branch_labels = None
+depends_on = None
+
+# index, key column, included columns, open-pair filter
+OPEN_DEADLINE_INDEXES = (
+    ('idx_match_pair_open_proof', 'proof_deadline',
+     ['extension_granted', 'extended_deadline', 'funding_request_id'],
+     "proof_uploaded = 0 AND funder_missed_deadline = 0"),
+    ('idx_match_pair_open_confirmation', 'confirmation_deadline',
+     ['withdrawal_request_id'],
+     "proof_uploaded = 1 AND proof_confirmed = 0 AND withdrawer_missed_deadline = 0"),
+)
+
+
+def upgrade() -> None:
+    for index, column, include, where in OPEN_DEADLINE_INDEXES:
+        op.create_index(
+            index, 'funding_match_pairs', [column],
+            mssql_include=include,
+            mssql_where=sa.text(where),
+            postgresql_where=sa.text(where.replace(" = 0", " = false").replace(" = 1", " = true")),
+            sqlite_where=sa.text(where)
+        )
+
+
+def downgrade() -> None:
+    for index, _, _, _ in OPEN_DEADLINE_INDEXES:
+        op.drop_index(index, table_name='funding_match_pairs')
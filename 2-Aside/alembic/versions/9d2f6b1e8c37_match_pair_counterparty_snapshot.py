@@ -0,0 +1,98 @@
+"""Counterparty snapshot on funding match pairs
+
+GET /my-active-matches and the my-requests endpoints re-derived both parties'
+names and the withdrawer's payment details through four joins on every poll.
+Each pair now stores them as of match time (written by the merge cycle with
+the pair), existing pairs are backfilled from their requests' wallets, and
+each role's unconfirmed pairs are indexed by user.
+
+Revision ID: 9d2f6b1e8c37
+Revises: 7b3e9a2c5d41
+Create Date: 2026-10-16 21:08:33
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2f6b1e8c37'
+down_revision = '7b3e9a2c5d41'
+branch_labels = None
+depends_on = None
+
+CURRENCY = sa.Enum('NAIRA', 'USDT', name='currencyenum')
+
+SNAPSHOT_COLUMNS = (
+    sa.Column('funder_user_id', UNIQUEIDENTIFIER(), nullable=True),
+    sa.Column('funder_username', sa.String(50), nullable=True),
+    sa.Column('funder_phone', sa.String(20), nullable=True),
+    sa.Column('withdrawer_user_id', UNIQUEIDENTIFIER(), nullable=True),
+    sa.Column('withdrawer_username', sa.String(50), nullable=True),
+    sa.Column('withdrawer_phone', sa.String(20), nullable=True),
+    sa.Column('currency', CURRENCY, nullable=True),
+    sa.Column('payee_account_number', sa.String(20), nullable=True),
+    sa.Column('payee_account_name', sa.String(255), nullable=True),
+    sa.Column('payee_bank_name', sa.String(100), nullable=True),
+    sa.Column('payee_wallet_address', sa.String(100), nullable=True),
+)
+
+# Request behind each side of a pair, and its owner's wallet and user
+FUNDER = (
+    "FROM funding_requests r JOIN wallets w ON w.id = r.wallet_id JOIN users u ON u.id = w.user_id "
+    "WHERE r.id = funding_match_pairs.funding_request_id"
+)
+WITHDRAWER = (
+    "FROM withdrawal_requests r JOIN wallets w ON w.id = r.wallet_id JOIN users u ON u.id = w.user_id "
+    "LEFT JOIN bank_details b ON b.id = w.bank_details_id "
+    "WHERE r.id = funding_match_pairs.withdrawal_request_id"
+)
+
+BACKFILL = (
+    ('funder_user_id', 'u.id', FUNDER),
+    ('funder_username', 'u.username', FUNDER),
+    ('funder_phone', 'u.phone', FUNDER),
+    ('withdrawer_user_id', 'u.id', WITHDRAWER),
+    ('withdrawer_username', 'u.username', WITHDRAWER),
+    ('withdrawer_phone', 'u.phone', WITHDRAWER),
+    ('currency', 'w.currency', WITHDRAWER),
+    ('payee_account_number', 'b.account_number', WITHDRAWER),
+    ('payee_account_name', 'b.account_name', WITHDRAWER),
+    ('payee_bank_name', 'b.bank_name', WITHDRAWER),
+    ('payee_wallet_address', 'w.wallet_address', WITHDRAWER),
+)
+
+# index, key column
+OPEN_PAIR_INDEXES = (
+    ('idx_match_pair_funder_open', 'funder_user_id'),
+    ('idx_match_pair_withdrawer_open', 'withdrawer_user_id'),
+)
+
+
+def upgrade() -> None:
+    for column in SNAPSHOT_COLUMNS:
+        op.add_column('funding_match_pairs', column.copy())
+
+    # Backfill from the current owners - the closest record of who was matched
+    op.execute(
+        "UPDATE funding_match_pairs SET "
+        + ", ".join(f"{column} = (SELECT {value} {source})" for column, value, source in BACKFILL)
+        + " WHERE funder_user_id IS NULL"
+    )
+
+    for index, column in OPEN_PAIR_INDEXES:
+        op.create_index(
+            index, 'funding_match_pairs', [column],
+            mssql_where=sa.text("proof_confirmed = 0"),
+            postgresql_where=sa.text("proof_confirmed = false"),
+            sqlite_where=sa.text("proof_confirmed = 0")
+        )
+
+
+def downgrade() -> None:
+    for index, _ in OPEN_PAIR_INDEXES:
+        op.drop_index(index, table_name='funding_match_pairs')
+    with op.batch_alter_table('funding_match_pairs') as batch_op:
+        for column in reversed(SNAPSHOT_COLUMNS):
+            batch_op.drop_column(column.name)
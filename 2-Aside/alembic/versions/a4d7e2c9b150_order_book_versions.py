@@ -0,0 +1,38 @@
+"""Order book versions
+
+A row per currency whose version every write to that currency's pending
+funding and withdrawal requests bumps in the same transaction. An API
+instance's in-memory order book remembers the version it reflects, so
+checking it against the database before a merge reads one row instead of the
+whole backlog.
+
+Revision ID: a4d7e2c9b150
+Revises: 5e8c2a7d1f93
+Create Date: 2026-10-17 09:14:36
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7e2c9b150'
+down_revision = '5e8c2a7d1f93'
+branch_labels = None
+depends_on = None
+
+CURRENCY = sa.Enum('NAIRA', 'USDT', name='currencyenum')
+
+
+def upgrade() -> None:
+    versions = op.create_table(
+        'order_book_versions',
+        sa.Column('currency', CURRENCY, nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('currency'),
+    )
+    op.bulk_insert(versions, [{'currency': 'NAIRA', 'version': 0}, {'currency': 'USDT', 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('order_book_versions')
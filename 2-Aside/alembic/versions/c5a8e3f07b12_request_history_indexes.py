@@ -0,0 +1,35 @@
+"""Indexes for paging a user's funding and withdrawal requests
+
+GET /funding/my-requests and /withdrawal/my-requests now return keyset pages
+ordered by (requested_at, id) within the user's wallets. These indexes let
+each page seek to the cursor instead of sorting the user's whole history.
+
+Revision ID: c5a8e3f07b12
+Revises: 9d2f6b1e8c37
+Create Date: 2026-10-16 22:31:05
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a8e3f07b12'
+down_revision = '9d2f6b1e8c37'
+branch_labels = None
+depends_on = None
+
+# table, index
+HISTORY_INDEXES = (
+    ('funding_requests', 'idx_funding_wallet_requested'),
+    ('withdrawal_requests', 'idx_withdrawal_wallet_requested'),
+)
+
+
+def upgrade() -> None:
+    for table, index in HISTORY_INDEXES:
+        op.create_index(index, table, ['wallet_id', 'requested_at', 'id'])
+
+
+def downgrade() -> None:
+    for table, index in HISTORY_INDEXES:
+        op.drop_index(index, table_name=table)
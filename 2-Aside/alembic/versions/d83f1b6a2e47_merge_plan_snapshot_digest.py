@@ -0,0 +1,32 @@
+"""Merge plan snapshot digest
+
+A plan staged at cutoff is applied at merge time only if the pending requests
+are still the ones it was built from. Counts and totals can't tell apart two
+requests whose amounts were swapped, or a cancelled request replaced by one of
+the same amount, so merge_plans records a digest of the snapshot's request
+ids and amounts instead.
+
+Revision ID: d83f1b6a2e47
+Revises: a4d7e2c9b150
+Create Date: 2026-10-17 10:02:51
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd83f1b6a2e47'
+down_revision = 'a4d7e2c9b150'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Plans staged before this have no digest and are re-matched
+    op.add_column('merge_plans', sa.Column('snapshot_digest', sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('merge_plans') as batch_op:
+        batch_op.drop_column('snapshot_digest')
@@ -0,0 +1,70 @@
+"""Merge plans staged at cutoff
+
+Each merge cycle's matches are computed per currency when requests close
+(cutoff) and staged in merge_plan_pairs; at merge time the plan is applied
+server-side with INSERT ... SELECT and set-based UPDATEs. merge_plans records
+the pending requests the plan was built from, so a stale plan is re-matched.
+
+Revision ID: e3b6d1a94f20
+Revises: c5a8e3f07b12
+Create Date: 2026-10-16 23:12:40
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b6d1a94f20'
+down_revision = 'c5a8e3f07b12'
+branch_labels = None
+depends_on = None
+
+CURRENCY = sa.Enum('NAIRA', 'USDT', name='currencyenum')
+
+# index, key columns
+STAGED_PAIR_INDEXES = (
+    ('idx_merge_plan_pair_funding', ['merge_plan_id', 'funding_request_id']),
+    ('idx_merge_plan_pair_withdrawal', ['merge_plan_id', 'withdrawal_request_id']),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'merge_plans',
+        sa.Column('id', UNIQUEIDENTIFIER(), nullable=False),
+        sa.Column('merge_cycle_id', UNIQUEIDENTIFIER(), nullable=False),
+        sa.Column('currency', CURRENCY, nullable=False),
+        sa.Column('funding_count', sa.Integer(), nullable=False),
+        sa.Column('funding_total', sa.BigInteger(), nullable=False),
+        sa.Column('withdrawal_count', sa.Integer(), nullable=False),
+        sa.Column('withdrawal_total', sa.BigInteger(), nullable=False),
+        sa.Column('priority_count', sa.Integer(), nullable=False),
+        sa.Column('match_count', sa.Integer(), nullable=False),
+        sa.Column('unmatched_funding', sa.Integer(), nullable=False),
+        sa.Column('unmatched_withdrawal', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['merge_cycle_id'], ['merge_cycles.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('merge_cycle_id', 'currency', name='uq_merge_plan_cycle_currency'),
+    )
+    op.create_table(
+        'merge_plan_pairs',
+        sa.Column('id', UNIQUEIDENTIFIER(), nullable=False),
+        sa.Column('merge_plan_id', UNIQUEIDENTIFIER(), nullable=False),
+        sa.Column('funding_request_id', UNIQUEIDENTIFIER(), nullable=False),
+        sa.Column('withdrawal_request_id', UNIQUEIDENTIFIER(), nullable=False),
+        sa.Column('amount', sa.Numeric(18, 2), nullable=False),
+        sa.ForeignKeyConstraint(['merge_plan_id'], ['merge_plans.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    for index, columns in STAGED_PAIR_INDEXES:
+        op.create_index(index, 'merge_plan_pairs', columns)
+
+
+def downgrade() -> None:
+    for index, _ in STAGED_PAIR_INDEXES:
+        op.drop_index(index, table_name='merge_plan_pairs')
+    op.drop_table('merge_plan_pairs')
+    op.drop_table('merge_plans')
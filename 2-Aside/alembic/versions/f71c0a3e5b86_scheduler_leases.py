@@ -0,0 +1,35 @@
+"""Scheduler leases
+
+In-process schedulers (auto matcher, blob cleanup, deadline engine) run in
+every API instance; a row per scheduler elects the one instance that runs its
+jobs until the lease expires.
+
+Revision ID: f71c0a3e5b86
+Revises: e3b6d1a94f20
+Create Date: 2026-10-16 23:20:05
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f71c0a3e5b86'
+down_revision = 'e3b6d1a94f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scheduler_leases',
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('holder', sa.String(200), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_leases')
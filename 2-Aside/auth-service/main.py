@@ -5,8 +5,11 @@ Handles user registration, login, and JWT token management
 
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
 import sys
 import os
 import uuid
@@ -17,6 +20,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from shared import (
     get_db,
+    QueryStatsMiddleware,
+    get_async_db,
+    pool_status,
     User,
     Wallet,
     RegisterRequest,
@@ -61,6 +67,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# SQL statement count and database time per request (response headers + log fields)
+app.add_middleware(QueryStatsMiddleware)
+
 
 # ========================================
 # HEALTH CHECK
@@ -68,8 +77,8 @@ app.add_middleware(
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "auth-service"}
+    """Health check endpoint (includes database connection pool metrics)"""
+    return {"status": "healthy", "service": "auth-service", "database_pool": pool_status()}
 
 
 # ========================================
@@ -217,7 +226,7 @@ async def register(
 )
 async def login(
     request: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate user and return JWT tokens.
@@ -228,20 +237,23 @@ async def login(
     """
     try:
         # Find user by email
-        user = db.query(User).filter(User.email == request.email.lower()).first()
+        user = (await db.execute(
+            select(User).where(User.email == request.email.lower()).limit(1)
+        )).scalars().first()
 
         if not user:
             raise InvalidCredentialsError()
 
-        # Verify password
-        if not verify_password(request.password, user.password_hash):
+        # Verify password (bcrypt is CPU-bound - keep it off the event loop)
+        if not await run_in_threadpool(verify_password, request.password, user.password_hash):
             raise InvalidCredentialsError()
 
         # Check if any wallet is blocked
-        wallets = db.query(Wallet).filter(Wallet.user_id == user.id).all()
-        blocked_wallets = [w for w in wallets if w.is_blocked]
+        is_blocked = await db.scalar(
+            select(exists().where(Wallet.user_id == user.id, Wallet.is_blocked == True))
+        )
 
-        if blocked_wallets:
+        if is_blocked:
             from shared.exceptions import AccountBlockedError
             raise AccountBlockedError(
                 message="Your account has been blocked. Please contact support.",
@@ -20,6 +20,9 @@ print("Loading environment variables...")
 env_vars = load_env()
 
 # Import after loading env
+from sqlalchemy import inspect
+from alembic import command
+from alembic.config import Config
 from shared.database import Base, engine
 from shared import models
 
@@ -29,8 +32,18 @@ print(f"Database: {os.getenv('DATABASE_URL', 'Not set')[:50]}...")
 try:
     # Create all tables
     print("\nCreating tables...")
+    if inspect(engine).get_table_names():
+        # Changes to an existing schema come from the migrations - create_all would
+        # add new tables behind Alembic's back and leave new columns out
+        print("\n✗ Database already has tables - run `alembic upgrade head` instead")
+        print("  (databases created before the migrations: `alembic stamp 2a7f5c9e1d04` first)")
+        sys.exit(1)
+
     Base.metadata.create_all(bind=engine)
 
+    # A fresh schema already has every migration - record that so `alembic upgrade head` starts from here
+    command.stamp(Config("alembic.ini"), "head")
+
     print("\n✓ All tables created successfully!")
     print("\nTables created:")
     print("  ✓ Users")
@@ -46,7 +59,11 @@ try:
     print("  ✓ WithdrawalRequests (updated for batch matching)")
     print("  ✓ FundingMatchPairs (new)")
     print("  ✓ MergeCycles (new)")
+    print("  ✓ MergePlans / MergePlanPairs (new)")
+    print("  ✓ SchedulerLeases (new)")
+    print("  ✓ OrderBookVersions (new)")
     print("  ✓ AdminWallets (new)")
+    print("\n✓ Stamped at the latest Alembic revision")
 
 except Exception as e:
     print(f"\n✗ Error creating tables: {e}")
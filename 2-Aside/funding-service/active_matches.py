@@ -0,0 +1,141 @@
+"""
+Projection queries behind GET /my-active-matches.
+
+The dashboard polls the endpoint every 30 seconds, so it is served from one
+SELECT per role over funding_match_pairs alone: each pair carries a snapshot
+of both parties and of the withdrawer's payment details, written when it was
+matched (match_persistence.SNAPSHOT_COLUMNS). The queries return plain rows
+with exactly the columns the response uses - no joins and no ORM objects.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import uuid
+import sys
+import os
+
+from sqlalchemy import select
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from shared import FundingMatchPair
+
+_PAIR_COLUMNS = (
+    FundingMatchPair.id,
+    FundingMatchPair.amount,
+    FundingMatchPair.currency,
+    FundingMatchPair.proof_uploaded,
+    FundingMatchPair.proof_url,
+    FundingMatchPair.proof_confirmed,
+    FundingMatchPair.created_at,
+)
+
+
+def funder_pairs_query(user_id: uuid.UUID):
+    """Unconfirmed pairs the user funds, with the withdrawer to pay and where to pay them"""
+    return (
+        select(
+            *_PAIR_COLUMNS,
+            FundingMatchPair.withdrawer_username.label("username"),
+            FundingMatchPair.withdrawer_phone.label("phone"),
+            FundingMatchPair.proof_deadline,
+            FundingMatchPair.extension_requested,
+            FundingMatchPair.extension_granted,
+            FundingMatchPair.extended_deadline,
+            FundingMatchPair.payee_wallet_address.label("wallet_address"),
+            FundingMatchPair.payee_account_number.label("account_number"),
+            FundingMatchPair.payee_account_name.label("account_name"),
+            FundingMatchPair.payee_bank_name.label("bank_name"),
+        )
+        .where(FundingMatchPair.funder_user_id == user_id, FundingMatchPair.proof_confirmed == False)
+    )
+
+
+def withdrawer_pairs_query(user_id: uuid.UUID):
+    """Unconfirmed pairs paying the user, with the funder"""
+    return (
+        select(
+            *_PAIR_COLUMNS,
+            FundingMatchPair.funder_username.label("username"),
+            FundingMatchPair.funder_phone.label("phone"),
+            FundingMatchPair.confirmation_deadline,
+        )
+        .where(FundingMatchPair.withdrawer_user_id == user_id, FundingMatchPair.proof_confirmed == False)
+    )
+
+
+def _seconds_until(deadline: Optional[datetime], now: datetime) -> Optional[int]:
+    time_remaining_seconds = (deadline - now).total_seconds() if deadline else None
+    return int(time_remaining_seconds) if time_remaining_seconds else None
+
+
+def _payment_details(row) -> Dict[str, Any]:
+    """How the funder pays the withdrawer - their bank account or USDT address"""
+    if row.currency == "NAIRA" and row.account_number is not None:
+        return {
+            "type": "bank",
+            "account_number": row.account_number,
+            "account_name": row.account_name,
+            "bank_name": row.bank_name
+        }
+    if row.currency == "USDT":
+        return {
+            "type": "crypto",
+            "wallet_address": row.wallet_address,
+            "network": "BEP20"
+        }
+    return {}
+
+
+def format_funder_pairs(rows, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Response entries for funder_pairs_query rows (user needs to upload proof)"""
+    now = now or datetime.utcnow()
+    data = []
+    for row in rows:
+        deadline = row.extended_deadline if row.extension_granted else row.proof_deadline
+        data.append({
+            "pair_id": str(row.id),
+            "role": "funder",
+            "amount": str(row.amount),
+            "currency": row.currency,
+            "matched_user": {
+                "username": row.username,
+                "phone": row.phone,
+                "payment_details": _payment_details(row)
+            },
+            "proof_uploaded": row.proof_uploaded,
+            "proof_url": row.proof_url,
+            "proof_deadline": deadline.isoformat() if deadline else None,
+            "time_remaining_seconds": _seconds_until(deadline, now),
+            "can_extend": not row.extension_requested and row.proof_uploaded == False,
+            "extension_requested": row.extension_requested,
+            "created_at": row.created_at.isoformat()
+        })
+    return data
+
+
+def format_withdrawer_pairs(rows, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Response entries for withdrawer_pairs_query rows (user needs to confirm payment)"""
+    now = now or datetime.utcnow()
+    data = []
+    for row in rows:
+        data.append({
+            "pair_id": str(row.id),
+            "role": "withdrawer",
+            "amount": str(row.amount),
+            "currency": row.currency,
+            "matched_user": {
+                "username": row.username,
+                "phone": row.phone
+            },
+            "proof_uploaded": row.proof_uploaded,
+            "proof_url": row.proof_url,
+            "proof_confirmed": row.proof_confirmed,
+            "confirmation_deadline": row.confirmation_deadline.isoformat() if row.confirmation_deadline else None,
+            "time_remaining_seconds": _seconds_until(row.confirmation_deadline, now),
+            "awaiting_proof": not row.proof_uploaded,
+            "awaiting_confirmation": row.proof_uploaded and not row.proof_confirmed,
+            "created_at": row.created_at.isoformat()
+        })
+    return data
@@ -8,6 +8,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 import pytz
 from datetime import datetime, timedelta
+from typing import Optional
 import sys
 import os
 
@@ -16,6 +17,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from shared import SessionLocal, FundingRequest, WithdrawalRequest, FundingMatchPair, Wallet, MergeCycle
 from merge_scheduler import WAT, MERGE_TIMES
+from order_book import order_book
+from scheduler_lease import LeaderLease
+from deadline_scheduler import deadline_scheduler
 import logging
 import uuid
 
@@ -24,12 +28,16 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def run_matching():
+def run_matching(engine: Optional[str] = None):
     """
     Execute the batch matching process.
     This is called automatically at 9am, 3pm, 9pm WAT.
+
+    Args:
+        engine: Matching engine ("python" or "numpy"), default MATCHING_ENGINE
     """
-    from celery_batch_matching import smart_match_requests
+    from celery_batch_matching import match_all_currencies, apply_currency_stats
+    from merge_plan import delete_plans
 
     db = SessionLocal()
     try:
@@ -51,82 +59,41 @@ def run_matching():
             unmatched_withdrawal=0
         )
         db.add(merge_cycle)
-        db.flush()  # Get the ID
+        db.commit()  # Per-currency sessions reference the cycle
         logger.info(f"Created merge cycle: {merge_cycle.id}")
 
-        # Run matching for both currencies
-        for currency in ["NAIRA", "USDT"]:
-            logger.info(f"Running matching for {currency}...")
-
-            # Get all pending requests for this currency
-            funding_requests = db.query(FundingRequest).join(Wallet).filter(
-                Wallet.currency == currency,
-                FundingRequest.is_fully_matched == False,
-                FundingRequest.is_completed == False
-            ).all()
-
-            withdrawal_requests = db.query(WithdrawalRequest).join(Wallet).filter(
-                Wallet.currency == currency,
-                WithdrawalRequest.is_fully_matched == False,
-                WithdrawalRequest.is_completed == False
-            ).all()
-
-            logger.info(f"  Funding requests: {len(funding_requests)}")
-            logger.info(f"  Withdrawal requests: {len(withdrawal_requests)}")
-
-            if not funding_requests or not withdrawal_requests:
-                logger.info(f"  No requests to match for {currency}")
-                continue
-
-            # Run smart matching algorithm
-            user_matches = smart_match_requests(funding_requests, withdrawal_requests, db)
-            logger.info(f"  Created {len(user_matches)} matches")
-
-            # Update merge cycle stats
-            merge_cycle.total_funding_requests += len(funding_requests)
-            merge_cycle.total_withdrawal_requests += len(withdrawal_requests)
-
-            # Create match pairs
-            for funding_id, withdrawal_id, amount in user_matches:
-                pair = FundingMatchPair(
-                    id=uuid.uuid4(),
-                    funding_request_id=funding_id,
-                    withdrawal_request_id=withdrawal_id,
-                    merge_cycle_id=merge_cycle.id,  # Use the created merge cycle
-                    amount=amount,
-                    proof_uploaded=False,
-                    proof_confirmed=False,
-                    proof_deadline=now_utc + timedelta(hours=4),
-                    funder_missed_deadline=False,
-                    withdrawer_missed_deadline=False,
-                    created_at=now_utc
-                )
-                db.add(pair)
-                merge_cycle.matched_pairs += 1
-
-                # Update request amounts
-                funding = db.query(FundingRequest).filter(FundingRequest.id == funding_id).first()
-                withdrawal = db.query(WithdrawalRequest).filter(WithdrawalRequest.id == withdrawal_id).first()
-
-                if funding:
-                    funding.amount_remaining -= amount
-                    if funding.amount_remaining == 0:
-                        funding.is_fully_matched = True
-                        funding.matched_at = now_utc
-                        funding.merge_cycle_id = merge_cycle.id
-
-                if withdrawal:
-                    withdrawal.amount_remaining -= amount
-                    if withdrawal.amount_remaining == 0:
-                        withdrawal.is_fully_matched = True
-                        withdrawal.matched_at = now_utc
-                        withdrawal.merge_cycle_id = merge_cycle.id
-
-        # Mark cycle as completed
+        # Match every currency in its own session, concurrently, from the in-memory order book
+        stats, errors = match_all_currencies(
+            merge_cycle.id,
+            engine=engine,
+            now=now_utc,
+            session_factory=SessionLocal,
+            book=order_book
+        )
+        for currency, currency_stats in stats.items():
+            logger.info(
+                f"  {currency}: {currency_stats['total_funding_requests']} funding, "
+                f"{currency_stats['total_withdrawal_requests']} withdrawal, "
+                f"{currency_stats['matched_pairs']} matches"
+            )
+
+        apply_currency_stats(merge_cycle, stats)
+        if errors:
+            merge_cycle.status = "failed"
+            db.commit()
+            for currency, error in errors.items():
+                logger.error(f"Error matching {currency}: {error}", exc_info=error)
+            raise next(iter(errors.values()))
+
+        # Mark cycle as completed - its staged plans are spent
         merge_cycle.status = "completed"
         merge_cycle.completed_at = now_utc
+        delete_plans(db, merge_cycle.id)
         db.commit()
 
+        # New pairs' proof deadlines
+        deadline_scheduler.request_resync()
+
         logger.info(f"=== AUTO MATCHING COMPLETED ===")
         logger.info(f"  Matched pairs: {merge_cycle.matched_pairs}")
     except Exception as e:
@@ -137,12 +104,18 @@ def run_matching():
         db.close()
 
 
+# Only the instance holding this lease runs the scheduled merges
+matching_lease = LeaderLease("auto_matcher")
+
+
 def start_scheduler():
     """
     Start the background scheduler for automatic matching.
-    Schedules matching at 9am, 3pm, 9pm WAT daily.
+    Schedules matching at 9am, 3pm, 9pm WAT daily; every instance schedules
+    the jobs but only the holder of matching_lease runs them.
     """
     scheduler = BackgroundScheduler(timezone=WAT)
+    matching_lease.attach(scheduler)
 
     # Schedule matching at each merge time
     for merge_time in MERGE_TIMES:
@@ -157,7 +130,7 @@ def start_scheduler():
         )
 
         scheduler.add_job(
-            run_matching,
+            matching_lease.run_if_leader(run_matching),
             trigger=trigger,
             id=f"match_{hour:02d}_{minute:02d}",
             name=f"Auto Match at {hour:02d}:{minute:02d} WAT",
@@ -0,0 +1,182 @@
+"""
+Benchmark: GET /my-active-matches latency at 1, 10 and 100 active pairs per user.
+
+Seeds users who fund and withdraw with N unconfirmed pairs on each side, then
+times building the endpoint's response two ways:
+    per-pair    - the previous handler: load the user's pairs as ORM objects,
+                  then get() the counterparty's request, wallet, user and
+                  bank details for every pair
+    snapshot    - active_matches: one SELECT per role over the pairs' counterparty
+                  snapshot, no joins
+
+Every statement pays a simulated network round trip (--latency-ms) as it
+would against Azure SQL; pass --database-url to measure a real server.
+
+Usage:
+    python funding-service/benchmarks/bench_active_matches.py
+    python funding-service/benchmarks/bench_active_matches.py --pairs 1,10,100,500 --latency-ms 2
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+import argparse
+import statistics
+import time
+import uuid
+
+from sqlalchemy import insert, select
+
+import harness
+from active_matches import funder_pairs_query, withdrawer_pairs_query, format_funder_pairs, format_withdrawer_pairs
+from shared.models import User, Wallet, BankDetails, FundingRequest, WithdrawalRequest, FundingMatchPair
+from shared.query_stats import query_budget
+
+
+def seed_active_pairs(db, pairs: int, users: int, cycle_id: uuid.UUID):
+    """`users` users who each fund and withdraw with `pairs` unconfirmed pairs per side; returns their ids"""
+    now = datetime.utcnow()
+    rows = {User: [], Wallet: [], BankDetails: [], FundingRequest: [], WithdrawalRequest: [], FundingMatchPair: []}
+    owners = {}  # wallet id -> (user row, bank details row or {})
+    parties = {}  # request id -> its side of the pair's snapshot, as the merge cycle writes it
+
+    def new_wallet(with_bank: bool = False) -> uuid.UUID:
+        user_id, wallet_id = uuid.uuid4(), uuid.uuid4()
+        tag = user_id.hex[:12]
+        bank_id = uuid.uuid4() if with_bank else None
+        if with_bank:
+            rows[BankDetails].append({"id": bank_id, "account_number": tag[:10], "account_name": "Bench Payee",
+                                      "bank_name": "Bench Bank", "created_at": now})
+        rows[User].append({"id": user_id, "email": f"bench-{tag}@example.com", "username": f"bench_{tag}",
+                           "first_name": "Bench", "last_name": "User", "phone": "+2348000000000",
+                           "password_hash": "x", "referral_code": f"U{tag}", "created_at": now})
+        owners[wallet_id] = (rows[User][-1], rows[BankDetails][-1] if with_bank else {})
+        rows[Wallet].append({"id": wallet_id, "user_id": user_id, "currency": "NAIRA", "balance": Decimal("0"),
+                             "total_deposited": Decimal("0"), "total_won": Decimal("0"), "bank_details_id": bank_id,
+                             "referral_code": f"W{tag}", "created_at": now})
+        return wallet_id
+
+    def new_request(model, wallet_id: uuid.UUID, amount: Decimal) -> uuid.UUID:
+        request_id = uuid.uuid4()
+        rows[model].append({"id": request_id, "wallet_id": wallet_id, "currency": "NAIRA", "amount": amount,
+                            "amount_remaining": Decimal("0"), "requested_at": now})
+        user, bank = owners[wallet_id]
+        role = "funder" if model is FundingRequest else "withdrawer"
+        parties[request_id] = {f"{role}_user_id": user["id"], f"{role}_username": user["username"],
+                               f"{role}_phone": user["phone"]}
+        if role == "withdrawer":
+            parties[request_id].update({"currency": "NAIRA", "payee_account_number": bank.get("account_number"),
+                                        "payee_account_name": bank.get("account_name"),
+                                        "payee_bank_name": bank.get("bank_name")})
+        return request_id
+
+    def new_pair(funding_id: uuid.UUID, withdrawal_id: uuid.UUID, **kwargs):
+        rows[FundingMatchPair].append({"id": uuid.uuid4(), "funding_request_id": funding_id,
+                                       "withdrawal_request_id": withdrawal_id, "merge_cycle_id": cycle_id,
+                                       "amount": Decimal("1000"), "created_at": now,
+                                       **parties[funding_id], **parties[withdrawal_id], **kwargs})
+
+    user_ids = []
+    for _ in range(users):
+        wallet_id = new_wallet()
+        user_ids.append(rows[Wallet][-1]["user_id"])
+        funding_id = new_request(FundingRequest, wallet_id, Decimal(1000 * pairs))
+        withdrawal_id = new_request(WithdrawalRequest, wallet_id, Decimal(1000 * pairs))
+        for _ in range(pairs):
+            # Withdrawers to pay have bank details, so the funder side reads them too
+            payee = new_request(WithdrawalRequest, new_wallet(with_bank=True), Decimal("1000"))
+            new_pair(funding_id, payee, proof_deadline=now + timedelta(hours=4))
+            payer = new_request(FundingRequest, new_wallet(), Decimal("1000"))
+            new_pair(payer, withdrawal_id, proof_uploaded=True, confirmation_deadline=now + timedelta(hours=2))
+
+    for model, values in rows.items():
+        for start in range(0, len(values), 5000):
+            db.execute(insert(model), values[start:start + 5000])
+    db.commit()
+    return user_ids
+
+
+def add_latency(engine, latency_seconds: float):
+    """Sleep before every statement on the (single, static) SQLite connection - a stand-in for the network"""
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.set_trace_callback(lambda statement: time.sleep(latency_seconds))
+    finally:
+        raw.close()
+
+
+def per_pair(db, user_id):
+    """The previous handler's statements: the pairs, then four or five lookups per pair"""
+    funder_pairs = db.execute(
+        select(FundingMatchPair)
+        .join(FundingRequest, FundingMatchPair.funding_request_id == FundingRequest.id)
+        .join(Wallet, FundingRequest.wallet_id == Wallet.id)
+        .where(Wallet.user_id == user_id, FundingMatchPair.proof_confirmed == False)
+    ).scalars().all()
+    withdrawer_pairs = db.execute(
+        select(FundingMatchPair)
+        .join(WithdrawalRequest, FundingMatchPair.withdrawal_request_id == WithdrawalRequest.id)
+        .join(Wallet, WithdrawalRequest.wallet_id == Wallet.id)
+        .where(Wallet.user_id == user_id, FundingMatchPair.proof_confirmed == False)
+    ).scalars().all()
+    rows = []
+    for pair in funder_pairs:
+        wallet = db.get(Wallet, db.get(WithdrawalRequest, pair.withdrawal_request_id).wallet_id)
+        rows.append((pair.id, db.get(User, wallet.user_id).username,
+                     db.get(BankDetails, wallet.bank_details_id) if wallet.bank_details_id else None))
+    for pair in withdrawer_pairs:
+        wallet = db.get(Wallet, db.get(FundingRequest, pair.funding_request_id).wallet_id)
+        rows.append((pair.id, db.get(User, wallet.user_id).username))
+    return rows
+
+
+def snapshot(db, user_id):
+    now = datetime.utcnow()
+    return (format_funder_pairs(db.execute(funder_pairs_query(user_id)).all(), now)
+            + format_withdrawer_pairs(db.execute(withdrawer_pairs_query(user_id)).all(), now))
+
+
+def measure(session_factory, handler, user_ids, repeats: int):
+    """Median ms per request and statements per request - each request on a fresh session, as in the endpoint"""
+    times, statements = [], 0
+    for _ in range(repeats):
+        for user_id in user_ids:
+            db = session_factory()
+            with query_budget(10 ** 9) as stats:
+                times.append(harness.timed(handler, db, user_id))
+            statements = stats.count
+            db.close()
+    return 1000 * statistics.median(times), statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", default="1,10,100", help="Active pairs per user per side, comma separated")
+    parser.add_argument("--users", type=int, default=20, help="Users measured at each size")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Simulated round trip per statement (SQLite only)")
+    parser.add_argument("--database-url", default=None, help="Scratch database (default: SQLite in-memory)")
+    args = parser.parse_args()
+
+    database_url = harness.get_database_url(args.database_url)
+    engine, session_factory = harness.make_database(database_url)
+    sizes = [int(p) for p in args.pairs.split(",") if p]
+    db = session_factory()
+    cycle_id = harness.create_pending_cycle(db)
+    user_ids = {pairs: seed_active_pairs(db, pairs, args.users, cycle_id) for pairs in sizes}
+    db.close()
+
+    if database_url.startswith("sqlite") and args.latency_ms:
+        add_latency(engine, args.latency_ms / 1000)
+
+    print(f"Database: {database_url.split('@')[-1]}, {args.latency_ms} ms per statement")
+    print(f"{'pairs':>6} {'per-pair ms':>12} {'queries':>8} {'snapshot ms':>14} {'queries':>8}")
+    for pairs in sizes:
+        before_ms, before_queries = measure(session_factory, per_pair, user_ids[pairs], args.repeats)
+        after_ms, after_queries = measure(session_factory, snapshot, user_ids[pairs], args.repeats)
+        print(f"{pairs:>6} {before_ms:>12.2f} {before_queries:>8} {after_ms:>14.2f} {after_queries:>8}")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Benchmark: read endpoints on a blocking Session vs an AsyncSession under concurrent load.
+
+Runs the statements of GET /transactions/{currency} (wallet lookup, count,
+one page ordered by created_at) for many concurrent requests on one event
+loop, the way a uvicorn worker serves them:
+    blocking  - sync Session inside an `async def` endpoint (the old get_db
+                endpoints): every statement stalls the event loop
+    threadpool - sync Session in a plain `def` endpoint: requests run on the
+                threadpool (40 threads by default), one thread held per request
+    async     - AsyncSession from get_async_db: requests wait on the database
+                without holding the loop or a thread
+
+Every statement pays a simulated network round trip (--latency-ms) on the
+driver's thread, as it would against Azure SQL; SQLite alone answers too
+fast to show the difference. Pass --database-url (sync URL of a scratch
+database) to measure the real server instead.
+
+Usage:
+    python funding-service/benchmarks/bench_async_endpoints.py
+    python funding-service/benchmarks/bench_async_endpoints.py --requests 2000 --concurrency 200 --latency-ms 5
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+import uuid
+import os
+
+from sqlalchemy import create_engine, event, insert, select, func, desc
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+import harness
+from shared.database import Base, async_database_url, DB_POOL_SIZE, DB_MAX_OVERFLOW
+from shared.models import Wallet, WalletLog, TransactionTypeEnum
+
+
+def seed(session_factory, wallets: int, logs_per_wallet: int, rng: random.Random):
+    """Users with a NAIRA wallet each and their transaction history; returns the user ids"""
+    db = session_factory()
+    try:
+        harness.seed_pending_requests(db, harness.random_amounts(wallets, rng), [])
+        rows = db.execute(select(Wallet.id, Wallet.user_id)).all()
+        now = datetime.utcnow()
+        logs = [
+            {
+                "id": uuid.uuid4(),
+                "wallet_id": row.id,
+                "amount": Decimal(rng.randint(1, 500) * 100),
+                "type": TransactionTypeEnum.DEPOSIT,
+                "description": "Bench deposit",
+                "created_at": now - timedelta(minutes=rng.randint(1, 60 * 24 * 90)),
+            }
+            for row in rows for _ in range(logs_per_wallet)
+        ]
+        for start in range(0, len(logs), 5000):
+            db.execute(insert(WalletLog), logs[start:start + 5000])
+        db.commit()
+        return [row.user_id for row in rows]
+    finally:
+        db.close()
+
+
+def history_statements(user_id):
+    wallet = select(Wallet).where(Wallet.user_id == user_id, Wallet.currency == "NAIRA").limit(1)
+
+    def count(wallet_id):
+        return select(func.count()).select_from(WalletLog).where(WalletLog.wallet_id == wallet_id)
+
+    def page(wallet_id):
+        return select(WalletLog).where(WalletLog.wallet_id == wallet_id).order_by(desc(WalletLog.created_at)).limit(20)
+
+    return wallet, count, page
+
+
+def sync_history(session_factory, user_id) -> int:
+    wallet_query, count, page = history_statements(user_id)
+    db = session_factory()
+    try:
+        wallet = db.execute(wallet_query).scalars().first()
+        db.scalar(count(wallet.id))
+        return len(db.execute(page(wallet.id)).scalars().all())
+    finally:
+        db.close()
+
+
+async def async_history(session_factory, user_id) -> int:
+    wallet_query, count, page = history_statements(user_id)
+    async with session_factory() as db:
+        wallet = (await db.execute(wallet_query)).scalars().first()
+        await db.scalar(count(wallet.id))
+        return len((await db.execute(page(wallet.id))).scalars().all())
+
+
+def add_latency(sync_engine, latency_seconds: float):
+    """Sleep on the driver's thread before every SQLite statement - a stand-in for the network"""
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_conn, connection_record):
+        raw = getattr(getattr(dbapi_conn, "driver_connection", None), "_conn", None) or dbapi_conn
+        raw.set_trace_callback(lambda statement: time.sleep(latency_seconds))
+
+
+async def run_load(handler, user_ids, requests: int, concurrency: int):
+    """
+    Call handler `requests` times with `concurrency` clients in a closed loop.
+
+    Returns: (request latencies in ms, event loop lag in ms) - the lag is how
+        late a 10 ms ticker wakes up, i.e. how long any other request on the
+        worker (a /health probe, a new connection) would wait to be served
+    """
+    latencies, lags = [], []
+    remaining = iter(range(requests))
+    done = asyncio.Event()
+
+    async def client():
+        for i in remaining:
+            start = time.perf_counter()
+            await handler(user_ids[i % len(user_ids)])
+            latencies.append(1000 * (time.perf_counter() - start))
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(1000 * (time.perf_counter() - start - 0.01))
+
+    probe = asyncio.create_task(ticker())
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    done.set()
+    await probe
+    return latencies, lags or [0.0]
+
+
+def percentile(values, q: float) -> float:
+    return statistics.quantiles(values, n=100)[int(q) - 1]
+
+
+async def main_async(args):
+    database_url = args.database_url or os.getenv("BENCH_DATABASE_URL")
+    sqlite = not database_url
+    if sqlite:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_async.db')}"
+    connect_args = {"check_same_thread": False} if sqlite else {}
+    pool = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+
+    engine = create_engine(database_url, connect_args=connect_args, **pool)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    user_ids = seed(session_factory, args.wallets, args.logs, random.Random(args.seed))
+
+    async_engine = create_async_engine(async_database_url(database_url), connect_args=connect_args, **pool)
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if sqlite and args.latency_ms:
+        add_latency(engine, args.latency_ms / 1000)
+        add_latency(async_engine.sync_engine, args.latency_ms / 1000)
+        engine.dispose()  # Reconnect with the latency hook
+
+    async def blocking(user_id):
+        return sync_history(session_factory, user_id)
+
+    async def threadpool(user_id):
+        return await run_in_threadpool(sync_history, session_factory, user_id)
+
+    async def asynchronous(user_id):
+        return await async_history(async_session_factory, user_id)
+
+    print(f"Database: {database_url.split('@')[-1]}")
+    print(f"Requests: {args.requests}, {args.concurrency} concurrent, {args.latency_ms} ms per statement"
+          f"{' (simulated)' if sqlite else ''}, pool_size={DB_POOL_SIZE} max_overflow={DB_MAX_OVERFLOW}")
+    print(f"{'session':>10} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>8} {'loop lag max ms':>16}")
+
+    for name, handler in (("blocking", blocking), ("threadpool", threadpool), ("async", asynchronous)):
+        await run_load(handler, user_ids, min(args.requests, 50), args.concurrency)  # Warm up
+        start = time.perf_counter()
+        latencies, lags = await run_load(handler, user_ids, args.requests, args.concurrency)
+        total = time.perf_counter() - start
+        print(f"{name:>10} {percentile(latencies, 50):>8.2f} {percentile(latencies, 95):>8.2f} "
+              f"{args.requests / total:>8.0f} {max(lags):>16.2f}")
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Simulated round trip per statement (SQLite only)")
+    parser.add_argument("--wallets", type=int, default=200)
+    parser.add_argument("--logs", type=int, default=50, help="Transactions per wallet")
+    parser.add_argument("--database-url", default=None, help="Scratch database (default: a temporary SQLite file)")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: per-request database latency with and without connection pooling.
+
+Each simulated request opens a session, runs one small query and closes the
+session, the way get_db is used by the endpoints. Runs the same load through
+an engine built with NullPool (DB_POOL=null, a connection per session) and
+with the metered QueuePool (DB_POOL=queue), and prints p50/p95 latency plus
+the pool's checkout wait and saturation.
+
+Connection setup is what pooling saves, so run this against the real server
+(TLS + login to Azure SQL); SQLite connects in microseconds and shows little.
+
+Usage:
+    python funding-service/benchmarks/bench_connection_pool.py
+    python funding-service/benchmarks/bench_connection_pool.py --requests 2000 --threads 16 --database-url "mssql+pyodbc://..."
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import statistics
+import tempfile
+import time
+import os
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import harness  # noqa: F401 - import paths and DATABASE_URL for shared
+from shared.database import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+from shared.pool_metrics import MeteredQueuePool, pool_status
+
+
+def make_engine(database_url: str, pooled: bool):
+    if not pooled:
+        return create_engine(database_url, poolclass=NullPool)
+    return create_engine(
+        database_url,
+        poolclass=MeteredQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True
+    )
+
+
+def run_load(engine, requests: int, threads: int):
+    """Latencies in ms of `requests` session round trips over `threads` workers"""
+    session_factory = sessionmaker(bind=engine)
+
+    def request() -> float:
+        start = time.perf_counter()
+        db = session_factory()
+        try:
+            db.execute(text("SELECT 1")).scalar()
+        finally:
+            db.close()
+        return 1000 * (time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(lambda _: request(), range(requests)))
+
+
+def percentile(values, q: float) -> float:
+    return statistics.quantiles(values, n=100)[int(q) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--database-url", default=None, help="Database to connect to (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    database_url = args.database_url or os.getenv("BENCH_DATABASE_URL")
+    if not database_url:
+        # A file, so every NullPool connection really opens the database
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_pool.db')}"
+
+    print(f"Database: {database_url.split('@')[-1]}")
+    print(f"Requests: {args.requests} on {args.threads} threads, pool_size={DB_POOL_SIZE} max_overflow={DB_MAX_OVERFLOW}")
+    print(f"{'pool':>10} {'p50 ms':>8} {'p95 ms':>8} {'total s':>8}")
+
+    for pooled in (False, True):
+        engine = make_engine(database_url, pooled)
+        run_load(engine, min(args.requests, 100), args.threads)  # Warm up
+        if pooled:
+            engine.pool.metrics.reset()
+
+        start = time.perf_counter()
+        latencies = run_load(engine, args.requests, args.threads)
+        total = time.perf_counter() - start
+        name = "queue" if pooled else "null"
+        print(f"{name:>10} {percentile(latencies, 50):>8.3f} {percentile(latencies, 95):>8.3f} {total:>8.3f}")
+        if pooled:
+            print(f"{'':>10} {pool_status(engine)}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
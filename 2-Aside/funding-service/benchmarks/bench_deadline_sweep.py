@@ -0,0 +1,148 @@
+"""
+Benchmark: deadline sweep time vs size of the funding_match_pairs history.
+
+Seeds a fixed number of open pairs (awaiting proof or confirmation, a few of
+them just expired) on top of a growing history of settled pairs, then times
+the two deadline queries with and without the open-deadline filtered indexes
+(idx_match_pair_open_proof, idx_match_pair_open_confirmation):
+    sweep   - deadline_enforcement.enforce_expired_deadlines (rolled back after each run)
+    reload  - deadline_scheduler.load_open_deadlines, the deadline engine's resync
+
+With the indexes both should stay flat as the history grows.
+
+Usage:
+    python funding-service/benchmarks/bench_deadline_sweep.py
+    python funding-service/benchmarks/bench_deadline_sweep.py --history 10000,1000000 --open 5000 --database-url mssql+pymssql://...
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+import argparse
+import random
+import statistics
+import uuid
+
+from sqlalchemy import insert
+
+import harness
+from shared import FundingMatchPair, FundingRequest, WithdrawalRequest
+from deadline_enforcement import enforce_expired_deadlines
+from deadline_scheduler import load_open_deadlines
+
+OPEN_DEADLINE_INDEXES = ("idx_match_pair_open_proof", "idx_match_pair_open_confirmation")
+
+# Requests per side the pairs are spread over
+REQUESTS_PER_SIDE = 1000
+
+
+def seed_pairs(db, history: int, open_pairs: int, rng: random.Random, now: datetime):
+    """Insert settled history plus open pairs, ~1% of the open ones past their deadline"""
+    harness.seed_pending_requests(
+        db, harness.random_amounts(REQUESTS_PER_SIDE, rng), harness.random_amounts(REQUESTS_PER_SIDE, rng)
+    )
+    funding_ids = [row.id for row in db.query(FundingRequest.id)]
+    withdrawal_ids = [row.id for row in db.query(WithdrawalRequest.id)]
+    cycle_id = harness.create_pending_cycle(db)
+
+    def pair(created_at: datetime, **fields) -> dict:
+        return {
+            "id": uuid.uuid4(),
+            "funding_request_id": rng.choice(funding_ids),
+            "withdrawal_request_id": rng.choice(withdrawal_ids),
+            "merge_cycle_id": cycle_id,
+            "amount": Decimal("1000"),
+            "proof_deadline": created_at + timedelta(hours=4),
+            "created_at": created_at,
+            **fields
+        }
+
+    rows = []
+    for _ in range(history):
+        created_at = now - timedelta(days=rng.randint(1, 365))
+        if rng.random() < 0.95:
+            rows.append(pair(
+                created_at, proof_uploaded=True, proof_confirmed=True,
+                confirmation_deadline=created_at + timedelta(hours=6)
+            ))
+        else:
+            rows.append(pair(created_at, funder_missed_deadline=True))
+
+    for _ in range(open_pairs):
+        # Deadlines from just expired to four hours out
+        created_at = now - timedelta(hours=4) + timedelta(seconds=rng.randint(-60, 4 * 3600))
+        if rng.random() < 0.7:
+            rows.append(pair(created_at))
+        else:
+            rows.append(pair(
+                created_at, proof_uploaded=True,
+                confirmation_deadline=created_at + timedelta(hours=4)
+            ))
+
+    for start in range(0, len(rows), 5000):
+        db.execute(insert(FundingMatchPair), rows[start:start + 5000])
+    db.commit()
+
+
+def time_queries(session_factory, now: datetime, repeats: int):
+    """Median seconds of (sweep, reload)"""
+    sweeps, reloads = [], []
+    for _ in range(repeats):
+        db = session_factory()
+        try:
+            sweeps.append(harness.timed(enforce_expired_deadlines, db, now))
+            db.rollback()
+            reloads.append(harness.timed(load_open_deadlines, db))
+        finally:
+            db.close()
+    return statistics.median(sweeps), statistics.median(reloads)
+
+
+def run_once(database_url: str, history: int, open_pairs: int, repeats: int, seed: int):
+    """Seed one database and return ((sweep, reload) without indexes, (sweep, reload) with them)"""
+    engine, session_factory = harness.make_database(database_url)
+    now = datetime.utcnow()
+
+    db = session_factory()
+    try:
+        seed_pairs(db, history, open_pairs, random.Random(seed), now)
+    finally:
+        db.close()
+
+    indexes = [index for index in FundingMatchPair.__table__.indexes if index.name in OPEN_DEADLINE_INDEXES]
+    for index in indexes:
+        index.drop(bind=engine)
+    without = time_queries(session_factory, now, repeats)
+
+    for index in indexes:
+        index.create(bind=engine)
+    indexed = time_queries(session_factory, now, repeats)
+
+    engine.dispose()
+    return without, indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", default="10000,100000,500000", help="Settled pairs, comma separated")
+    parser.add_argument("--open", type=int, default=2000, help="Open pairs")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="Scratch database (default: SQLite in-memory)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    database_url = harness.get_database_url(args.database_url)
+    sizes = [int(s) for s in args.history.split(",") if s]
+
+    print(f"Database: {database_url.split('@')[-1]}")
+    print(f"Open pairs: {args.open}")
+    print(f"{'history':>9} {'sweep s':>9} {'indexed':>9} {'reload s':>9} {'indexed':>9}")
+
+    for history in sizes:
+        (sweep, reload), (indexed_sweep, indexed_reload) = run_once(
+            database_url, history, args.open, args.repeats, args.seed
+        )
+        print(f"{history:>9} {sweep:>9.4f} {indexed_sweep:>9.4f} {reload:>9.4f} {indexed_reload:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
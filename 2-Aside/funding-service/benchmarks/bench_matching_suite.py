@@ -0,0 +1,198 @@
+"""
+Matching engine benchmark suite.
+
+For each population size, generates a synthetic NAIRA/USDT population and measures:
+    smart_match    - smart_match_requests on in-memory rows (no database)
+    merge_cycle    - the run_merge_cycle Celery task end to end
+    planned_merge  - run_merge_cycle after plan_merge_cycle ran at cutoff (plan not timed)
+    run_matching   - the APScheduler auto_matcher.run_matching job end to end
+
+Each scenario reports latency, SQL statement count and peak Python memory
+(tracemalloc, measured in a separate pass so tracing does not skew latency).
+
+Usage:
+    python funding-service/benchmarks/bench_matching_suite.py
+    python funding-service/benchmarks/bench_matching_suite.py --sizes 1000,10000 --json results.json
+    python funding-service/benchmarks/bench_matching_suite.py --database-url "$DATABASE_URL"   # scratch DB only!
+"""
+
+from collections import namedtuple
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+import argparse
+import json
+import time
+import tracemalloc
+
+import harness
+import synthetic
+from shared.models import MergeCycle
+import celery_batch_matching
+import auto_matcher
+
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+SCENARIOS = ("smart_match", "merge_cycle", "planned_merge", "run_matching")
+
+# smart_match_requests only reads .id and .amount_remaining
+PendingRow = namedtuple("PendingRow", ["id", "amount_remaining"])
+
+
+@dataclass
+class Result:
+    scenario: str
+    size: int
+    seconds: float
+    statements: int
+    peak_memory_mb: Optional[float]
+    matches: int
+
+
+def _measure(run: Callable[[], int], trace_memory: bool):
+    """Run once; returns (seconds, matches) or (peak_mb, matches) when tracing"""
+    if not trace_memory:
+        start = time.perf_counter()
+        matches = run()
+        return time.perf_counter() - start, matches
+
+    tracemalloc.start()
+    try:
+        matches = run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024), matches
+
+
+def bench_smart_match(spec: synthetic.PopulationSpec, trace_memory: bool) -> Result:
+    population = synthetic.generate_population(spec)
+    per_currency = [
+        (
+            [PendingRow(r["id"], r["amount_remaining"]) for r in population.requests_for(currency, population.funding)],
+            [PendingRow(r["id"], r["amount_remaining"]) for r in population.requests_for(currency, population.withdrawals)],
+        )
+        for currency in ("NAIRA", "USDT")
+    ]
+
+    def run():
+        return sum(len(celery_batch_matching.smart_match_requests(f, w)) for f, w in per_currency)
+
+    seconds, matches = _measure(run, trace_memory=False)
+    peak = _measure(run, trace_memory=True)[0] if trace_memory else None
+    return Result("smart_match", spec.size, seconds, 0, peak, matches)
+
+
+def _seeded_database(database_url: str, spec: synthetic.PopulationSpec, cutoff_time: datetime):
+    engine, session_factory = harness.make_database(database_url)
+    db = session_factory()
+    try:
+        synthetic.load_population(db, synthetic.generate_population(spec, cutoff_time))
+    finally:
+        db.close()
+    return engine, session_factory
+
+
+def _run_driver(database_url: str, spec: synthetic.PopulationSpec, driver: str, trace_memory: bool):
+    """Seed a fresh database and run one driver; returns (seconds_or_peak_mb, statements, matches)"""
+    scheduled_time = datetime.utcnow()
+    cutoff_time = scheduled_time - timedelta(minutes=10)
+    engine, session_factory = _seeded_database(database_url, spec, cutoff_time)
+    counter = harness.StatementCounter(engine)
+
+    if driver in ("merge_cycle", "planned_merge"):
+        db = session_factory()
+        try:
+            cycle_id = harness.create_pending_cycle(db, scheduled_time)
+        finally:
+            db.close()
+        module, run = celery_batch_matching, lambda: celery_batch_matching.run_merge_cycle(str(cycle_id))
+    else:
+        module, run = auto_matcher, auto_matcher.run_matching
+
+    original_session = module.SessionLocal
+    module.SessionLocal = session_factory
+
+    if driver == "planned_merge":
+        with harness.quiet():
+            celery_batch_matching.plan_merge_cycle(str(cycle_id))
+
+    def run_and_count_matches():
+        with harness.quiet():
+            run()
+        db = session_factory()
+        try:
+            return sum(c.matched_pairs for c in db.query(MergeCycle).all())
+        finally:
+            db.close()
+
+    counter.reset()
+    try:
+        measured, matches = _measure(run_and_count_matches, trace_memory)
+    finally:
+        module.SessionLocal = original_session
+
+    # The match count lookup above is one extra statement
+    statements = counter.count - 1
+    engine.dispose()
+    return measured, statements, matches
+
+
+def bench_driver(database_url: str, spec: synthetic.PopulationSpec, driver: str, trace_memory: bool) -> Result:
+    seconds, statements, matches = _run_driver(database_url, spec, driver, trace_memory=False)
+    peak = _run_driver(database_url, spec, driver, trace_memory=True)[0] if trace_memory else None
+    return Result(driver, spec.size, seconds, statements, peak, matches)
+
+
+def run_suite(
+    sizes: List[int],
+    database_url: str,
+    scenarios=SCENARIOS,
+    trace_memory: bool = True,
+    seed: int = 42,
+    report: Callable[[Result], None] = lambda result: None
+) -> List[Result]:
+    """Run every scenario at every size; `report` is called as each result lands"""
+    results = []
+    for size in sizes:
+        spec = synthetic.PopulationSpec(size=size, seed=seed)
+        for scenario in scenarios:
+            if scenario == "smart_match":
+                result = bench_smart_match(spec, trace_memory)
+            else:
+                result = bench_driver(database_url, spec, scenario, trace_memory)
+            results.append(result)
+            report(result)
+    return results
+
+
+def print_result(result: Result):
+    peak = f"{result.peak_memory_mb:.1f}" if result.peak_memory_mb is not None else "-"
+    print(f"{result.scenario:<13} {result.size:>9} {result.seconds:>10.3f} {result.statements:>8} {peak:>10} {result.matches:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Population sizes, comma separated")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--database-url", default=None, help="Scratch database (default: SQLite in-memory)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="Write results to this file for regression comparison")
+    args = parser.parse_args()
+
+    database_url = harness.get_database_url(args.database_url)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    scenarios = [s for s in args.scenarios.split(",") if s]
+
+    print(f"Database: {database_url.split('@')[-1]}")
+    print(f"{'scenario':<13} {'requests':>9} {'seconds':>10} {'queries':>8} {'peak MB':>10} {'matches':>9}")
+    results = run_suite(sizes, database_url, scenarios, not args.no_memory, args.seed, report=print_result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
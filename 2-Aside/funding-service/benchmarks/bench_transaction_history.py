@@ -0,0 +1,103 @@
+"""
+Benchmark: transaction history page time, OFFSET/LIMIT vs keyset cursor.
+
+Seeds one wallet with a long wallet_logs history (plus other wallets' rows
+around it) and times fetching a 20-row page at growing depths, the way
+GET /transactions/{currency} does:
+    offset  - ORDER BY created_at DESC OFFSET depth (the page-number fallback)
+    keyset  - WHERE (created_at, id) < cursor, a seek on idx_wallet_log_wallet_created
+    count   - the exact total, skipped with include_total=false
+
+Offset time grows with depth; keyset should stay flat.
+
+Usage:
+    python funding-service/benchmarks/bench_transaction_history.py
+    python funding-service/benchmarks/bench_transaction_history.py --history 500000 --depths 0,10000,100000,400000
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+import argparse
+import random
+import statistics
+import uuid
+
+from sqlalchemy import insert, select, func, desc
+
+import harness
+from shared.models import Wallet, WalletLog, TransactionTypeEnum
+from shared.utils import keyset_condition
+
+PER_PAGE = 20
+
+
+def seed_history(db, history: int, rng: random.Random) -> uuid.UUID:
+    """One wallet with `history` transactions, plus as many spread over 100 other wallets"""
+    harness.seed_pending_requests(db, harness.random_amounts(101, rng), [])
+    wallet_ids = [row.id for row in db.execute(select(Wallet.id))]
+    wallet_id, others = wallet_ids[0], wallet_ids[1:]
+
+    now = datetime.utcnow()
+    rows = []
+    for i in range(2 * history):
+        rows.append({
+            "id": uuid.uuid4(),
+            "wallet_id": wallet_id if i % 2 == 0 else rng.choice(others),
+            "amount": Decimal(rng.randint(1, 500) * 100),
+            "type": TransactionTypeEnum.DEPOSIT,
+            "created_at": now - timedelta(seconds=rng.randint(0, 3 * 365 * 24 * 3600)),
+        })
+        if len(rows) == 5000:
+            db.execute(insert(WalletLog), rows)
+            rows = []
+    if rows:
+        db.execute(insert(WalletLog), rows)
+    db.commit()
+    return wallet_id
+
+
+def time_page(db, query, repeats: int) -> float:
+    return statistics.median(harness.timed(lambda: db.execute(query).all()) for _ in range(repeats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=200000, help="Transactions of the wallet being paged")
+    parser.add_argument("--depths", default="0,1000,10000,100000,190000", help="Rows skipped, comma separated")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="Scratch database (default: SQLite in-memory)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    database_url = harness.get_database_url(args.database_url)
+    engine, session_factory = harness.make_database(database_url)
+    db = session_factory()
+    wallet_id = seed_history(db, args.history, random.Random(args.seed))
+
+    order = (desc(WalletLog.created_at), desc(WalletLog.id))
+    history = select(WalletLog).where(WalletLog.wallet_id == wallet_id)
+    count = select(func.count()).select_from(WalletLog).where(WalletLog.wallet_id == wallet_id)
+
+    print(f"Database: {database_url.split('@')[-1]}")
+    print(f"History: {args.history} transactions, count(*) {1000 * time_page(db, count, args.repeats):.2f} ms")
+    print(f"{'depth':>9} {'offset ms':>10} {'keyset ms':>10}")
+
+    for depth in [int(d) for d in args.depths.split(",") if d]:
+        offset_page = history.order_by(*order).offset(depth).limit(PER_PAGE + 1)
+        # The cursor the previous page would have handed out
+        last = db.execute(
+            select(WalletLog.created_at, WalletLog.id).where(WalletLog.wallet_id == wallet_id)
+            .order_by(*order).offset(max(depth - 1, 0)).limit(1)
+        ).one()
+        keyset_page = history.order_by(*order).limit(PER_PAGE + 1)
+        if depth:
+            keyset_page = keyset_page.where(keyset_condition((WalletLog.created_at, WalletLog.id), tuple(last)))
+        print(f"{depth:>9} {1000 * time_page(db, offset_page, args.repeats):>10.2f} "
+              f"{1000 * time_page(db, keyset_page, args.repeats):>10.2f}")
+
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Shared setup for funding-service benchmarks.
+Builds a scratch database, seeds pending requests and counts statements.
+
+SQLite in-memory is used unless a URL is passed with --database-url or
+BENCH_DATABASE_URL. Point that at a SCRATCH database only - tables are
+created and dropped by the benchmarks.
+"""
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional, Tuple
+import io
+import logging
+import random
+import time
+import uuid
+import sys
+import os
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.dirname(BENCH_DIR)
+
+# Make shared/ and the funding-service modules importable
+sys.path.insert(0, os.path.dirname(SERVICE_DIR))
+sys.path.insert(0, SERVICE_DIR)
+
+# shared.database refuses to import without a DATABASE_URL; benchmarks never use its engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from shared.database import Base
+from shared.models import User, Wallet, FundingRequest, WithdrawalRequest, MergeCycle
+import celery_batch_matching
+
+
+@compiles(UNIQUEIDENTIFIER, "sqlite")
+def _uniqueidentifier_on_sqlite(type_, compiler, **kw):
+    """SQLite has no UNIQUEIDENTIFIER - store UUIDs as text"""
+    return "CHAR(36)"
+
+
+class StatementCounter:
+    """Counts statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def get_database_url(cli_url: Optional[str] = None) -> str:
+    """Resolve the benchmark database URL (CLI > BENCH_DATABASE_URL > SQLite in-memory)"""
+    return cli_url or os.getenv("BENCH_DATABASE_URL") or "sqlite://"
+
+
+def make_database(database_url: str):
+    """
+    Create a fresh schema on the given database.
+
+    Returns: (engine, session_factory)
+    """
+    if database_url.startswith("sqlite"):
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        # The in-memory database is one shared connection and SQLite allows a
+        # single writer anyway - match currencies one after the other
+        celery_batch_matching.MERGE_PARALLELISM = 1
+    else:
+        engine = create_engine(database_url)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return engine, session_factory
+
+
+def random_amounts(count: int, rng: random.Random, step: int = 1000, max_steps: int = 50) -> List[Decimal]:
+    """Amounts in multiples of `step`, the way users usually round their requests"""
+    return [Decimal(step * rng.randint(1, max_steps)) for _ in range(count)]
+
+
+def seed_pending_requests(
+    db,
+    funding_amounts: List[Decimal],
+    withdrawal_amounts: List[Decimal],
+    currency: str = "NAIRA",
+    requested_at: Optional[datetime] = None
+) -> Tuple[int, int]:
+    """
+    Bulk insert one user + wallet per request, then the pending requests.
+
+    Returns: (funding_count, withdrawal_count)
+    """
+    requested_at = requested_at or datetime.utcnow() - timedelta(hours=1)
+    users, wallets, funding, withdrawals = [], [], [], []
+
+    def _new_wallet() -> uuid.UUID:
+        user_id, wallet_id = uuid.uuid4(), uuid.uuid4()
+        tag = user_id.hex[:12]
+        users.append({
+            "id": user_id,
+            "email": f"bench-{tag}@example.com",
+            "username": f"bench_{tag}",
+            "first_name": "Bench",
+            "last_name": "User",
+            "phone": "+2348000000000",
+            "password_hash": "x",
+            "referral_code": f"U{tag}",
+            "created_at": requested_at,
+        })
+        wallets.append({
+            "id": wallet_id,
+            "user_id": user_id,
+            "currency": currency,
+            "balance": Decimal("0"),
+            "total_deposited": Decimal("0"),
+            "total_won": Decimal("0"),
+            "referral_code": f"W{tag}",
+            "created_at": requested_at,
+        })
+        return wallet_id
+
+    for amount in funding_amounts:
+        funding.append({
+            "id": uuid.uuid4(),
+            "wallet_id": _new_wallet(),
+            "currency": currency,
+            "amount": amount,
+            "amount_remaining": amount,
+            "requested_at": requested_at,
+        })
+
+    for amount in withdrawal_amounts:
+        withdrawals.append({
+            "id": uuid.uuid4(),
+            "wallet_id": _new_wallet(),
+            "currency": currency,
+            "amount": amount,
+            "amount_remaining": amount,
+            "requested_at": requested_at,
+        })
+
+    db.execute(insert(User), users)
+    db.execute(insert(Wallet), wallets)
+    if funding:
+        db.execute(insert(FundingRequest), funding)
+    if withdrawals:
+        db.execute(insert(WithdrawalRequest), withdrawals)
+    db.commit()
+    return len(funding), len(withdrawals)
+
+
+def create_pending_cycle(db, scheduled_time: Optional[datetime] = None) -> uuid.UUID:
+    """Create a pending merge cycle whose cutoff has already passed"""
+    scheduled_time = scheduled_time or datetime.utcnow()
+    cycle = MergeCycle(
+        id=uuid.uuid4(),
+        scheduled_time=scheduled_time,
+        cutoff_time=scheduled_time - timedelta(minutes=10),
+        join_window_closes=scheduled_time + timedelta(minutes=5),
+        status="pending",
+        created_at=datetime.utcnow()
+    )
+    db.add(cycle)
+    db.commit()
+    return cycle.id
+
+
+@contextmanager
+def quiet():
+    """Swallow the drivers' progress prints and log lines while timing"""
+    logging.disable(logging.INFO)
+    try:
+        with redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def timed(fn, *args, **kwargs) -> float:
+    """Run fn and return elapsed wall-clock seconds"""
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
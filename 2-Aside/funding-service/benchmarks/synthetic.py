@@ -0,0 +1,183 @@
+"""
+Synthetic population generator for matching benchmarks.
+Produces users, wallets and pending funding/withdrawal requests in NAIRA and USDT
+with log-normal amounts and a share of priority (re-queued) withdrawals.
+"""
+
+from sqlalchemy import insert
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+import math
+import random
+import uuid
+
+from shared.models import User, Wallet, BankDetails, FundingRequest, WithdrawalRequest
+
+# Request limits enforced by funding-service/main.py (same for both currencies)
+MIN_AMOUNT = 1000
+MAX_AMOUNT = 10000000
+
+# Rows per INSERT batch when loading a population
+INSERT_BATCH_SIZE = 5000
+
+
+@dataclass
+class AmountProfile:
+    """
+    Log-normal amount distribution for one currency.
+
+    median: Typical request amount
+    sigma: Spread of log(amount)
+    round_to: Most users request round amounts - this is the step they round to
+    round_share: Fraction of requests that are round amounts (the rest have kobo/cents)
+    """
+    median: float
+    sigma: float
+    round_to: int
+    round_share: float
+
+    def sample(self, rng: random.Random) -> Decimal:
+        amount = rng.lognormvariate(math.log(self.median), self.sigma)
+        amount = min(max(amount, MIN_AMOUNT), MAX_AMOUNT)
+        if rng.random() < self.round_share:
+            amount = max(MIN_AMOUNT, round(amount / self.round_to) * self.round_to)
+            return Decimal(amount).quantize(Decimal("0.01"))
+        return Decimal(str(round(amount, 2))).quantize(Decimal("0.01"))
+
+
+DEFAULT_PROFILES = {
+    "NAIRA": AmountProfile(median=25000, sigma=1.1, round_to=500, round_share=0.9),
+    "USDT": AmountProfile(median=1500, sigma=0.6, round_to=10, round_share=0.7),
+}
+
+
+@dataclass
+class PopulationSpec:
+    """
+    Shape of a synthetic population.
+
+    size: Total pending requests across both currencies and sides
+    naira_share: Fraction of requests in NAIRA (rest USDT)
+    funding_share: Fraction of requests that are funding (rest withdrawals)
+    priority_share: Fraction of withdrawals re-queued with priority after a failed funder
+    late_share: Fraction of requests created after the cycle cutoff
+    """
+    size: int
+    naira_share: float = 0.8
+    funding_share: float = 0.5
+    priority_share: float = 0.05
+    late_share: float = 0.02
+    seed: int = 42
+    profiles: Dict[str, AmountProfile] = field(default_factory=lambda: dict(DEFAULT_PROFILES))
+
+
+@dataclass
+class Population:
+    """Row dicts ready for bulk insert"""
+    users: List[dict] = field(default_factory=list)
+    bank_details: List[dict] = field(default_factory=list)
+    wallets: List[dict] = field(default_factory=list)
+    funding: List[dict] = field(default_factory=list)
+    withdrawals: List[dict] = field(default_factory=list)
+
+    def requests_for(self, currency: str, rows: List[dict]) -> List[dict]:
+        return [r for r in rows if r["currency"] == currency]
+
+
+def generate_population(spec: PopulationSpec, cutoff_time: Optional[datetime] = None) -> Population:
+    """
+    Generate one user + wallet per pending request (users can only hold one pending request).
+
+    Requests are spread over the 6 hours before cutoff_time; late_share of them land after it.
+    """
+    rng = random.Random(spec.seed)
+    cutoff_time = cutoff_time or datetime.utcnow()
+    window_start = cutoff_time - timedelta(hours=6)
+    population = Population()
+
+    for _ in range(spec.size):
+        currency = "NAIRA" if rng.random() < spec.naira_share else "USDT"
+        is_funding = rng.random() < spec.funding_share
+
+        user_id, wallet_id = uuid.uuid4(), uuid.uuid4()
+        tag = user_id.hex[:12]
+        if rng.random() < spec.late_share:
+            requested_at = cutoff_time + timedelta(seconds=rng.randint(1, 600))
+        else:
+            requested_at = window_start + timedelta(seconds=rng.randint(0, 6 * 3600 - 1))
+
+        population.users.append({
+            "id": user_id,
+            "email": f"synthetic-{tag}@example.com",
+            "username": f"synthetic_{tag}",
+            "first_name": "Synthetic",
+            "last_name": "User",
+            "phone": f"+23480{rng.randint(10000000, 99999999)}",
+            "password_hash": "x",
+            "referral_code": f"U{tag}",
+            "created_at": window_start,
+        })
+
+        wallet = {
+            "id": wallet_id,
+            "user_id": user_id,
+            "currency": currency,
+            "balance": Decimal("0"),
+            "total_deposited": Decimal("0"),
+            "total_won": Decimal("0"),
+            "referral_code": f"W{tag}",
+            "created_at": window_start,
+        }
+        if currency == "NAIRA":
+            bank_details_id = uuid.uuid4()
+            population.bank_details.append({
+                "id": bank_details_id,
+                "account_number": f"{rng.randint(0, 9999999999):010d}",
+                "account_name": f"Synthetic User {tag}",
+                "bank_name": "Synthetic Bank",
+                "created_at": window_start,
+            })
+            wallet["bank_details_id"] = bank_details_id
+        else:
+            wallet["wallet_address"] = f"0x{uuid.uuid4().hex}{uuid.uuid4().hex[:8]}"
+        population.wallets.append(wallet)
+
+        amount = spec.profiles[currency].sample(rng)
+        request = {
+            "id": uuid.uuid4(),
+            "wallet_id": wallet_id,
+            "currency": currency,
+            "amount": amount,
+            "amount_remaining": amount,
+            "requested_at": requested_at,
+        }
+
+        if is_funding:
+            population.funding.append(request)
+            continue
+
+        wallet["balance"] = amount
+        if rng.random() < spec.priority_share:
+            request["is_priority"] = True
+            request["priority_timestamp"] = requested_at - timedelta(hours=rng.randint(6, 48))
+            request["failed_match_count"] = 1
+        population.withdrawals.append(request)
+
+    return population
+
+
+def _insert_batched(db, model, rows: List[dict]):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.execute(insert(model), rows[start:start + INSERT_BATCH_SIZE])
+
+
+def load_population(db, population: Population):
+    """Bulk insert a generated population and commit"""
+    _insert_batched(db, User, population.users)
+    _insert_batched(db, BankDetails, population.bank_details)
+    _insert_batched(db, Wallet, population.wallets)
+    _insert_batched(db, FundingRequest, population.funding)
+    _insert_batched(db, WithdrawalRequest, population.withdrawals)
+    db.commit()
@@ -6,10 +6,14 @@ Runs daily at midnight to delete payment proofs older than 7 days after confirma
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
 from azure_blob_service import azure_blob_service
+from scheduler_lease import LeaderLease
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Only the instance holding this lease runs the cleanup
+cleanup_lease = LeaderLease("blob_cleanup")
+
 
 def cleanup_expired_blobs():
     """
@@ -27,10 +31,11 @@ def start_cleanup_scheduler():
     Runs daily at midnight (00:00)
     """
     scheduler = BackgroundScheduler()
+    cleanup_lease.attach(scheduler)
 
-    # Schedule cleanup at midnight every day
+    # Schedule cleanup at midnight every day (on the lease holder only)
     scheduler.add_job(
-        cleanup_expired_blobs,
+        cleanup_lease.run_if_leader(cleanup_expired_blobs),
         'cron',
         hour=0,
         minute=0,
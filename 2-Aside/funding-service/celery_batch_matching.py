@@ -5,11 +5,14 @@ Smart amount splitting algorithm with admin wallet fallback
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, task_prerun, task_postrun
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, or_, case, exists
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import List, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Optional
 import uuid
 import sys
 import os
@@ -20,13 +23,66 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from shared import (
     SessionLocal,
+    engine as db_engine,
+    set_query_source,
     FundingRequest,
     WithdrawalRequest,
     FundingMatchPair,
     MergeCycle,
+    MergePlan,
     AdminWallet,
-    Wallet,
-    User,
+    CurrencyType,
+)
+from merge_plan import (
+    MERGE_BATCH_SIZE,
+    make_plan,
+    load_plans,
+    plan_is_current,
+    is_complete,
+    plan_stats,
+    batch_fits,
+    apply_batch,
+    truncate_plan,
+    delete_plan,
+    delete_plans,
+)
+from deadline_enforcement import enforce_expired_deadlines
+from matching_kernel import match_minor_units, to_minor_units, from_minor_units
+from vector_matcher import match_minor_units_vectorized, is_available as vector_engine_available
+
+# Matching engine used when a cycle does not pick one: "python" or "numpy"
+DEFAULT_MATCHING_ENGINE = os.getenv("MATCHING_ENGINE", "python")
+
+# Currency books share no rows, so each is matched in its own session and transaction.
+# MERGE_PARALLELISM caps how many run at once (1 = one after the other)
+MERGE_CURRENCIES = [currency.value for currency in CurrencyType]
+MERGE_PARALLELISM = int(os.getenv("MERGE_PARALLELISM", str(len(MERGE_CURRENCIES))))
+
+# Time limits of the run_merge_cycle task: SoftTimeLimitExceeded is raised in the
+# task (which then marks the cycle failed), and the worker is killed at the hard limit
+MERGE_SOFT_TIME_LIMIT_SECONDS = int(os.getenv("MERGE_SOFT_TIME_LIMIT_SECONDS", "240"))
+MERGE_TIME_LIMIT_SECONDS = int(os.getenv("MERGE_TIME_LIMIT_SECONDS", "300"))
+
+# A run stops between batches after this long and continues in a new task,
+# well inside the soft time limit above
+MERGE_TIME_BUDGET_SECONDS = int(os.getenv("MERGE_TIME_BUDGET_SECONDS", "180"))
+
+# A failed run, or one still "processing" this long after it started (killed at the
+# hard time limit), is resumed from its checkpoints - at most MERGE_MAX_RETRIES times
+MERGE_RETRY_AFTER_SECONDS = int(os.getenv("MERGE_RETRY_AFTER_SECONDS", "600"))
+MERGE_MAX_RETRIES = int(os.getenv("MERGE_MAX_RETRIES", "5"))
+
+# Interval of the check_expired_deadlines sweep. Keep it short: the API's deadline
+# engine is a thread that stops whenever the API is down or its host is frozen
+DEADLINE_SWEEP_INTERVAL_SECONDS = float(os.getenv("DEADLINE_SWEEP_INTERVAL_SECONDS", "60"))
+
+# Per-currency stats summed into MergeCycle
+CURRENCY_STAT_FIELDS = (
+    "total_funding_requests",
+    "total_withdrawal_requests",
+    "matched_pairs",
+    "unmatched_funding",
+    "unmatched_withdrawal",
 )
 
 # Celery configuration
@@ -47,6 +103,23 @@ celery_app.conf.update(
 )
 
 
+@worker_process_init.connect
+def reset_connection_pool(**kwargs):
+    """Forked workers must not reuse pooled connections opened by the parent process"""
+    db_engine.dispose(close=False)
+
+
+@task_prerun.connect
+def name_query_source(task=None, **kwargs):
+    """Slow queries run by a task are logged under its name"""
+    set_query_source(f"celery:{task.name}")
+
+
+@task_postrun.connect
+def clear_query_source(**kwargs):
+    set_query_source(None)
+
+
 # ========================================
 # SMART MATCHING ALGORITHM
 # ========================================
@@ -54,45 +127,284 @@ celery_app.conf.update(
 def smart_match_requests(
     funding_requests: List[FundingRequest],
     withdrawal_requests: List[WithdrawalRequest],
-    db: Session
+    db: Session = None
 ) -> List[Tuple[uuid.UUID, uuid.UUID, Decimal]]:
     """
     Smart matching algorithm that splits amounts to maximize matches.
+    Adapter over matching_kernel.match_minor_units for callers holding
+    entities (or rows) with id and amount_remaining.
 
     Returns: List of (funding_id, withdrawal_id, amount) tuples
     """
-    matches = []
+    funders = [(f.id, to_minor_units(f.amount_remaining)) for f in funding_requests]
+    withdrawers = [(w.id, to_minor_units(w.amount_remaining)) for w in withdrawal_requests]
+
+    return [
+        (funding_id, withdrawal_id, from_minor_units(amount))
+        for funding_id, withdrawal_id, amount in match_minor_units(funders, withdrawers)
+    ]
+
+
+def load_pending_amounts(
+    db: Session,
+    currency: str,
+    cutoff_time: Optional[datetime] = None
+) -> Tuple[List[Tuple[uuid.UUID, int]], List[Tuple[uuid.UUID, int]], int]:
+    """
+    Load only (id, amount_remaining in minor units) for pending requests of one currency.
+
+    Withdrawals come back priority users first (affected by failed funders, by
+    their original join time), then regular users first come first served.
+
+    Returns: (funders, withdrawers, priority_withdrawal_count)
+    """
+    # Range scans of idx_funding_currency_pending / idx_withdrawal_currency_pending - no wallet join
+    funding_query = db.query(FundingRequest.id, FundingRequest.amount_remaining).filter(
+        FundingRequest.currency == currency,
+        FundingRequest.is_fully_matched == False,
+        FundingRequest.is_completed == False
+    )
+    withdrawal_query = db.query(WithdrawalRequest.id, WithdrawalRequest.amount_remaining).filter(
+        WithdrawalRequest.currency == currency,
+        WithdrawalRequest.is_fully_matched == False,
+        WithdrawalRequest.is_completed == False
+    )
+    if cutoff_time is not None:
+        funding_query = funding_query.filter(FundingRequest.requested_at < cutoff_time)
+        withdrawal_query = withdrawal_query.filter(WithdrawalRequest.requested_at < cutoff_time)
+
+    funders = [(row.id, to_minor_units(row.amount_remaining)) for row in funding_query]
+
+    priority_withdrawals = [
+        (row.id, to_minor_units(row.amount_remaining))
+        for row in withdrawal_query.filter(
+            WithdrawalRequest.is_priority == True
+        ).order_by(WithdrawalRequest.priority_timestamp.asc())
+    ]
+    regular_withdrawals = [
+        (row.id, to_minor_units(row.amount_remaining))
+        for row in withdrawal_query.filter(
+            WithdrawalRequest.is_priority == False
+        ).order_by(WithdrawalRequest.requested_at.asc())
+    ]
+
+    return funders, priority_withdrawals + regular_withdrawals, len(priority_withdrawals)
+
+
+def get_matcher(engine: Optional[str] = None):
+    """
+    Resolve a matching engine name to its match function.
+    "numpy" falls back to the python kernel when numpy is not installed.
+    """
+    engine = (engine or DEFAULT_MATCHING_ENGINE).lower()
+
+    if engine == "python":
+        return match_minor_units
+    if engine == "numpy":
+        if vector_engine_available():
+            return match_minor_units_vectorized
+        print("  numpy not installed - falling back to python matching engine")
+        return match_minor_units
+
+    raise ValueError(f"Unknown matching engine: {engine}")
+
+
+# ========================================
+# PER-CURRENCY MERGE
+# ========================================
+
+def _currency_stats(total_funding: int, total_withdrawal: int, write_stats: Dict[str, int]) -> Dict[str, int]:
+    return {
+        "total_funding_requests": total_funding,
+        "total_withdrawal_requests": total_withdrawal,
+        "matched_pairs": write_stats["pairs_created"],
+        "unmatched_funding": write_stats["unmatched_funding"],
+        "unmatched_withdrawal": write_stats["unmatched_withdrawal"],
+    }
 
-    # Sort by amount (ascending) for better splitting
-    funding_sorted = sorted(funding_requests, key=lambda x: x.amount_remaining)
-    withdrawal_sorted = sorted(withdrawal_requests, key=lambda x: x.amount_remaining)
 
-    # Convert to mutable lists with remaining amounts
-    funders = [[f.id, f.amount_remaining] for f in funding_sorted]
-    withdrawers = [[w.id, w.amount_remaining] for w in withdrawal_sorted]
+class MergeInterrupted(Exception):
+    """A currency stopped between batches because the run's time budget is spent"""
 
-    i, j = 0, 0
 
-    while i < len(funders) and j < len(withdrawers):
-        funder_id, funder_remaining = funders[i]
-        withdrawer_id, withdrawer_remaining = withdrawers[j]
+def match_currency(
+    merge_cycle_id: uuid.UUID,
+    currency: str,
+    cutoff_time: Optional[datetime] = None,
+    engine: Optional[str] = None,
+    now: Optional[datetime] = None,
+    session_factory=None,
+    book=None,
+    plan=None,
+    deadline: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Match one currency book in its own session, committing batch by batch.
+
+    The matches are staged as a MergePlan first, then applied one batch per
+    transaction. A plan left partly applied by an earlier run is resumed from
+    its next batch without re-matching.
+
+    Args:
+        merge_cycle_id: Cycle the match pairs belong to (must already be committed)
+        currency: NAIRA or USDT
+        cutoff_time: Only requests made before this time, None for all
+        engine: Matching engine ("python" or "numpy"), default MATCHING_ENGINE
+        now: Timestamp for matched_at / proof deadlines, default utcnow
+        session_factory: Session maker, default SessionLocal
+        book: Loaded order_book.OrderBook to read instead of the database, if any
+        plan: This currency's MergePlan (staged at cutoff, or by an interrupted run), if any
+        deadline: Stop with MergeInterrupted before starting a batch after this time
+
+    Returns: Counts for CURRENCY_STAT_FIELDS
+    """
+    db = (session_factory or SessionLocal)()
+    try:
+        matches = None
+        if plan is not None and plan.batches_applied == 0 and not plan_is_current(db, plan, currency, cutoff_time):
+            print(f"  [{currency}] Pending requests changed since cutoff - re-matching")
+            delete_plan(db, plan.id)
+            db.commit()
+            plan = None
+
+        if plan is None:
+            if book is not None and book.is_loaded(currency):
+                # Read the ready-sorted in-memory book, after checking it against the database
+                book.reconcile(db, currency)
+                funders, withdrawers, priority_count = book.snapshot(currency, cutoff_time)
+            else:
+                # Load only ids and amounts - no entity hydration
+                funders, withdrawers, priority_count = load_pending_amounts(db, currency, cutoff_time)
+
+            print(f"  [{currency}] Funding requests: {len(funders)}")
+            print(f"  [{currency}] Withdrawal requests: {len(withdrawers)} (Priority: {priority_count}, Regular: {len(withdrawers) - priority_count})")
+
+            # Smart match user-to-user and stage the result - the checkpoint later batches resume from
+            matches = get_matcher(engine)(funders, withdrawers)
+            plan = make_plan(db, merge_cycle_id, currency, funders, withdrawers, priority_count, matches, MERGE_BATCH_SIZE)
+            db.commit()
+            db.refresh(plan)
+            db.expunge(plan)
+        elif plan.batches_applied:
+            print(f"  [{currency}] Resuming at batch {plan.batches_applied + 1} of {plan.batch_count}")
+        else:
+            print(f"  [{currency}] Applying plan computed at cutoff")
+
+        # Create match pairs and update request amounts server-side, one committed batch at a time
+        while not is_complete(plan):
+            batch = plan.batches_applied
+            if deadline is not None and datetime.utcnow() >= deadline:
+                raise MergeInterrupted(f"{currency}: stopped after batch {batch} of {plan.batch_count}")
+            if not batch_fits(db, plan, batch):
+                print(f"  [{currency}] Requests changed under batch {batch + 1} - remaining matches wait for the next cycle")
+                truncate_plan(db, plan, currency, cutoff_time)
+                db.commit()
+                break
+
+            applied = apply_batch(db, plan, batch, merge_cycle_id, now)
+            db.commit()
+
+            if book is not None and matches is not None:
+                book.apply_matches(currency, [
+                    (funding_id, withdrawal_id, from_minor_units(units))
+                    for funding_id, withdrawal_id, units in matches[batch * MERGE_BATCH_SIZE:(batch + 1) * MERGE_BATCH_SIZE]
+                ], applied["book_version"])
+
+        write_stats = plan_stats(plan)
+        print(f"  [{currency}] User-to-user matches: {write_stats['pairs_created']}")
+        print(f"  [{currency}] Unmatched funding: {write_stats['unmatched_funding']}")
+        print(f"  [{currency}] Unmatched withdrawal: {write_stats['unmatched_withdrawal']}")
+
+        return _currency_stats(plan.funding_count, plan.withdrawal_count, write_stats)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
-        # Match the smaller amount
-        match_amount = min(funder_remaining, withdrawer_remaining)
 
-        matches.append((funder_id, withdrawer_id, match_amount))
+def match_all_currencies(
+    merge_cycle_id: uuid.UUID,
+    cutoff_time: Optional[datetime] = None,
+    engine: Optional[str] = None,
+    now: Optional[datetime] = None,
+    session_factory=None,
+    parallelism: Optional[int] = None,
+    book=None,
+    plans: Optional[Dict] = None,
+    deadline: Optional[datetime] = None
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, Exception]]:
+    """
+    Run match_currency for every currency concurrently.
 
-        # Update remaining amounts
-        funders[i][1] -= match_amount
-        withdrawers[j][1] -= match_amount
+    Threads rather than processes: the work is dominated by database round trips,
+    which release the GIL, and Celery prefork workers cannot start child processes.
+    A failing currency does not roll back the others - they have already committed.
 
-        # Move to next if fully matched
-        if funders[i][1] == 0:
-            i += 1
-        if withdrawers[j][1] == 0:
-            j += 1
+    Returns: (stats by currency, errors by currency)
+    """
+    parallelism = max(1, min(parallelism or MERGE_PARALLELISM, len(MERGE_CURRENCIES)))
+    plans = plans or {}
+
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="merge") as pool:
+        futures = {
+            currency: pool.submit(
+                match_currency,
+                merge_cycle_id,
+                currency,
+                cutoff_time,
+                engine,
+                now,
+                session_factory,
+                book,
+                plans.get(currency),
+                deadline
+            )
+            for currency in MERGE_CURRENCIES
+        }
+
+    stats, errors = {}, {}
+    for currency, future in futures.items():
+        try:
+            stats[currency] = future.result()
+        except Exception as e:
+            errors[currency] = e
+    return stats, errors
+
+
+def apply_currency_stats(cycle: MergeCycle, stats: Dict[str, Dict[str, int]]):
+    """Sum per-currency stats into the merge cycle"""
+    for field in CURRENCY_STAT_FIELDS:
+        setattr(cycle, field, sum(currency_stats[field] for currency_stats in stats.values()))
+
+
+def _resumable(now: datetime):
+    """Failed cycles, and cycles whose run died without updating them, once they have cooled down"""
+    return and_(
+        MergeCycle.status.in_(["processing", "failed"]),
+        MergeCycle.started_at < now - timedelta(seconds=MERGE_RETRY_AFTER_SECONDS),
+        MergeCycle.retries < MERGE_MAX_RETRIES
+    )
+
+
+def claim_merge_cycle(db: Session, merge_cycle_id: uuid.UUID, now: Optional[datetime] = None) -> bool:
+    """
+    Atomically move a pending or resumable cycle to processing (commits).
+    Only one run of a cycle can hold the claim, however many tasks were queued for it.
 
-    return matches
+    Returns: True if this run claimed the cycle
+    """
+    now = now or datetime.utcnow()
+    claimed = db.query(MergeCycle).filter(
+        MergeCycle.id == merge_cycle_id,
+        or_(MergeCycle.status == "pending", _resumable(now))
+    ).update({
+        "status": "processing",
+        "started_at": now,
+        "retries": case((MergeCycle.status == "pending", MergeCycle.retries), else_=MergeCycle.retries + 1),
+    }, synchronize_session=False)
+    db.commit()
+    return claimed == 1
 
 
 def match_with_admin_wallet(
@@ -147,137 +459,64 @@ def match_with_admin_wallet(
 # CELERY TASKS
 # ========================================
 
-@celery_app.task(name="run_merge_cycle")
-def run_merge_cycle(merge_cycle_id: str):
+@celery_app.task(
+    name="run_merge_cycle",
+    soft_time_limit=MERGE_SOFT_TIME_LIMIT_SECONDS,
+    time_limit=MERGE_TIME_LIMIT_SECONDS
+)
+def run_merge_cycle(merge_cycle_id: str, engine: Optional[str] = None):
     """
     Execute a merge cycle - match all pending requests.
     This runs at scheduled times (9 AM, 3 PM, 9 PM).
+
+    Progress is checkpointed per currency and per committed batch (see merge_plan),
+    so a run that times out, fails or is killed is resumed where it stopped:
+    after MERGE_TIME_BUDGET_SECONDS it queues its own continuation, and failed or
+    stalled runs are picked up again by schedule_merge_cycle_execution.
+
+    Args:
+        merge_cycle_id: Cycle to run
+        engine: Matching engine ("python" or "numpy"), default MATCHING_ENGINE
     """
     db = SessionLocal()
+    cycle = None
     try:
-        cycle = db.query(MergeCycle).filter(MergeCycle.id == uuid.UUID(merge_cycle_id)).first()
-        if not cycle:
-            print(f"Merge cycle {merge_cycle_id} not found")
+        if not claim_merge_cycle(db, uuid.UUID(merge_cycle_id)):
+            print(f"Merge cycle {merge_cycle_id} not found, already processed or running")
             return
 
-        if cycle.status != "pending":
-            print(f"Merge cycle {merge_cycle_id} already processed")
-            return
+        cycle = db.query(MergeCycle).filter(MergeCycle.id == uuid.UUID(merge_cycle_id)).first()
+        deadline = cycle.started_at + timedelta(seconds=MERGE_TIME_BUDGET_SECONDS)
 
         print(f"\n{'='*60}")
-        print(f"STARTING MERGE CYCLE: {cycle.scheduled_time}")
+        print(f"STARTING MERGE CYCLE: {cycle.scheduled_time}" + (f" (retry {cycle.retries})" if cycle.retries else ""))
         print(f"{'='*60}\n")
 
-        cycle.status = "processing"
-        cycle.started_at = datetime.utcnow()
-        db.commit()
-
-        # Process each currency separately
-        for currency in ["NAIRA", "USDT"]:
-            print(f"\nProcessing {currency}...")
-
-            # Get all pending requests for this currency
-            funding_requests = db.query(FundingRequest).join(Wallet).filter(
-                Wallet.currency == currency,
-                FundingRequest.is_fully_matched == False,
-                FundingRequest.is_completed == False,
-                FundingRequest.requested_at < cycle.cutoff_time
-            ).all()
-
-            # Get withdrawal requests - prioritize users who were affected by failed payments
-            # Priority users (those affected by failed funders) go first, ordered by their original join time
-            priority_withdrawals = db.query(WithdrawalRequest).join(Wallet).filter(
-                Wallet.currency == currency,
-                WithdrawalRequest.is_fully_matched == False,
-                WithdrawalRequest.is_completed == False,
-                WithdrawalRequest.requested_at < cycle.cutoff_time,
-                WithdrawalRequest.is_priority == True
-            ).order_by(WithdrawalRequest.priority_timestamp.asc()).all()
-
-            # Regular withdrawal requests ordered by request time (first come, first served)
-            regular_withdrawals = db.query(WithdrawalRequest).join(Wallet).filter(
-                Wallet.currency == currency,
-                WithdrawalRequest.is_fully_matched == False,
-                WithdrawalRequest.is_completed == False,
-                WithdrawalRequest.requested_at < cycle.cutoff_time,
-                WithdrawalRequest.is_priority == False
-            ).order_by(WithdrawalRequest.requested_at.asc()).all()
-
-            # Combine: priority users first, then regular users
-            withdrawal_requests = priority_withdrawals + regular_withdrawals
-
-            print(f"  Funding requests: {len(funding_requests)}")
-            print(f"  Withdrawal requests: {len(withdrawal_requests)} (Priority: {len(priority_withdrawals)}, Regular: {len(regular_withdrawals)})")
-
-            cycle.total_funding_requests += len(funding_requests)
-            cycle.total_withdrawal_requests += len(withdrawal_requests)
-
-            if not funding_requests and not withdrawal_requests:
-                print(f"  No requests to process for {currency}")
-                continue
-
-            # Step 1: Smart match user-to-user
-            user_matches = smart_match_requests(funding_requests, withdrawal_requests, db)
-            print(f"  User-to-user matches: {len(user_matches)}")
-
-            # Create match pairs
-            for funding_id, withdrawal_id, amount in user_matches:
-                now = datetime.utcnow()
-                pair = FundingMatchPair(
-                    id=uuid.uuid4(),
-                    funding_request_id=funding_id,
-                    withdrawal_request_id=withdrawal_id,
-                    merge_cycle_id=cycle.id,
-                    amount=amount,
-                    proof_uploaded=False,
-                    proof_confirmed=False,
-                    proof_deadline=now + timedelta(hours=4),  # Funder has 4 hours to upload proof
-                    funder_missed_deadline=False,
-                    withdrawer_missed_deadline=False,
-                    created_at=now
-                )
-                db.add(pair)
-
-                # Update request amounts
-                funding = db.query(FundingRequest).filter(FundingRequest.id == funding_id).first()
-                withdrawal = db.query(WithdrawalRequest).filter(WithdrawalRequest.id == withdrawal_id).first()
-
-                if funding:
-                    funding.amount_remaining -= amount
-                    if funding.amount_remaining == 0:
-                        funding.is_fully_matched = True
-                        funding.matched_at = datetime.utcnow()
-                        funding.merge_cycle_id = cycle.id
-
-                if withdrawal:
-                    withdrawal.amount_remaining -= amount
-                    if withdrawal.amount_remaining == 0:
-                        withdrawal.is_fully_matched = True
-                        withdrawal.matched_at = datetime.utcnow()
-                        withdrawal.merge_cycle_id = cycle.id
-
-                cycle.matched_pairs += 1
+        # Match each currency in its own session, concurrently, from the staged plans where still valid
+        # Unmatched requests wait for the next cycle (admin wallet matching is a future implementation)
+        plans = load_plans(db, cycle.id)
+        stats, errors = match_all_currencies(cycle.id, cycle.cutoff_time, engine, plans=plans, deadline=deadline)
+        apply_currency_stats(cycle, stats)
 
+        if errors and all(isinstance(error, MergeInterrupted) for error in errors.values()):
+            # Out of time - hand over to a fresh task, which resumes from the checkpoints
+            print(f"Merge cycle {cycle.scheduled_time} paused: {', '.join(str(e) for e in errors.values())}")
+            cycle.status = "pending"
             db.commit()
+            run_merge_cycle.delay(merge_cycle_id, engine)
+            return
 
-            # Step 2: Get unmatched requests
-            unmatched_funding = [f for f in funding_requests if f.amount_remaining > 0]
-            unmatched_withdrawal = [w for w in withdrawal_requests if w.amount_remaining > 0]
-
-            print(f"  Unmatched funding: {len(unmatched_funding)}")
-            print(f"  Unmatched withdrawal: {len(unmatched_withdrawal)}")
-
-            cycle.unmatched_funding += len(unmatched_funding)
-            cycle.unmatched_withdrawal += len(unmatched_withdrawal)
-
-            # Step 3: Match with admin wallet (FUTURE IMPLEMENTATION)
-            # For now, unmatched requests wait for next cycle
-
+        if errors:
+            for currency, error in errors.items():
+                print(f"Error matching {currency}: {error}")
+            cycle.status = "failed"
             db.commit()
+            return
 
-        # Mark cycle as completed
+        # Mark cycle as completed - its plans are spent
         cycle.status = "completed"
         cycle.completed_at = datetime.utcnow()
+        delete_plans(db, cycle.id)
         db.commit()
 
         print(f"\n{'='*60}")
@@ -291,6 +530,7 @@ def run_merge_cycle(merge_cycle_id: str):
         print(f"Error in merge cycle: {e}")
         import traceback
         traceback.print_exc()
+        db.rollback()
         if cycle:
             cycle.status = "failed"
             db.commit()
@@ -368,6 +608,45 @@ def create_daily_merge_cycles():
         db.close()
 
 
+@celery_app.task(name="plan_merge_cycle")
+def plan_merge_cycle(merge_cycle_id: str, engine: Optional[str] = None):
+    """
+    Precompute a cycle's matches once its cutoff has passed.
+    Requests can no longer be cancelled, so the snapshot only moves on priority re-queues.
+
+    Args:
+        merge_cycle_id: Cycle to plan
+        engine: Matching engine ("python" or "numpy"), default MATCHING_ENGINE
+    """
+    db = SessionLocal()
+    try:
+        cycle = db.query(MergeCycle).filter(MergeCycle.id == uuid.UUID(merge_cycle_id)).first()
+        if not cycle or cycle.status != "pending":
+            return
+
+        planned = set(load_plans(db, cycle.id))
+        for currency in MERGE_CURRENCIES:
+            if currency in planned:
+                continue
+
+            funders, withdrawers, priority_count = load_pending_amounts(db, currency, cycle.cutoff_time)
+            matches = get_matcher(engine)(funders, withdrawers)
+            try:
+                make_plan(db, cycle.id, currency, funders, withdrawers, priority_count, matches, MERGE_BATCH_SIZE)
+                db.commit()
+            except IntegrityError:
+                # Planned concurrently by another worker
+                db.rollback()
+                continue
+            print(f"Planned {currency} for merge cycle {cycle.scheduled_time}: {len(matches)} matches")
+
+    except Exception as e:
+        db.rollback()
+        print(f"Error planning merge cycle {merge_cycle_id}: {e}")
+    finally:
+        db.close()
+
+
 @celery_app.task(name="schedule_merge_cycle_execution")
 def schedule_merge_cycle_execution():
     """
@@ -388,6 +667,28 @@ def schedule_merge_cycle_execution():
             print(f"Triggering merge cycle: {cycle.scheduled_time}")
             run_merge_cycle.delay(str(cycle.id))
 
+        # Failed or stalled cycles - resume from their checkpoints
+        resumable_cycles = db.query(MergeCycle).filter(
+            _resumable(now),
+            exists().where(MergePlan.merge_cycle_id == MergeCycle.id)
+        ).all()
+
+        for cycle in resumable_cycles:
+            print(f"Resuming merge cycle: {cycle.scheduled_time} ({cycle.status})")
+            run_merge_cycle.delay(str(cycle.id))
+
+        # Cycles past cutoff and not yet planned - precompute their matches
+        cycles_to_plan = db.query(MergeCycle).filter(
+            MergeCycle.cutoff_time <= now,
+            MergeCycle.scheduled_time > now,
+            MergeCycle.status == "pending",
+            ~exists().where(MergePlan.merge_cycle_id == MergeCycle.id)
+        ).all()
+
+        for cycle in cycles_to_plan:
+            print(f"Planning merge cycle: {cycle.scheduled_time}")
+            plan_merge_cycle.delay(str(cycle.id))
+
     except Exception as e:
         print(f"Error scheduling merge cycles: {e}")
     finally:
@@ -398,70 +699,27 @@ def schedule_merge_cycle_execution():
 def check_expired_deadlines():
     """
     Check for expired deadlines and block users who miss them.
-    Runs every minute via Celery Beat.
+    Safety sweep run via Celery Beat every DEADLINE_SWEEP_INTERVAL_SECONDS - the API's deadline engine
+    (deadline_scheduler) enforces deadlines as they expire.
+
+    Returns: Affected row counts (see deadline_enforcement.enforce_expired_deadlines)
     """
     db = SessionLocal()
     try:
         now = datetime.utcnow()
         print(f"\n[{now}] Checking for expired deadlines...")
 
-        # Find pairs where proof deadline has passed (funder didn't upload proof in time)
-        expired_proof_pairs = db.query(FundingMatchPair).filter(
-            FundingMatchPair.proof_deadline <= now,
-            FundingMatchPair.proof_uploaded == False,
-            FundingMatchPair.funder_missed_deadline == False  # Not yet flagged
-        ).all()
-
-        if expired_proof_pairs:
-            print(f"  Found {len(expired_proof_pairs)} expired proof deadlines")
-
-        for pair in expired_proof_pairs:
-            # Mark as missed
-            pair.funder_missed_deadline = True
-
-            # Get funder's wallet and block it
-            funding_req = db.query(FundingRequest).filter(
-                FundingRequest.id == pair.funding_request_id
-            ).first()
-
-            if funding_req:
-                wallet = db.query(Wallet).filter(Wallet.id == funding_req.wallet_id).first()
-                if wallet and not wallet.is_blocked:
-                    wallet.is_blocked = True
-                    user = db.query(User).filter(User.id == wallet.user_id).first()
-                    print(f"  ⚠️  BLOCKED FUNDER: {user.username if user else 'Unknown'} (missed proof upload deadline)")
-
-        # Find pairs where confirmation deadline has passed (withdrawer didn't confirm in time)
-        expired_confirmation_pairs = db.query(FundingMatchPair).filter(
-            FundingMatchPair.confirmation_deadline <= now,
-            FundingMatchPair.proof_uploaded == True,
-            FundingMatchPair.proof_confirmed == False,
-            FundingMatchPair.withdrawer_missed_deadline == False  # Not yet flagged
-        ).all()
-
-        if expired_confirmation_pairs:
-            print(f"  Found {len(expired_confirmation_pairs)} expired confirmation deadlines")
-
-        for pair in expired_confirmation_pairs:
-            # Mark as missed
-            pair.withdrawer_missed_deadline = True
-
-            # Get withdrawer's wallet and block it
-            withdrawal_req = db.query(WithdrawalRequest).filter(
-                WithdrawalRequest.id == pair.withdrawal_request_id
-            ).first()
-
-            if withdrawal_req:
-                wallet = db.query(Wallet).filter(Wallet.id == withdrawal_req.wallet_id).first()
-                if wallet and not wallet.is_blocked:
-                    wallet.is_blocked = True
-                    user = db.query(User).filter(User.id == wallet.user_id).first()
-                    print(f"  ⚠️  BLOCKED WITHDRAWER: {user.username if user else 'Unknown'} (missed confirmation deadline)")
-
+        summary = enforce_expired_deadlines(db, now)
         db.commit()
 
-        if expired_proof_pairs or expired_confirmation_pairs:
-            print(f"  ✅ Processed {len(expired_proof_pairs) + len(expired_confirmation_pairs)} expired deadlines")
+        if summary["proof_deadlines_missed"]:
+            print(f"  ⚠️  {summary['proof_deadlines_missed']} expired proof deadlines - blocked {summary['funders_blocked']} funders, re-queued {summary['withdrawals_requeued']} withdrawals with priority")
+        if summary["confirmation_deadlines_missed"]:
+            print(f"  ⚠️  {summary['confirmation_deadlines_missed']} expired confirmation deadlines - blocked {summary['withdrawers_blocked']} withdrawers")
+        if summary["proof_deadlines_missed"] or summary["confirmation_deadlines_missed"]:
+            print(f"  ✅ Processed {summary['proof_deadlines_missed'] + summary['confirmation_deadlines_missed']} expired deadlines")
+
+        return summary
 
     except Exception as e:
         db.rollback()
@@ -485,6 +743,6 @@ celery_app.conf.beat_schedule = {
     },
     "check-expired-deadlines": {
         "task": "check_expired_deadlines",
-        "schedule": 60.0,  # Every minute - check for expired deadlines and auto-block users
+        "schedule": DEADLINE_SWEEP_INTERVAL_SECONDS,  # Catches anything the API's deadline engine missed (e.g. API down)
     },
 }
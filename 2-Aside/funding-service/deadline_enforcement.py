@@ -0,0 +1,165 @@
+"""
+Set-based enforcement of missed payment deadlines.
+
+A pair whose proof deadline passed without an upload blocks the funder's
+wallet; one whose confirmation deadline passed after an upload blocks the
+withdrawer's. Each side is two UPDATE ... FROM statements - block the wallets
+behind newly expired pairs, then flag those pairs - run in one transaction,
+so the cost does not grow with the number of missed deadlines.
+
+Withdrawals whose funder missed the proof deadline are re-queued in the same
+pass: one UPDATE with correlated sums over their expired pairs gives back the
+unpaid amounts and puts them at the front of the next cycle's priority queue
+(is_priority, priority_timestamp = original join time), and the order book
+version of each currency re-queued into is bumped.
+
+A granted extension replaces the proof deadline. Enforcement can be limited
+to given pairs, which is how the deadline engine (deadline_scheduler) fires
+for the deadlines it has just seen expire.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import sys
+import os
+
+from sqlalchemy import update, select, and_, or_, true, func
+from sqlalchemy.orm import Session
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from shared import FundingRequest, WithdrawalRequest, FundingMatchPair, Wallet
+from order_book import bump_version
+
+PROOF_BLOCK_REASON = "Failed to upload payment proof within 4 hours. Please contact support at support@2aside.com to resolve this issue and unblock your account."
+CONFIRMATION_BLOCK_REASON = "Failed to confirm payment proof within 4 hours. Please contact support at support@2aside.com to resolve this issue and unblock your account."
+
+
+def proof_deadline_of(pair: FundingMatchPair) -> Optional[datetime]:
+    """The deadline the funder is held to - the extended one once an extension is granted"""
+    if pair.extension_granted and pair.extended_deadline:
+        return pair.extended_deadline
+    return pair.proof_deadline
+
+
+def _proof_expired(now: datetime):
+    """Funder did not upload proof in time (not yet flagged)"""
+    return and_(
+        or_(
+            and_(FundingMatchPair.extension_granted == False, FundingMatchPair.proof_deadline <= now),
+            and_(FundingMatchPair.extension_granted == True, FundingMatchPair.extended_deadline <= now)
+        ),
+        FundingMatchPair.proof_uploaded == False,
+        FundingMatchPair.funder_missed_deadline == False
+    )
+
+
+def _confirmation_expired(now: datetime):
+    """Withdrawer did not confirm an uploaded proof in time (not yet flagged)"""
+    return and_(
+        FundingMatchPair.confirmation_deadline <= now,
+        FundingMatchPair.proof_uploaded == True,
+        FundingMatchPair.proof_confirmed == False,
+        FundingMatchPair.withdrawer_missed_deadline == False
+    )
+
+
+def _block_wallets(db: Session, request_model, pair_request_id, expired, reason: str) -> int:
+    """Block the not-yet-blocked wallets behind expired pairs; returns wallets blocked"""
+    return db.execute(
+        update(Wallet)
+        .where(
+            Wallet.id == request_model.wallet_id,
+            request_model.id == pair_request_id,
+            expired,
+            Wallet.is_blocked == False
+        )
+        .values(is_blocked=True, block_reason=reason)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def _requeue_withdrawals(db: Session, expired) -> int:
+    """Give failed funders' unpaid amounts back to their withdrawals, with priority; returns withdrawals re-queued"""
+    def missed(aggregate):
+        return select(aggregate).where(
+            FundingMatchPair.withdrawal_request_id == WithdrawalRequest.id,
+            expired
+        ).scalar_subquery()
+
+    requeued = select(FundingMatchPair.withdrawal_request_id).where(expired)
+    count = db.execute(
+        update(WithdrawalRequest)
+        .where(WithdrawalRequest.id.in_(requeued))
+        .values(
+            amount_remaining=WithdrawalRequest.amount_remaining + missed(func.sum(FundingMatchPair.amount)),
+            failed_match_count=WithdrawalRequest.failed_match_count + missed(func.count()),
+            is_priority=True,
+            priority_timestamp=func.coalesce(WithdrawalRequest.opted_in_at, WithdrawalRequest.requested_at),
+            # Available for the next cycle again
+            is_fully_matched=False,
+            opted_in=False,
+            merge_cycle_id=None,
+            matched_at=None
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if count:
+        # The pairs are only flagged after this, so they still pick out the re-queued withdrawals
+        currencies = db.query(WithdrawalRequest.currency).filter(WithdrawalRequest.id.in_(requeued)).distinct()
+        for currency in sorted(row.currency.value for row in currencies):
+            bump_version(db, currency)
+    return count
+
+
+def _flag_pairs(db: Session, expired, **flags) -> int:
+    return db.execute(
+        update(FundingMatchPair)
+        .where(expired)
+        .values(**flags)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def enforce_expired_deadlines(
+    db: Session,
+    now: Optional[datetime] = None,
+    pair_ids: Optional[Iterable] = None
+) -> Dict[str, int]:
+    """
+    Flag every newly missed deadline and block the responsible wallets (caller commits).
+
+    Wallets are blocked and withdrawals re-queued before the pairs are
+    flagged, as the flags are what marks a pair as already handled.
+
+    Args:
+        pair_ids: Only look at these pairs (default: all pairs)
+
+    Returns: Affected row counts - proof_deadlines_missed, funders_blocked,
+        withdrawals_requeued, confirmation_deadlines_missed, withdrawers_blocked
+    """
+    now = now or datetime.utcnow()
+    selected = FundingMatchPair.id.in_(list(pair_ids)) if pair_ids is not None else true()
+    proof_expired = and_(selected, _proof_expired(now))
+    confirmation_expired = and_(selected, _confirmation_expired(now))
+
+    funders_blocked = _block_wallets(
+        db, FundingRequest, FundingMatchPair.funding_request_id, proof_expired, PROOF_BLOCK_REASON
+    )
+    withdrawals_requeued = _requeue_withdrawals(db, proof_expired)
+    proof_deadlines_missed = _flag_pairs(db, proof_expired, funder_missed_deadline=True)
+
+    withdrawers_blocked = _block_wallets(
+        db, WithdrawalRequest, FundingMatchPair.withdrawal_request_id, confirmation_expired, CONFIRMATION_BLOCK_REASON
+    )
+    confirmation_deadlines_missed = _flag_pairs(db, confirmation_expired, withdrawer_missed_deadline=True)
+
+    return {
+        "proof_deadlines_missed": proof_deadlines_missed,
+        "funders_blocked": funders_blocked,
+        "withdrawals_requeued": withdrawals_requeued,
+        "confirmation_deadlines_missed": confirmation_deadlines_missed,
+        "withdrawers_blocked": withdrawers_blocked,
+    }
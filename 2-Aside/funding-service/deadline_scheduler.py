@@ -0,0 +1,309 @@
+"""
+In-process deadline engine - enforces missed proof and confirmation deadlines
+within seconds of expiry instead of on the next minute poll.
+
+Open deadlines are kept in a min-heap of (due_at, pair_id, kind), loaded from
+funding_match_pairs on startup and updated whenever this process creates a
+pair, receives a proof, grants an extension or confirms. A background thread
+sleeps until the earliest deadline, then runs deadline_enforcement for the
+pairs that just expired. Enforcement re-checks every deadline in the database,
+so a heap entry that has gone stale (proof uploaded, extension granted in
+another process) never blocks anyone - it only costs one no-op statement.
+
+Changes made by other processes (merges run by Celery, requests served by
+other workers) are picked up by reloading the open deadlines every
+DEADLINE_RESYNC_SECONDS, which is also how the engine recovers after a
+restart. Withdrawals re-queued by a firing are pushed into this process's
+order book straight away. Every API worker runs an engine; firing takes the "deadline_engine"
+lease first so two workers never enforce the same deadlines at once, and a
+standby retries its due entries one lease TTL later in case the holder died.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import heapq
+import logging
+import os
+import threading
+import uuid
+
+from sqlalchemy.orm import Session
+
+from shared import SessionLocal, FundingMatchPair, WithdrawalRequest
+from deadline_enforcement import enforce_expired_deadlines, proof_deadline_of
+from order_book import OrderBook, order_book
+from scheduler_lease import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+# Full reload of open deadlines - catches changes made by other processes
+DEADLINE_RESYNC_SECONDS = int(os.getenv("DEADLINE_RESYNC_SECONDS", "600"))
+
+PROOF = "proof"
+CONFIRMATION = "confirmation"
+
+
+def pair_deadlines(pair: FundingMatchPair) -> Dict[str, Optional[datetime]]:
+    """A pair's deadlines by kind, None where nothing is pending"""
+    proof_open = not pair.proof_uploaded and not pair.funder_missed_deadline
+    confirmation_open = (
+        pair.proof_uploaded
+        and not pair.proof_confirmed
+        and not pair.withdrawer_missed_deadline
+    )
+    return {
+        PROOF: proof_deadline_of(pair) if proof_open else None,
+        CONFIRMATION: pair.confirmation_deadline if confirmation_open else None,
+    }
+
+
+def load_open_deadlines(db: Session) -> List[Tuple[datetime, uuid.UUID, str]]:
+    """Every deadline still running, as (due_at, pair_id, kind)"""
+    # One query per kind, each matching its open-deadline filtered index
+    proofs = db.query(
+        FundingMatchPair.id,
+        FundingMatchPair.proof_deadline,
+        FundingMatchPair.extension_granted,
+        FundingMatchPair.extended_deadline
+    ).filter(
+        FundingMatchPair.proof_uploaded == False,
+        FundingMatchPair.funder_missed_deadline == False,
+        FundingMatchPair.proof_deadline != None
+    )
+    confirmations = db.query(
+        FundingMatchPair.id,
+        FundingMatchPair.confirmation_deadline
+    ).filter(
+        FundingMatchPair.proof_uploaded == True,
+        FundingMatchPair.proof_confirmed == False,
+        FundingMatchPair.withdrawer_missed_deadline == False,
+        FundingMatchPair.confirmation_deadline != None
+    )
+
+    return (
+        [(proof_deadline_of(pair), pair.id, PROOF) for pair in proofs]
+        + [(pair.confirmation_deadline, pair.id, CONFIRMATION) for pair in confirmations]
+    )
+
+
+class DeadlineScheduler:
+    """Heap of upcoming deadlines plus the thread that fires them"""
+
+    def __init__(
+        self,
+        session_factory=None,
+        lease: Optional[LeaderLease] = None,
+        resync_seconds: Optional[int] = None,
+        book: Optional[OrderBook] = None
+    ):
+        self.session_factory = session_factory or SessionLocal
+        self.book = book or order_book
+        self.lease = lease or LeaderLease("deadline_engine", session_factory=self.session_factory)
+        self.resync_seconds = resync_seconds or DEADLINE_RESYNC_SECONDS
+        self._heap: List[Tuple[datetime, uuid.UUID, str]] = []
+        # Current due time per (pair_id, kind); heap entries that disagree are stale
+        self._due: Dict[Tuple[uuid.UUID, str], datetime] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._resync_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def _schedule(self, pair_id: uuid.UUID, kind: str, due_at: Optional[datetime]):
+        key = (pair_id, kind)
+        if due_at is None:
+            self._due.pop(key, None)
+            return
+        if self._due.get(key) == due_at:
+            return
+        self._due[key] = due_at
+        heapq.heappush(self._heap, (due_at, pair_id, kind))
+        if self._heap[0][:2] == (due_at, pair_id):
+            self._condition.notify()  # New earliest deadline - wake the thread
+
+    def track(self, pair: FundingMatchPair):
+        """Pick up a pair's current deadlines after it was created or changed (call after commit)"""
+        with self._condition:
+            for kind, due_at in pair_deadlines(pair).items():
+                self._schedule(pair.id, kind, due_at)
+
+    def load(self, db: Session) -> int:
+        """
+        Replace the heap with the open deadlines in the database.
+
+        Returns: Number of deadlines tracked
+        """
+        deadlines = load_open_deadlines(db)
+        with self._condition:
+            self._heap = list(deadlines)
+            heapq.heapify(self._heap)
+            self._due = {(pair_id, kind): due_at for due_at, pair_id, kind in deadlines}
+            self._resync_at = datetime.utcnow() + timedelta(seconds=self.resync_seconds)
+            self._condition.notify()
+        return len(deadlines)
+
+    def reload(self) -> int:
+        db = self.session_factory()
+        try:
+            return self.load(db)
+        finally:
+            db.close()
+
+    def request_resync(self):
+        """Reload from the database on the thread, without waiting for it (e.g. after a merge)"""
+        with self._condition:
+            self._resync_at = datetime.utcnow()
+            self._condition.notify()
+
+    def next_due(self) -> Optional[datetime]:
+        """Earliest tracked deadline"""
+        with self._condition:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        while self._heap:
+            due_at, pair_id, kind = self._heap[0]
+            if self._due.get((pair_id, kind)) == due_at:
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[Tuple[datetime, uuid.UUID, str]]:
+        """Remove and return every deadline due at now"""
+        now = now or datetime.utcnow()
+        due = []
+        with self._condition:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                due_at, pair_id, kind = heapq.heappop(self._heap)
+                del self._due[(pair_id, kind)]
+                due.append((due_at, pair_id, kind))
+                self._drop_stale()
+        return due
+
+    def fire(self, now: Optional[datetime] = None) -> Optional[Dict[str, int]]:
+        """
+        Enforce the deadlines due at now.
+
+        Returns: Summary from enforce_expired_deadlines, or None if nothing was
+            due or another instance holds the lease
+        """
+        now = now or datetime.utcnow()
+        due = self.pop_due(now)
+        if not due:
+            return None
+
+        if not self.lease.heartbeat():
+            # Check again once the holder's lease would have run out
+            retry_at = now + timedelta(seconds=self.lease.ttl_seconds)
+            with self._condition:
+                for _, pair_id, kind in due:
+                    self._schedule(pair_id, kind, retry_at)
+            return None
+
+        pair_ids = {pair_id for _, pair_id, _ in due}
+        db = self.session_factory()
+        try:
+            summary = enforce_expired_deadlines(db, now, pair_ids=pair_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            db.close()
+            retry_at = now + timedelta(seconds=self.lease.renew_seconds)
+            with self._condition:
+                for _, pair_id, kind in due:
+                    self._schedule(pair_id, kind, retry_at)
+            raise
+
+        try:
+            if summary["withdrawals_requeued"]:
+                self._push_requeued(db, pair_ids)
+        except Exception as e:
+            # The book is reconciled with the database before the next merge anyway
+            logger.warning(f"Deadline engine: re-queued withdrawals not added to the order book: {e}")
+        finally:
+            db.close()
+
+        if summary["proof_deadlines_missed"] or summary["confirmation_deadlines_missed"]:
+            logger.info(
+                f"Deadlines: {summary['proof_deadlines_missed']} proof deadlines missed "
+                f"({summary['funders_blocked']} funders blocked, {summary['withdrawals_requeued']} withdrawals re-queued), "
+                f"{summary['confirmation_deadlines_missed']} confirmation deadlines missed "
+                f"({summary['withdrawers_blocked']} withdrawers blocked)"
+            )
+        return summary
+
+    def _push_requeued(self, db: Session, pair_ids):
+        """Put withdrawals re-queued for the fired pairs back in the order book, with their priority"""
+        requeued = db.query(WithdrawalRequest).join(
+            FundingMatchPair, FundingMatchPair.withdrawal_request_id == WithdrawalRequest.id
+        ).filter(
+            FundingMatchPair.id.in_(pair_ids),
+            FundingMatchPair.funder_missed_deadline == True,
+            WithdrawalRequest.is_fully_matched == False,
+            WithdrawalRequest.is_completed == False
+        ).all()
+        for withdrawal in requeued:
+            self.book.upsert_withdrawal(withdrawal.currency, withdrawal)
+
+    def _wait_seconds(self, now: datetime) -> float:
+        """Time until the next deadline or resync (called holding the condition)"""
+        self._drop_stale()
+        wake_at = self._resync_at
+        if self._heap and (wake_at is None or self._heap[0][0] < wake_at):
+            wake_at = self._heap[0][0]
+        if wake_at is None:
+            return float(self.resync_seconds)
+        return max(0.0, (wake_at - now).total_seconds())
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    wait = self._wait_seconds(datetime.utcnow())
+                    if wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                if self._stopping:
+                    return
+                resync = self._resync_at is not None and self._resync_at <= datetime.utcnow()
+
+            try:
+                if resync:
+                    self.reload()
+                self.fire()
+            except Exception as e:
+                # Failed deadlines were rescheduled; a failed reload is retried shortly
+                logger.error(f"Deadline engine: {e}", exc_info=True)
+                if resync:
+                    with self._condition:
+                        self._resync_at = datetime.utcnow() + timedelta(seconds=self.lease.renew_seconds)
+
+    def start(self):
+        """Load the open deadlines and start the firing thread (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        try:
+            count = self.reload()
+            logger.info(f"Deadline engine: tracking {count} open deadlines")
+        except Exception as e:
+            logger.warning(f"Deadline engine: initial load failed, retrying on the thread: {e}")
+            self.request_resync()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="deadline-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.lease.release()
+
+
+# Global engine, started with the API
+deadline_scheduler = DeadlineScheduler()
@@ -7,10 +7,11 @@ Smart amount splitting with admin wallet fallback
 from dotenv import load_dotenv
 from fastapi import FastAPI, Depends, HTTPException, status, Query, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, or_, func
+from sqlalchemy import desc, and_, or_, func, select
 import sys
 import os
 import uuid
@@ -34,6 +35,17 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from shared import (
     get_db,
+    QueryStatsMiddleware,
+    recent_slow_queries,
+    WALLET_WITH_OWNER,
+    get_async_db,
+    get_read_db,
+    get_async_read_db,
+    ReadYourWritesMiddleware,
+    PIN_HEADER,
+    pool_status,
+    SessionLocal,
+    ReadSessionLocal,
     User,
     Wallet,
     BankDetails,
@@ -46,6 +58,9 @@ from shared import (
     SuccessResponse,
     PaginatedResponse,
     PaginationMeta,
+    get_offset_limit,
+    calculate_pagination,
+    decode_cursor,
     get_current_user_id,
     WalletNotFoundError,
     InsufficientBalanceError,
@@ -64,6 +79,22 @@ from merge_scheduler import (
 # Import auto matcher
 from auto_matcher import get_scheduler
 
+# Import in-memory order book
+from order_book import order_book, bump_version
+
+# Import deadline engine
+from deadline_enforcement import enforce_expired_deadlines, proof_deadline_of
+from deadline_scheduler import deadline_scheduler
+
+# Import counterparty snapshot and active match projections
+from match_persistence import counterparty_snapshot
+from my_requests import REQUEST_STATUSES, load_request_page
+from unmatched_requests import (
+    REQUEST_TYPES, SORT_KEYS, SORT_ORDERS, EXPORT_FORMATS,
+    load_backlog_grouped, load_backlog_page, decode_backlog_cursor, count_backlog, export_backlog,
+)
+from active_matches import funder_pairs_query, withdrawer_pairs_query, format_funder_pairs, format_withdrawer_pairs
+
 # Initialize FastAPI app
 app = FastAPI(
     title="2-Aside Funding Service",
@@ -81,6 +112,18 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_event():
     """Start the automatic matching scheduler on app startup."""
+    # Load pending requests into the in-memory order book
+    # (if this fails the matcher reads from the database instead)
+    try:
+        order_book.rebuild_all(SessionLocal, ["NAIRA", "USDT"])
+        print("[OK] Order book loaded")
+    except Exception as e:
+        logger.warning(f"Order book not loaded, matching will read from the database: {e}")
+
+    # Enforce proof/confirmation deadlines as they expire
+    deadline_scheduler.start()
+    print("[OK] Deadline engine started")
+
     # Start auto-matching scheduler
     scheduler = get_scheduler()
     print("[OK] Auto-matching scheduler started")
@@ -96,6 +139,16 @@ async def startup_event():
     uploads_dir.mkdir(parents=True, exist_ok=True)
     print(f"[OK] Uploads directory ready: {uploads_dir.absolute()}")
 
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Hand scheduler leases to a standby instance straight away instead of at expiry."""
+    from auto_matcher import matching_lease
+    from blob_cleanup_task import cleanup_lease
+    matching_lease.release()
+    cleanup_lease.release()
+    deadline_scheduler.stop()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -103,8 +156,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PIN_HEADER],
 )
 
+# SQL statement count and database time per request (response headers + log fields)
+app.add_middleware(QueryStatsMiddleware)
+
+# Read replica routing - a client's reads stay on the primary right after it writes
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Mount static files for uploaded payment proofs
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
@@ -121,8 +181,8 @@ MAX_AMOUNT = Decimal("10000000")
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "funding-service-v2-batch-matching"}
+    """Health check endpoint (includes database connection pool metrics)"""
+    return {"status": "healthy", "service": "funding-service-v2-batch-matching", "database_pool": pool_status()}
 
 
 # ========================================
@@ -251,6 +311,7 @@ async def create_funding_request(
         funding_request = FundingRequest(
             id=uuid.uuid4(),
             wallet_id=wallet.id,
+            currency=wallet.currency,
             amount=amount,
             amount_remaining=amount,
             is_fully_matched=False,
@@ -259,8 +320,10 @@ async def create_funding_request(
         )
 
         db.add(funding_request)
+        book_version = bump_version(db, currency_upper)
         db.commit()
         db.refresh(funding_request)
+        order_book.upsert_funding(currency_upper, funding_request, book_version)
 
         return SuccessResponse(
             message=f"Funding request created. Will be matched at {next_merge_formatted}",
@@ -372,6 +435,7 @@ async def create_withdrawal_request(
         withdrawal_request = WithdrawalRequest(
             id=uuid.uuid4(),
             wallet_id=wallet.id,
+            currency=wallet.currency,
             amount=amount,
             amount_remaining=amount,
             is_fully_matched=False,
@@ -380,8 +444,10 @@ async def create_withdrawal_request(
         )
 
         db.add(withdrawal_request)
+        book_version = bump_version(db, currency_upper)
         db.commit()
         db.refresh(withdrawal_request)
+        order_book.upsert_withdrawal(currency_upper, withdrawal_request, book_version)
 
         return SuccessResponse(
             message=f"Withdrawal request created. Will be matched at {next_merge_formatted}",
@@ -410,126 +476,76 @@ async def create_withdrawal_request(
 # GET MY REQUESTS
 # ========================================
 
-@app.get("/funding/my-requests", tags=["Funding"])
+async def _my_requests_page(request_model, user_id, cursor, page, per_page, status, db):
+    """Shared body of the my-requests endpoints - 2 queries per page"""
+    if status and status not in REQUEST_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Status must be one of: {', '.join(REQUEST_STATUSES)}")
+
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime, uuid.UUID)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    offset, _ = get_offset_limit(page, per_page)
+
+    data, next_cursor = load_request_page(
+        db, request_model, uuid.UUID(user_id), per_page,
+        after=after, offset=0 if cursor else offset, status=status
+    )
+    return PaginatedResponse(
+        success=True,
+        data=data,
+        meta=PaginationMeta(
+            page=page,
+            per_page=per_page,
+            has_next=next_cursor is not None,
+            has_prev=cursor is not None or page > 1,
+            next_cursor=next_cursor
+        )
+    )
+
+
+@app.get("/funding/my-requests", response_model=PaginatedResponse, tags=["Funding"])
 async def get_my_funding_requests(
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page: int = Query(1, ge=1, description="Page number (offset paging, used without a cursor)"),
+    per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    status: Optional[str] = Query(None, description="pending, matched or completed"),
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get my funding requests with match details"""
+    """
+    Get my funding requests with match details, newest first.
+    Follow meta.next_cursor for the next page.
+    """
     try:
-        # Get user's wallets
-        wallets = db.query(Wallet).filter(Wallet.user_id == uuid.UUID(user_id)).all()
-        wallet_ids = [w.id for w in wallets]
-
-        # Get funding requests
-        requests = db.query(FundingRequest).filter(
-            FundingRequest.wallet_id.in_(wallet_ids)
-        ).order_by(desc(FundingRequest.requested_at)).all()
-
-        data = []
-        for req in requests:
-            # Get matched pairs
-            pairs = db.query(FundingMatchPair).filter(
-                FundingMatchPair.funding_request_id == req.id
-            ).all()
-
-            matched_users = []
-            for pair in pairs:
-                withdrawal = db.query(WithdrawalRequest).filter(
-                    WithdrawalRequest.id == pair.withdrawal_request_id
-                ).first()
-                if withdrawal:
-                    withdrawer_wallet = db.query(Wallet).filter(Wallet.id == withdrawal.wallet_id).first()
-                    if withdrawer_wallet:
-                        withdrawer_user = db.query(User).filter(User.id == withdrawer_wallet.user_id).first()
-                        if withdrawer_user:
-                            matched_users.append({
-                                "username": withdrawer_user.username,
-                                "phone": withdrawer_user.phone,
-                                "amount": str(pair.amount),
-                                "proof_uploaded": pair.proof_uploaded,
-                                "proof_confirmed": pair.proof_confirmed,
-                                "pair_id": str(pair.id)
-                            })
-
-            wallet = db.query(Wallet).filter(Wallet.id == req.wallet_id).first()
-
-            data.append({
-                "id": str(req.id),
-                "amount": str(req.amount),
-                "amount_remaining": str(req.amount_remaining),
-                "currency": wallet.currency if wallet else "UNKNOWN",
-                "is_fully_matched": req.is_fully_matched,
-                "is_completed": req.is_completed,
-                "matched_users": matched_users,
-                "requested_at": req.requested_at.isoformat(),
-                "matched_at": req.matched_at.isoformat() if req.matched_at else None
-            })
-
-        return SuccessResponse(message="Funding requests retrieved", data=data)
+        return await _my_requests_page(FundingRequest, user_id, cursor, page, per_page, status, db)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
 
-@app.get("/withdrawal/my-requests", tags=["Withdrawal"])
+@app.get("/withdrawal/my-requests", response_model=PaginatedResponse, tags=["Withdrawal"])
 async def get_my_withdrawal_requests(
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page: int = Query(1, ge=1, description="Page number (offset paging, used without a cursor)"),
+    per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    status: Optional[str] = Query(None, description="pending, matched or completed"),
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get my withdrawal requests with match details"""
+    """
+    Get my withdrawal requests with match details, newest first.
+    Follow meta.next_cursor for the next page.
+    """
     try:
-        # Get user's wallets
-        wallets = db.query(Wallet).filter(Wallet.user_id == uuid.UUID(user_id)).all()
-        wallet_ids = [w.id for w in wallets]
-
-        # Get withdrawal requests
-        requests = db.query(WithdrawalRequest).filter(
-            WithdrawalRequest.wallet_id.in_(wallet_ids)
-        ).order_by(desc(WithdrawalRequest.requested_at)).all()
-
-        data = []
-        for req in requests:
-            # Get matched pairs
-            pairs = db.query(FundingMatchPair).filter(
-                FundingMatchPair.withdrawal_request_id == req.id
-            ).all()
-
-            matched_users = []
-            for pair in pairs:
-                funding = db.query(FundingRequest).filter(
-                    FundingRequest.id == pair.funding_request_id
-                ).first()
-                if funding:
-                    funder_wallet = db.query(Wallet).filter(Wallet.id == funding.wallet_id).first()
-                    if funder_wallet:
-                        funder_user = db.query(User).filter(User.id == funder_wallet.user_id).first()
-                        if funder_user:
-                            matched_users.append({
-                                "username": funder_user.username,
-                                "phone": funder_user.phone,
-                                "amount": str(pair.amount),
-                                "proof_uploaded": pair.proof_uploaded,
-                                "proof_confirmed": pair.proof_confirmed,
-                                "pair_id": str(pair.id)
-                            })
-
-            wallet = db.query(Wallet).filter(Wallet.id == req.wallet_id).first()
-
-            data.append({
-                "id": str(req.id),
-                "amount": str(req.amount),
-                "amount_remaining": str(req.amount_remaining),
-                "currency": wallet.currency if wallet else "UNKNOWN",
-                "is_fully_matched": req.is_fully_matched,
-                "is_completed": req.is_completed,
-                "matched_users": matched_users,
-                "requested_at": req.requested_at.isoformat(),
-                "matched_at": req.matched_at.isoformat() if req.matched_at else None
-            })
-
-        return SuccessResponse(message="Withdrawal requests retrieved", data=data)
+        return await _my_requests_page(WithdrawalRequest, user_id, cursor, page, per_page, status, db)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
@@ -594,7 +610,9 @@ async def cancel_funding_request(
 
         # Delete the request
         db.delete(funding_req)
+        book_version = bump_version(db, wallet.currency)
         db.commit()
+        order_book.remove_funding(wallet.currency, funding_req.id, book_version)
 
         return SuccessResponse(
             message="Funding request cancelled successfully",
@@ -669,7 +687,9 @@ async def cancel_withdrawal_request(
 
         # Delete the request
         db.delete(withdrawal_req)
+        book_version = bump_version(db, wallet.currency)
         db.commit()
+        order_book.remove_withdrawal(wallet.currency, withdrawal_req.id, book_version)
 
         return SuccessResponse(
             message="Withdrawal request cancelled successfully",
@@ -810,7 +830,7 @@ async def join_merge_cycle(
 @app.get("/merge-cycle/my-status", tags=["Merge Cycle"])
 async def get_my_merge_cycle_status(
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Check if user has pending requests and if they can join the merge cycle.
@@ -825,15 +845,19 @@ async def get_my_merge_cycle_status(
         next_merge_utc, join_window_closes_utc = get_next_merge_time()
 
         # Check for pending requests
-        funding_req = db.query(FundingRequest).join(Wallet).filter(
-            Wallet.user_id == user_uuid,
-            FundingRequest.is_completed == False
-        ).first()
-
-        withdrawal_req = db.query(WithdrawalRequest).join(Wallet).filter(
-            Wallet.user_id == user_uuid,
-            WithdrawalRequest.is_completed == False
-        ).first()
+        funding_req = (await db.execute(
+            select(FundingRequest).join(Wallet).where(
+                Wallet.user_id == user_uuid,
+                FundingRequest.is_completed == False
+            ).limit(1)
+        )).scalars().first()
+
+        withdrawal_req = (await db.execute(
+            select(WithdrawalRequest).join(Wallet).where(
+                Wallet.user_id == user_uuid,
+                WithdrawalRequest.is_completed == False
+            ).limit(1)
+        )).scalars().first()
 
         has_pending = funding_req is not None or withdrawal_req is not None
         already_opted_in = (funding_req and funding_req.opted_in) or (withdrawal_req and withdrawal_req.opted_in)
@@ -865,7 +889,7 @@ async def get_my_merge_cycle_status(
 @app.get("/my-active-matches", tags=["Merge Cycle"])
 async def get_my_active_matches(
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get user's active match pairs that require action (payment or confirmation)
@@ -873,111 +897,13 @@ async def get_my_active_matches(
     try:
         user_uuid = uuid.UUID(user_id)
 
-        # Get all match pairs where user is either funder or withdrawer
-        # and the pair is not yet completed
-
-        # User as funder (needs to pay)
-        funder_pairs = db.query(FundingMatchPair).join(
-            FundingRequest, FundingMatchPair.funding_request_id == FundingRequest.id
-        ).join(
-            Wallet, FundingRequest.wallet_id == Wallet.id
-        ).filter(
-            Wallet.user_id == user_uuid,
-            FundingMatchPair.proof_confirmed == False
-        ).all()
-
-        # User as withdrawer (needs to confirm payment)
-        withdrawer_pairs = db.query(FundingMatchPair).join(
-            WithdrawalRequest, FundingMatchPair.withdrawal_request_id == WithdrawalRequest.id
-        ).join(
-            Wallet, WithdrawalRequest.wallet_id == Wallet.id
-        ).filter(
-            Wallet.user_id == user_uuid,
-            FundingMatchPair.proof_confirmed == False
-        ).all()
-
-        # Format funder pairs (user needs to upload proof)
-        funder_match_data = []
-        for pair in funder_pairs:
-            withdrawal_req = db.query(WithdrawalRequest).filter(
-                WithdrawalRequest.id == pair.withdrawal_request_id
-            ).first()
-            withdrawer_wallet = db.query(Wallet).filter(Wallet.id == withdrawal_req.wallet_id).first()
-            withdrawer_user = db.query(User).filter(User.id == withdrawer_wallet.user_id).first()
-
-            # Get payment details
-            payment_details = {}
-            if withdrawer_wallet.currency == "NAIRA" and withdrawer_wallet.bank_details_id:
-                bank_details = db.query(BankDetails).filter(
-                    BankDetails.id == withdrawer_wallet.bank_details_id
-                ).first()
-                if bank_details:
-                    payment_details = {
-                        "type": "bank",
-                        "account_number": bank_details.account_number,
-                        "account_name": bank_details.account_name,
-                        "bank_name": bank_details.bank_name
-                    }
-            elif withdrawer_wallet.currency == "USDT":
-                payment_details = {
-                    "type": "crypto",
-                    "wallet_address": withdrawer_wallet.wallet_address,
-                    "network": "BEP20"
-                }
-
-            now = datetime.utcnow()
-            deadline = pair.extended_deadline if pair.extension_granted else pair.proof_deadline
-            time_remaining_seconds = (deadline - now).total_seconds() if deadline else None
-
-            funder_match_data.append({
-                "pair_id": str(pair.id),
-                "role": "funder",
-                "amount": str(pair.amount),
-                "currency": withdrawer_wallet.currency,
-                "matched_user": {
-                    "username": withdrawer_user.username,
-                    "phone": withdrawer_user.phone,
-                    "payment_details": payment_details
-                },
-                "proof_uploaded": pair.proof_uploaded,
-                "proof_url": pair.proof_url,
-                "proof_deadline": deadline.isoformat() if deadline else None,
-                "time_remaining_seconds": int(time_remaining_seconds) if time_remaining_seconds else None,
-                "can_extend": not pair.extension_requested and pair.proof_uploaded == False,
-                "extension_requested": pair.extension_requested,
-                "created_at": pair.created_at.isoformat()
-            })
-
-        # Format withdrawer pairs (user needs to confirm payment)
-        withdrawer_match_data = []
-        for pair in withdrawer_pairs:
-            funding_req = db.query(FundingRequest).filter(
-                FundingRequest.id == pair.funding_request_id
-            ).first()
-            funder_wallet = db.query(Wallet).filter(Wallet.id == funding_req.wallet_id).first()
-            funder_user = db.query(User).filter(User.id == funder_wallet.user_id).first()
-
-            now = datetime.utcnow()
-            time_remaining_seconds = (pair.confirmation_deadline - now).total_seconds() if pair.confirmation_deadline else None
+        # One projection per role - pairs not yet confirmed, with the counterparty's details
+        funder_rows = (await db.execute(funder_pairs_query(user_uuid))).all()
+        withdrawer_rows = (await db.execute(withdrawer_pairs_query(user_uuid))).all()
 
-            withdrawer_match_data.append({
-                "pair_id": str(pair.id),
-                "role": "withdrawer",
-                "amount": str(pair.amount),
-                "currency": funder_wallet.currency,
-                "matched_user": {
-                    "username": funder_user.username,
-                    "phone": funder_user.phone
-                },
-                "proof_uploaded": pair.proof_uploaded,
-                "proof_url": pair.proof_url,
-                "proof_confirmed": pair.proof_confirmed,
-                "confirmation_deadline": pair.confirmation_deadline.isoformat() if pair.confirmation_deadline else None,
-                "time_remaining_seconds": int(time_remaining_seconds) if time_remaining_seconds else None,
-                "awaiting_proof": not pair.proof_uploaded,
-                "awaiting_confirmation": pair.proof_uploaded and not pair.proof_confirmed,
-                "created_at": pair.created_at.isoformat()
-            })
+        now = datetime.utcnow()
+        funder_match_data = format_funder_pairs(funder_rows, now)
+        withdrawer_match_data = format_withdrawer_pairs(withdrawer_rows, now)
 
         return SuccessResponse(
             message="Active matches retrieved successfully",
@@ -1021,38 +947,22 @@ async def upload_proof(
         if pair.proof_uploaded:
             raise HTTPException(status_code=400, detail="Proof already uploaded")
 
-        # Check if proof deadline has passed
+        # Check if proof deadline (or granted extension) has passed
         now = datetime.utcnow()
-        if pair.proof_deadline and now > pair.proof_deadline:
-            # Block the funder's wallet
-            wallet.is_blocked = True
-            wallet.block_reason = "Failed to upload payment proof within 4 hours. Please contact support at support@2aside.com to resolve this issue and unblock your account."
-
-            # Get the withdrawal request to re-queue it with priority
-            withdrawal_req = db.query(WithdrawalRequest).filter(
-                WithdrawalRequest.id == pair.withdrawal_request_id
-            ).first()
-
-            if withdrawal_req:
-                # Mark as priority for next merge cycle
-                withdrawal_req.is_priority = True
-                withdrawal_req.priority_timestamp = withdrawal_req.opted_in_at or withdrawal_req.requested_at
-                withdrawal_req.failed_match_count += 1
-
-                # Reset the withdrawal request to be available for next cycle
-                withdrawal_req.is_fully_matched = False
-                withdrawal_req.opted_in = False
-                withdrawal_req.merge_cycle_id = None
-                withdrawal_req.matched_at = None
-
-                # Restore the amount that was matched
-                withdrawal_req.amount_remaining += pair.amount
-
-            # Mark the pair as failed
-            pair.funder_missed_deadline = True
-
+        deadline = proof_deadline_of(pair)
+        if deadline and now > deadline:
+            # Same enforcement as the deadline engine - blocks the funder's wallet, re-queues the
+            # withdrawal with priority and flags the pair (a no-op if the engine got there first)
+            summary = enforce_expired_deadlines(db, now, pair_ids=[pair.id])
             db.commit()
 
+            # Re-queued withdrawal goes back in the book with priority (same currency as the funder)
+            if summary["withdrawals_requeued"]:
+                withdrawal_req = db.query(WithdrawalRequest).filter(
+                    WithdrawalRequest.id == pair.withdrawal_request_id
+                ).first()
+                order_book.upsert_withdrawal(wallet.currency, withdrawal_req)
+
             raise HTTPException(
                 status_code=400,
                 detail="Proof upload deadline has passed (4 hours). Your account has been blocked. Please contact support at support@2aside.com to unblock your account."
@@ -1096,6 +1006,7 @@ async def upload_proof(
         pair.proof_uploaded_at = now
         pair.confirmation_deadline = now + timedelta(hours=4)  # Withdrawer has 4 hours to confirm
         db.commit()
+        deadline_scheduler.track(pair)
 
         return SuccessResponse(
             message="Proof uploaded successfully. Waiting for confirmation (withdrawer has 4 hours)...",
@@ -1204,6 +1115,11 @@ async def confirm_proof(
         if all(p.proof_confirmed for p in withdrawal_pairs):
             withdrawal_req.is_completed = True
 
+        # Completing a partly matched request takes its unmatched rest out of the pending
+        # requests - the order book catches up when it is next reconciled
+        if any(request.is_completed and not request.is_fully_matched for request in (funding_req, withdrawal_req)):
+            bump_version(db, funding_req.currency)
+
         # Schedule proof image deletion for 7 days from now
         if pair.proof_url:
             try:
@@ -1214,6 +1130,7 @@ async def confirm_proof(
                 logger.warning(f"Could not schedule blob deletion: {e}")
 
         db.commit()
+        deadline_scheduler.track(pair)
 
         return SuccessResponse(
             message="Payment confirmed! Balances updated.",
@@ -1278,6 +1195,7 @@ async def request_extension(
         pair.extension_granted = True
         pair.extended_deadline = pair.proof_deadline + timedelta(hours=1)
         db.commit()
+        deadline_scheduler.track(pair)
 
         return SuccessResponse(
             message="Extension granted! You now have an additional 1 hour to upload proof.",
@@ -1304,7 +1222,7 @@ async def request_extension(
 @app.get("/admin/dashboard", tags=["Admin"])
 async def get_admin_dashboard(
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get admin dashboard overview - requires admin user"""
     try:
@@ -1373,69 +1291,45 @@ async def get_admin_dashboard(
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
 
+def _validate_backlog_params(currency: str, request_type: Optional[str], sort: str, order: str) -> str:
+    """Upper-cased currency, or 400 on an unknown currency, type, sort or order"""
+    if currency.upper() not in ["NAIRA", "USDT"]:
+        raise HTTPException(status_code=400, detail="Currency must be NAIRA or USDT")
+    if request_type and request_type not in REQUEST_TYPES:
+        raise HTTPException(status_code=400, detail="Type must be funding or withdrawal")
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Sort must be one of: {', '.join(SORT_KEYS)}")
+    if order not in SORT_ORDERS:
+        raise HTTPException(status_code=400, detail="Order must be asc or desc")
+    return currency.upper()
+
+
 @app.get("/admin/unmatched-requests", tags=["Admin"])
 async def get_unmatched_requests(
     currency: str = Query(..., description="NAIRA or USDT"),
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get all unmatched funding and withdrawal requests"""
+    """
+    Get all unmatched funding and withdrawal requests, oldest first.
+    One query over both request tables joined to their users; for large
+    backlogs use /admin/unmatched-requests/page or /admin/unmatched-requests/export.
+    """
     try:
         # Check if user is admin
         user = db.query(User).filter(User.id == uuid.UUID(user_id)).first()
         if not user or not user.is_admin:
             raise HTTPException(status_code=403, detail="Admin access required")
 
-        # Get unmatched funding requests
-        funding_requests = db.query(FundingRequest).join(Wallet).filter(
-            Wallet.currency == currency.upper(),
-            FundingRequest.is_fully_matched == False,
-            FundingRequest.is_completed == False
-        ).all()
-
-        # Get unmatched withdrawal requests
-        withdrawal_requests = db.query(WithdrawalRequest).join(Wallet).filter(
-            Wallet.currency == currency.upper(),
-            WithdrawalRequest.is_fully_matched == False,
-            WithdrawalRequest.is_completed == False
-        ).all()
-
-        funding_data = []
-        for req in funding_requests:
-            wallet = db.query(Wallet).filter(Wallet.id == req.wallet_id).first()
-            user_obj = db.query(User).filter(User.id == wallet.user_id).first() if wallet else None
-            funding_data.append({
-                "id": str(req.id),
-                "amount": str(req.amount),
-                "amount_remaining": str(req.amount_remaining),
-                "user": {
-                    "username": user_obj.username if user_obj else "Unknown",
-                    "phone": user_obj.phone if user_obj else "Unknown"
-                },
-                "requested_at": req.requested_at.isoformat()
-            })
-
-        withdrawal_data = []
-        for req in withdrawal_requests:
-            wallet = db.query(Wallet).filter(Wallet.id == req.wallet_id).first()
-            user_obj = db.query(User).filter(User.id == wallet.user_id).first() if wallet else None
-            withdrawal_data.append({
-                "id": str(req.id),
-                "amount": str(req.amount),
-                "amount_remaining": str(req.amount_remaining),
-                "user": {
-                    "username": user_obj.username if user_obj else "Unknown",
-                    "phone": user_obj.phone if user_obj else "Unknown"
-                },
-                "requested_at": req.requested_at.isoformat()
-            })
+        currency_upper = _validate_backlog_params(currency, None, "requested_at", "asc")
+        grouped = load_backlog_grouped(db, currency_upper)
 
         return SuccessResponse(
             message="Unmatched requests retrieved",
             data={
-                "funding": funding_data,
-                "withdrawal": withdrawal_data,
-                "currency": currency.upper()
+                "funding": grouped["funding"],
+                "withdrawal": grouped["withdrawal"],
+                "currency": currency_upper
             }
         )
 
@@ -1445,6 +1339,103 @@ async def get_unmatched_requests(
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
 
+@app.get("/admin/unmatched-requests/page", response_model=PaginatedResponse, tags=["Admin"])
+async def get_unmatched_requests_page(
+    currency: str = Query(..., description="NAIRA or USDT"),
+    request_type: Optional[str] = Query(None, alias="type", description="funding or withdrawal (default: both)"),
+    sort: str = Query("requested_at", description="requested_at or amount_remaining"),
+    order: str = Query("asc", description="asc (oldest / smallest first) or desc"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page: int = Query(1, ge=1, description="Page number (offset paging, used without a cursor)"),
+    per_page: int = Query(50, ge=1, le=100, description="Items per page"),
+    include_total: bool = Query(False, description="Also count the whole backlog"),
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get unmatched funding and withdrawal requests as one list, a page at a time.
+    Each page is a single query over both request tables joined to their users;
+    follow meta.next_cursor for the next page. For the whole backlog use
+    /admin/unmatched-requests/export.
+    """
+    try:
+        # Check if user is admin
+        user = db.query(User).filter(User.id == uuid.UUID(user_id)).first()
+        if not user or not user.is_admin:
+            raise HTTPException(status_code=403, detail="Admin access required")
+
+        currency_upper = _validate_backlog_params(currency, request_type, sort, order)
+
+        after = None
+        if cursor:
+            try:
+                after = decode_backlog_cursor(cursor, sort, order)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        offset, _ = get_offset_limit(page, per_page)
+
+        data, next_cursor = load_backlog_page(
+            db, currency_upper, per_page, request_type=request_type, sort=sort, order=order,
+            after=after, offset=0 if cursor else offset
+        )
+        pagination = {
+            "page": page,
+            "per_page": per_page,
+            "has_next": next_cursor is not None,
+            "has_prev": cursor is not None or page > 1,
+            "next_cursor": next_cursor,
+        }
+        if include_total:
+            pagination["total_items"] = sum(count_backlog(db, currency_upper, request_type).values())
+            pagination["total_pages"] = calculate_pagination(page, per_page, pagination["total_items"])["total_pages"]
+
+        return PaginatedResponse(success=True, data=data, meta=PaginationMeta(**pagination))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"error": str(e)})
+
+
+@app.get("/admin/unmatched-requests/export", tags=["Admin"])
+async def export_unmatched_requests(
+    currency: str = Query(..., description="NAIRA or USDT"),
+    export_format: str = Query("ndjson", alias="format", description="ndjson or csv"),
+    request_type: Optional[str] = Query(None, alias="type", description="funding or withdrawal (default: both)"),
+    sort: str = Query("requested_at", description="requested_at or amount_remaining"),
+    order: str = Query("asc", description="asc or desc"),
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Stream the whole unmatched backlog as NDJSON (one request per line) or CSV.
+    Rows are read off a server-side cursor in batches, never all at once.
+    """
+    try:
+        # Check if user is admin
+        user = db.query(User).filter(User.id == uuid.UUID(user_id)).first()
+        if not user or not user.is_admin:
+            raise HTTPException(status_code=403, detail="Admin access required")
+
+        currency_upper = _validate_backlog_params(currency, request_type, sort, order)
+        if export_format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail="Format must be ndjson or csv")
+
+        media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+        filename = f"unmatched-{currency_upper.lower()}-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+        return StreamingResponse(
+            # The body outlives this request's session - the export opens its own
+            export_backlog(ReadSessionLocal, currency_upper, export_format, request_type=request_type, sort=sort, order=order),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"error": str(e)})
+
+
 @app.post("/admin/manual-match", tags=["Admin"])
 async def manual_match_requests(
     funding_request_id: str = Query(...),
@@ -1489,7 +1480,8 @@ async def manual_match_requests(
             amount=amount,
             proof_uploaded=False,
             proof_confirmed=False,
-            created_at=datetime.utcnow()
+            created_at=datetime.utcnow(),
+            **counterparty_snapshot(funding_req, withdrawal_req)
         )
         db.add(pair)
 
@@ -1508,7 +1500,10 @@ async def manual_match_requests(
             withdrawal_req.matched_at = datetime.utcnow()
             withdrawal_req.merge_cycle_id = next_cycle.id
 
+        book_version = bump_version(db, funding_req.currency)
         db.commit()
+        order_book.apply_matches(funding_req.currency, [(funding_req.id, withdrawal_req.id, amount)], book_version)
+        deadline_scheduler.track(pair)
 
         return SuccessResponse(
             message="Manual match created successfully",
@@ -1590,7 +1585,9 @@ async def match_with_admin_wallet(
             )
             db.add(tx)
 
+            book_version = bump_version(db, wallet.currency)
             db.commit()
+            order_book.remove_funding(wallet.currency, funding_req.id, book_version)
 
             return SuccessResponse(
                 message="Matched with admin wallet successfully",
@@ -1657,7 +1654,9 @@ async def match_with_admin_wallet(
             )
             db.add(tx)
 
+            book_version = bump_version(db, wallet.currency)
             db.commit()
+            order_book.remove_withdrawal(wallet.currency, withdrawal_req.id, book_version)
 
             return SuccessResponse(
                 message="Matched with admin wallet successfully",
@@ -1679,6 +1678,7 @@ async def match_with_admin_wallet(
 
 @app.post("/admin/trigger-merge-cycle", tags=["Admin"])
 async def trigger_merge_cycle_manually(
+    engine: Optional[str] = Query(None, description="Matching engine: python or numpy (default: MATCHING_ENGINE)"),
     user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
@@ -1695,13 +1695,14 @@ async def trigger_merge_cycle_manually(
 
         # Trigger Celery task
         from funding_service.celery_batch_matching import run_merge_cycle
-        task = run_merge_cycle.delay(str(next_cycle.id))
+        task = run_merge_cycle.delay(str(next_cycle.id), engine)
 
         return SuccessResponse(
             message="Merge cycle triggered",
             data={
                 "cycle_id": str(next_cycle.id),
                 "task_id": task.id,
+                "engine": engine,
                 "scheduled_time": next_cycle.scheduled_time.isoformat()
             }
         )
@@ -1786,17 +1787,18 @@ async def get_blocked_users(
         if not admin_user or not admin_user.is_admin:
             raise HTTPException(status_code=403, detail="Admin access required")
 
-        # Find all blocked wallets
-        blocked_wallets = db.query(Wallet).filter(Wallet.is_blocked == True).all()
+        # Find all blocked wallets, with their owners in the same query
+        blocked_wallets = db.query(Wallet).filter(Wallet.is_blocked == True).options(*WALLET_WITH_OWNER).all()
 
-        # Get unique users
-        user_ids = set(w.user_id for w in blocked_wallets)
-        blocked_users = []
+        # Group by user
+        wallets_by_user = {}
+        for w in blocked_wallets:
+            wallets_by_user.setdefault(w.user_id, []).append(w)
 
-        for uid in user_ids:
-            user = db.query(User).filter(User.id == uid).first()
+        blocked_users = []
+        for user_wallets in wallets_by_user.values():
+            user = user_wallets[0].user
             if user:
-                user_wallets = [w for w in blocked_wallets if w.user_id == uid]
                 blocked_users.append({
                     "user_id": str(user.id),
                     "username": user.username,
@@ -1816,6 +1818,35 @@ async def get_blocked_users(
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
 
+@app.get("/admin/slow-queries", tags=["Admin"])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    min_ms: float = Query(0, ge=0, description="Only statements at least this slow"),
+    user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Recent slow statements recorded by this worker process (SLOW_QUERY_MS),
+    newest first, with their source, call site, parameter shapes and plan.
+    """
+    try:
+        # Check if user is admin
+        admin_user = db.query(User).filter(User.id == uuid.UUID(user_id)).first()
+        if not admin_user or not admin_user.is_admin:
+            raise HTTPException(status_code=403, detail="Admin access required")
+
+        slow_queries = recent_slow_queries(limit, min_ms)
+        return SuccessResponse(
+            message=f"{len(slow_queries['queries'])} slow queries",
+            data={**slow_queries, "pid": os.getpid()}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"error": str(e)})
+
+
 # ========================================
 # DEMO/TEST ENDPOINTS
 # ========================================
@@ -0,0 +1,130 @@
+"""
+What every written match pair carries, whoever writes it.
+
+Each pair is written with its counterparty snapshot (SNAPSHOT_COLUMNS): both
+parties' user id, username and phone, and the withdrawer's payment details
+as they were at match time. counterparty_columns adds it to the INSERT ...
+SELECT that merge_plan.apply_batch writes a batch of staged pairs with;
+counterparty_snapshot builds it from two loaded requests (an admin match).
+"""
+
+from sqlalchemy.orm import aliased
+from decimal import Decimal
+from typing import Dict, List, Tuple
+import uuid
+import sys
+import os
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from shared import FundingRequest, WithdrawalRequest, Wallet, User, BankDetails
+
+# Funder has 4 hours to upload proof once matched
+PROOF_DEADLINE_HOURS = 4
+
+# Counterparty snapshot columns of FundingMatchPair, in the order of counterparty_columns()
+SNAPSHOT_COLUMNS = (
+    "funder_user_id",
+    "funder_username",
+    "funder_phone",
+    "withdrawer_user_id",
+    "withdrawer_username",
+    "withdrawer_phone",
+    "currency",
+    "payee_account_number",
+    "payee_account_name",
+    "payee_bank_name",
+    "payee_wallet_address",
+)
+
+_funder_wallet = aliased(Wallet, name="funder_wallet")
+_funder_user = aliased(User, name="funder_user")
+_withdrawer_wallet = aliased(Wallet, name="withdrawer_wallet")
+_withdrawer_user = aliased(User, name="withdrawer_user")
+
+
+def counterparty_columns(pairs, funding_request_id, withdrawal_request_id):
+    """
+    Join a SELECT of pairs through both requests to their parties and append
+    the snapshot values, in SNAPSHOT_COLUMNS order (for INSERT ... SELECT).
+    """
+    return pairs.add_columns(
+        _funder_user.id,
+        _funder_user.username,
+        _funder_user.phone,
+        _withdrawer_user.id,
+        _withdrawer_user.username,
+        _withdrawer_user.phone,
+        _withdrawer_wallet.currency,
+        BankDetails.account_number,
+        BankDetails.account_name,
+        BankDetails.bank_name,
+        _withdrawer_wallet.wallet_address,
+    ).join(
+        FundingRequest, FundingRequest.id == funding_request_id
+    ).join(
+        _funder_wallet, FundingRequest.wallet_id == _funder_wallet.id
+    ).join(
+        _funder_user, _funder_wallet.user_id == _funder_user.id
+    ).join(
+        WithdrawalRequest, WithdrawalRequest.id == withdrawal_request_id
+    ).join(
+        _withdrawer_wallet, WithdrawalRequest.wallet_id == _withdrawer_wallet.id
+    ).join(
+        _withdrawer_user, _withdrawer_wallet.user_id == _withdrawer_user.id
+    ).outerjoin(
+        BankDetails, _withdrawer_wallet.bank_details_id == BankDetails.id
+    )
+
+
+def _party(role: str, user_id, username, phone, currency=None, wallet_address=None,
+           account_number=None, account_name=None, bank_name=None) -> dict:
+    """Snapshot values of one side; the withdrawer's side also carries where to pay"""
+    snapshot = {f"{role}_user_id": user_id, f"{role}_username": username, f"{role}_phone": phone}
+    if role == "withdrawer":
+        snapshot.update({
+            "currency": currency,
+            "payee_account_number": account_number,
+            "payee_account_name": account_name,
+            "payee_bank_name": bank_name,
+            "payee_wallet_address": wallet_address,
+        })
+    return snapshot
+
+
+def counterparty_snapshot(funding: FundingRequest, withdrawal: WithdrawalRequest) -> dict:
+    """Snapshot values for a pair of two loaded requests (e.g. an admin match)"""
+    funder, withdrawer = funding.wallet.user, withdrawal.wallet.user
+    bank_details = withdrawal.wallet.bank_details
+    return {
+        **_party("funder", funder.id, funder.username, funder.phone),
+        **_party(
+            "withdrawer", withdrawer.id, withdrawer.username, withdrawer.phone,
+            currency=withdrawal.wallet.currency,
+            wallet_address=withdrawal.wallet.wallet_address,
+            account_number=bank_details.account_number if bank_details else None,
+            account_name=bank_details.account_name if bank_details else None,
+            bank_name=bank_details.bank_name if bank_details else None
+        ),
+    }
+
+
+def apply_matches_to_remaining(
+    matches: List[Tuple[uuid.UUID, uuid.UUID, Decimal]],
+    funding_remaining: Dict[uuid.UUID, Decimal],
+    withdrawal_remaining: Dict[uuid.UUID, Decimal]
+) -> Tuple[Dict[uuid.UUID, Decimal], Dict[uuid.UUID, Decimal]]:
+    """
+    Compute the amount_remaining of every request after the given matches.
+
+    Returns: (funding_after, withdrawal_after) - new dicts, inputs are not modified
+    """
+    funding_after = dict(funding_remaining)
+    withdrawal_after = dict(withdrawal_remaining)
+
+    for funding_id, withdrawal_id, amount in matches:
+        funding_after[funding_id] -= amount
+        withdrawal_after[withdrawal_id] -= amount
+
+    return funding_after, withdrawal_after
@@ -0,0 +1,93 @@
+"""
+ORM-free matching kernel for merge cycles.
+Works on compact (id, amount_in_minor_units) pairs - kobo for NAIRA, cents for USDT -
+so the greedy split runs on plain ints instead of Decimal attributes of live entities.
+"""
+
+from decimal import Decimal
+from operator import itemgetter
+from typing import Any, List, Sequence, Tuple
+
+# Amounts are stored as Numeric(18, 2): 100 kobo per naira, 100 cents per USDT
+MINOR_UNITS_PER_MAJOR = 100
+
+_MINOR_UNIT_EXPONENT = Decimal("0.01")
+
+
+def to_minor_units(amount: Decimal) -> int:
+    """
+    Convert a 2-decimal-place amount to integer minor units.
+
+    Example:
+        >>> to_minor_units(Decimal("1500.25"))
+        150025
+    """
+    units = Decimal(amount) * MINOR_UNITS_PER_MAJOR
+    if units != units.to_integral_value():
+        raise ValueError(f"Amount has more than 2 decimal places: {amount}")
+    return int(units)
+
+
+def from_minor_units(units: int) -> Decimal:
+    """
+    Convert integer minor units back to a 2-decimal-place amount.
+
+    Example:
+        >>> from_minor_units(150025)
+        Decimal('1500.25')
+    """
+    return (Decimal(units) / MINOR_UNITS_PER_MAJOR).quantize(_MINOR_UNIT_EXPONENT)
+
+
+def match_minor_units(
+    funders: Sequence[Tuple[Any, int]],
+    withdrawers: Sequence[Tuple[Any, int]]
+) -> List[Tuple[Any, Any, int]]:
+    """
+    Greedy amount-splitting match over (id, amount) pairs.
+
+    Both sides are stably sorted by amount (ascending) and walked with two
+    pointers; each step matches the smaller remaining amount and advances
+    whichever side is exhausted. Ties keep their input order, so callers
+    control precedence among equal amounts (e.g. priority withdrawals first).
+
+    Args:
+        funders: (funding_id, amount_remaining in minor units)
+        withdrawers: (withdrawal_id, amount_remaining in minor units)
+
+    Returns: List of (funding_id, withdrawal_id, amount in minor units) triples
+    """
+    funders_sorted = sorted(funders, key=itemgetter(1))
+    withdrawers_sorted = sorted(withdrawers, key=itemgetter(1))
+    funder_count, withdrawer_count = len(funders_sorted), len(withdrawers_sorted)
+
+    matches = []
+    if not funder_count or not withdrawer_count:
+        return matches
+
+    append = matches.append
+    i, j = 0, 0
+    funder_id, funder_remaining = funders_sorted[0]
+    withdrawer_id, withdrawer_remaining = withdrawers_sorted[0]
+
+    while True:
+        # Match the smaller amount
+        match_amount = funder_remaining if funder_remaining <= withdrawer_remaining else withdrawer_remaining
+        append((funder_id, withdrawer_id, match_amount))
+
+        funder_remaining -= match_amount
+        withdrawer_remaining -= match_amount
+
+        # Move to next if fully matched
+        if funder_remaining == 0:
+            i += 1
+            if i == funder_count:
+                break
+            funder_id, funder_remaining = funders_sorted[i]
+        if withdrawer_remaining == 0:
+            j += 1
+            if j == withdrawer_count:
+                break
+            withdrawer_id, withdrawer_remaining = withdrawers_sorted[j]
+
+    return matches
@@ -0,0 +1,344 @@
+"""
+Staged matching plans - the per-currency checkpoint of a merge cycle.
+
+Requests can no longer be created for, or cancelled from, a cycle after its
+cutoff_time (10 minutes before the merge), so the matcher runs then on a
+frozen snapshot and stages the resulting pairs in merge_plan_pairs. At the
+scheduled time the plan is checked against the database: the pending
+requests' ids and amounts must still digest to the plan's snapshot_digest.
+If nothing moved, applying it is a handful of set-based statements
+run entirely on the server (INSERT ... SELECT of the staged pairs, correlated
+UPDATEs of the requests); otherwise (a priority re-queue after a missed proof
+deadline, an admin match) that currency is re-matched from the database as usual.
+
+A currency matched at merge time is staged the same way before anything is
+written. Staged pairs are numbered into batches and each batch is applied in
+its own transaction together with the plan's batches_applied counter, so a
+merge cycle that is killed or times out resumes from the next batch instead
+of re-matching the backlog, and a batch can never be applied twice.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import uuid
+
+from sqlalchemy import insert, update, select, literal, func, Boolean, DateTime
+from sqlalchemy.orm import Session
+
+from shared import FundingRequest, WithdrawalRequest, FundingMatchPair, MergePlan, MergePlanPair
+from shared.models import UUID
+from match_persistence import PROOF_DEADLINE_HOURS, SNAPSHOT_COLUMNS, apply_matches_to_remaining, counterparty_columns
+from matching_kernel import from_minor_units
+from order_book import load_fingerprints, load_book_entries, bump_version, PRIORITY_RANK
+
+# Staged pairs applied per transaction - the resume granularity of a merge cycle
+MERGE_BATCH_SIZE = int(os.getenv("MERGE_BATCH_SIZE", "5000"))
+
+# Amounts compared in SQL are only exact to half a minor unit on backends that
+# store Numeric as floating point (SQLite)
+HALF_MINOR_UNIT = Decimal("0.005")
+
+
+def snapshot_digest(
+    funders: List[Tuple[uuid.UUID, int]],
+    withdrawers: List[Tuple[uuid.UUID, int]],
+    priority_count: int
+) -> str:
+    """
+    Digest of a snapshot as returned by load_pending_amounts: each side's (id, amount)
+    pairs, whatever their order, with the priority withdrawals told apart.
+    """
+    digest = hashlib.sha256()
+    sides = (("funding", funders), ("priority", withdrawers[:priority_count]), ("withdrawal", withdrawers[priority_count:]))
+    for side, requests in sides:
+        for request_id, units in sorted(requests):
+            digest.update(f"{side}:{request_id}:{units};".encode())
+    return digest.hexdigest()
+
+
+def make_plan(
+    db: Session,
+    merge_cycle_id: uuid.UUID,
+    currency: str,
+    funders: List[Tuple[uuid.UUID, int]],
+    withdrawers: List[Tuple[uuid.UUID, int]],
+    priority_count: int,
+    matches: List[Tuple[uuid.UUID, uuid.UUID, int]],
+    batch_size: Optional[int] = None
+) -> MergePlan:
+    """
+    Stage a plan for one currency (caller commits).
+
+    Args:
+        funders, withdrawers, priority_count: Snapshot as returned by load_pending_amounts
+        matches: Engine output on that snapshot, amounts in minor units
+        batch_size: Pairs applied per transaction, default MERGE_BATCH_SIZE
+    """
+    batch_size = batch_size or MERGE_BATCH_SIZE
+    decimal_matches = [(f, w, from_minor_units(units)) for f, w, units in matches]
+    funding_after, withdrawal_after = apply_matches_to_remaining(
+        decimal_matches,
+        {request_id: from_minor_units(units) for request_id, units in funders},
+        {request_id: from_minor_units(units) for request_id, units in withdrawers}
+    )
+
+    plan = MergePlan(
+        id=uuid.uuid4(),
+        merge_cycle_id=merge_cycle_id,
+        currency=currency,
+        snapshot_digest=snapshot_digest(funders, withdrawers, priority_count),
+        funding_count=len(funders),
+        funding_total=sum(units for _, units in funders),
+        withdrawal_count=len(withdrawers),
+        withdrawal_total=sum(units for _, units in withdrawers),
+        priority_count=priority_count,
+        match_count=len(matches),
+        unmatched_funding=sum(1 for v in funding_after.values() if v > 0),
+        unmatched_withdrawal=sum(1 for v in withdrawal_after.values() if v > 0),
+        batch_count=-(-len(matches) // batch_size),
+        batches_applied=0,
+        created_at=datetime.utcnow()
+    )
+    db.add(plan)
+    db.flush()
+
+    if decimal_matches:
+        db.execute(insert(MergePlanPair), [
+            {
+                "id": uuid.uuid4(),
+                "merge_plan_id": plan.id,
+                "funding_request_id": funding_id,
+                "withdrawal_request_id": withdrawal_id,
+                "amount": amount,
+                "batch": index // batch_size,
+            }
+            for index, (funding_id, withdrawal_id, amount) in enumerate(decimal_matches)
+        ])
+
+    return plan
+
+
+def load_plans(db: Session, merge_cycle_id: uuid.UUID) -> Dict[str, MergePlan]:
+    """Plans of a cycle by currency"""
+    plans = db.query(MergePlan).filter(MergePlan.merge_cycle_id == merge_cycle_id).all()
+    for plan in plans:
+        db.expunge(plan)  # Read by the per-currency sessions
+    return {getattr(plan.currency, "value", plan.currency): plan for plan in plans}
+
+
+def plan_is_current(db: Session, plan: MergePlan, currency: str, cutoff_time: Optional[datetime]) -> bool:
+    """True if the pending requests before cutoff are still the ones, with the amounts, the plan was built from"""
+    if plan.snapshot_digest is None:
+        return False
+    funding, withdrawals = load_book_entries(db, currency, cutoff_time)
+    priority = [entry for entry in withdrawals if entry.rank == PRIORITY_RANK]
+    regular = [entry for entry in withdrawals if entry.rank != PRIORITY_RANK]
+    current = snapshot_digest(
+        [(entry.request_id, entry.amount) for entry in funding],
+        [(entry.request_id, entry.amount) for entry in priority + regular],
+        len(priority)
+    )
+    return current == plan.snapshot_digest
+
+
+def is_complete(plan: MergePlan) -> bool:
+    return plan.batches_applied >= plan.batch_count
+
+
+def plan_stats(plan: MergePlan) -> Dict[str, int]:
+    """Outcome counts of a plan: pairs created and requests left unmatched on each side"""
+    return {
+        "pairs_created": plan.match_count,
+        "unmatched_funding": plan.unmatched_funding,
+        "unmatched_withdrawal": plan.unmatched_withdrawal,
+    }
+
+
+def _staged_sums(staged_request_id, plan_id: uuid.UUID, batch: int):
+    return select(
+        staged_request_id.label("request_id"),
+        func.sum(MergePlanPair.amount).label("amount")
+    ).where(
+        MergePlanPair.merge_plan_id == plan_id,
+        MergePlanPair.batch == batch
+    ).group_by(staged_request_id).subquery()
+
+
+def batch_fits(db: Session, plan: MergePlan, batch: int) -> bool:
+    """
+    True if every request in a batch still exists and has at least its staged amount remaining.
+    Guards batches applied after the database has moved (resumed cycles, re-queues,
+    requests cancelled - and so deleted - after the plan was made).
+    """
+    for model, staged_request_id in (
+        (FundingRequest, MergePlanPair.funding_request_id),
+        (WithdrawalRequest, MergePlanPair.withdrawal_request_id)
+    ):
+        staged = _staged_sums(staged_request_id, plan.id, batch)
+        short = db.query(func.count()).select_from(staged).outerjoin(
+            model, model.id == staged.c.request_id
+        ).filter(
+            (model.id == None)
+            | (staged.c.amount - model.amount_remaining > HALF_MINOR_UNIT)
+            | (model.is_completed == True)
+        ).scalar()
+        if short:
+            return False
+    return True
+
+
+def _apply_to_requests(
+    db: Session,
+    model,
+    staged_request_id,
+    plan_id: uuid.UUID,
+    batch: int,
+    merge_cycle_id: uuid.UUID,
+    now: datetime
+):
+    """Subtract one batch's staged pair amounts from one side's requests and flag the ones now fully matched"""
+    matched = select(staged_request_id).where(
+        MergePlanPair.merge_plan_id == plan_id,
+        MergePlanPair.batch == batch
+    )
+    matched_amount = select(func.sum(MergePlanPair.amount)).where(
+        MergePlanPair.merge_plan_id == plan_id,
+        MergePlanPair.batch == batch,
+        staged_request_id == model.id
+    ).scalar_subquery()
+
+    db.execute(
+        update(model)
+        .where(model.id.in_(matched))
+        .values(amount_remaining=model.amount_remaining - matched_amount)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(
+        update(model)
+        .where(model.id.in_(matched), model.amount_remaining < HALF_MINOR_UNIT)
+        .values(is_fully_matched=True, matched_at=now, merge_cycle_id=merge_cycle_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def apply_batch(
+    db: Session,
+    plan: MergePlan,
+    batch: int,
+    merge_cycle_id: uuid.UUID,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Write one batch of a plan's pairs and request updates, and advance its checkpoint (caller commits).
+
+    Raises: RuntimeError if the batch was already applied (e.g. by a concurrent run)
+
+    Returns: Pairs created and requests fully matched by the batch, and the
+        order book version it bumped the currency to
+    """
+    now = now or datetime.utcnow()
+    proof_deadline = now + timedelta(hours=PROOF_DEADLINE_HOURS)
+
+    # Claim the batch first - the update only succeeds from the expected checkpoint
+    advanced = db.execute(
+        update(MergePlan)
+        .where(MergePlan.id == plan.id, MergePlan.batches_applied == batch)
+        .values(batches_applied=batch + 1, updated_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not advanced:
+        raise RuntimeError(f"Batch {batch} of merge plan {plan.id} is already applied")
+
+    # Pairs and their counterparty snapshot in one INSERT ... SELECT
+    staged_pairs = counterparty_columns(select(
+        MergePlanPair.id,
+        MergePlanPair.funding_request_id,
+        MergePlanPair.withdrawal_request_id,
+        literal(merge_cycle_id, UUID()),
+        MergePlanPair.amount,
+        literal(False, Boolean()),
+        literal(False, Boolean()),
+        literal(proof_deadline, DateTime()),
+        literal(False, Boolean()),
+        literal(False, Boolean()),
+        literal(now, DateTime())
+    ), MergePlanPair.funding_request_id, MergePlanPair.withdrawal_request_id).where(
+        MergePlanPair.merge_plan_id == plan.id, MergePlanPair.batch == batch
+    )
+
+    pairs_created = db.execute(insert(FundingMatchPair).from_select([
+        "id",
+        "funding_request_id",
+        "withdrawal_request_id",
+        "merge_cycle_id",
+        "amount",
+        "proof_uploaded",
+        "proof_confirmed",
+        "proof_deadline",
+        "funder_missed_deadline",
+        "withdrawer_missed_deadline",
+        "created_at",
+        *SNAPSHOT_COLUMNS,
+    ], staged_pairs)).rowcount
+
+    funding_fully_matched = _apply_to_requests(
+        db, FundingRequest, MergePlanPair.funding_request_id, plan.id, batch, merge_cycle_id, now
+    )
+    withdrawal_fully_matched = _apply_to_requests(
+        db, WithdrawalRequest, MergePlanPair.withdrawal_request_id, plan.id, batch, merge_cycle_id, now
+    )
+    plan.batches_applied = batch + 1
+
+    return {
+        "pairs_created": pairs_created,
+        "funding_fully_matched": funding_fully_matched,
+        "withdrawal_fully_matched": withdrawal_fully_matched,
+        "book_version": bump_version(db, plan.currency),
+    }
+
+
+def truncate_plan(db: Session, plan: MergePlan, currency: str, cutoff_time: Optional[datetime]):
+    """
+    Drop a plan's unapplied batches and count what is left unmatched (caller commits).
+    The remaining requests wait for the next cycle, like any unmatched request.
+    """
+    applied = db.query(func.count(MergePlanPair.id)).filter(
+        MergePlanPair.merge_plan_id == plan.id,
+        MergePlanPair.batch < plan.batches_applied
+    ).scalar()
+    db.query(MergePlanPair).filter(
+        MergePlanPair.merge_plan_id == plan.id,
+        MergePlanPair.batch >= plan.batches_applied
+    ).delete(synchronize_session=False)
+
+    (unmatched_funding, _, _), (unmatched_withdrawal, _, _) = load_fingerprints(db, currency, cutoff_time)
+    values = {
+        "batch_count": plan.batches_applied,
+        "match_count": applied,
+        "unmatched_funding": unmatched_funding,
+        "unmatched_withdrawal": unmatched_withdrawal,
+    }
+    db.execute(
+        update(MergePlan)
+        .where(MergePlan.id == plan.id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    for field, value in values.items():
+        setattr(plan, field, value)
+
+
+def delete_plan(db: Session, plan_id: uuid.UUID):
+    """Drop one plan and its staged pairs (caller commits)"""
+    db.query(MergePlanPair).filter(MergePlanPair.merge_plan_id == plan_id).delete(synchronize_session=False)
+    db.query(MergePlan).filter(MergePlan.id == plan_id).delete(synchronize_session=False)
+
+
+def delete_plans(db: Session, merge_cycle_id: uuid.UUID):
+    """Drop a cycle's plans and staged pairs once they are spent (caller commits)"""
+    plan_ids = select(MergePlan.id).where(MergePlan.merge_cycle_id == merge_cycle_id)
+    db.query(MergePlanPair).filter(MergePlanPair.merge_plan_id.in_(plan_ids)).delete(synchronize_session=False)
+    db.query(MergePlan).filter(MergePlan.merge_cycle_id == merge_cycle_id).delete(synchronize_session=False)
@@ -0,0 +1,137 @@
+"""
+Pages of a user's funding or withdrawal requests, with their match pairs.
+
+A page is two statements however long the user's history is: a keyset seek
+on (requested_at, id) for the page's requests, then one IN query for the
+pairs of exactly those requests. Counterparties come from each pair's
+snapshot (match_persistence.SNAPSHOT_COLUMNS), so nothing else is joined.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import uuid
+import sys
+import os
+
+from sqlalchemy import select, desc, and_
+from sqlalchemy.orm import Session
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from shared import FundingRequest, WithdrawalRequest, FundingMatchPair, Wallet
+from shared.utils import encode_cursor, keyset_condition
+
+# Values of the status filter - see status_condition
+REQUEST_STATUSES = ("pending", "matched", "completed")
+
+
+def status_condition(request_model, status: str):
+    """
+    pending   - waiting for (more) matches
+    matched   - fully matched, payments in progress
+    completed - all payments done
+    """
+    if status == "pending":
+        return and_(request_model.is_fully_matched == False, request_model.is_completed == False)
+    if status == "matched":
+        return and_(request_model.is_fully_matched == True, request_model.is_completed == False)
+    if status == "completed":
+        return request_model.is_completed == True
+    raise ValueError(f"Unknown status {status!r}, expected one of {', '.join(REQUEST_STATUSES)}")
+
+
+def _counterparty_columns(request_model):
+    """The pair's key to request_model and the other side's username and phone"""
+    if request_model is FundingRequest:
+        return FundingMatchPair.funding_request_id, FundingMatchPair.withdrawer_username, FundingMatchPair.withdrawer_phone
+    return FundingMatchPair.withdrawal_request_id, FundingMatchPair.funder_username, FundingMatchPair.funder_phone
+
+
+def load_request_page(
+    db: Session,
+    request_model,
+    user_id: uuid.UUID,
+    per_page: int,
+    after: Optional[Tuple[datetime, uuid.UUID]] = None,
+    offset: int = 0,
+    status: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of the user's requests of request_model, newest first.
+
+    Args:
+        after: (requested_at, id) decoded from the previous page's cursor
+        offset: Rows to skip when paging by number instead of cursor
+        status: One of REQUEST_STATUSES, or None for all
+
+    Returns: (requests formatted for the my-requests endpoints, next cursor or None)
+    """
+    query = select(
+        request_model.id,
+        request_model.amount,
+        request_model.amount_remaining,
+        request_model.is_fully_matched,
+        request_model.is_completed,
+        request_model.requested_at,
+        request_model.matched_at,
+        request_model.currency,
+    ).join(
+        # Only for the owner filter - the request carries its own currency
+        Wallet, request_model.wallet_id == Wallet.id
+    ).where(Wallet.user_id == user_id)
+
+    if status:
+        query = query.where(status_condition(request_model, status))
+    if after:
+        query = query.where(keyset_condition((request_model.requested_at, request_model.id), after))
+    elif offset:
+        query = query.offset(offset)
+
+    # One extra row tells whether there is a next page
+    rows = db.execute(
+        query.order_by(desc(request_model.requested_at), desc(request_model.id)).limit(per_page + 1)
+    ).all()
+    next_cursor = encode_cursor(rows[per_page - 1].requested_at, rows[per_page - 1].id) if len(rows) > per_page else None
+    rows = rows[:per_page]
+
+    # Pairs of this page's requests only, in one IN query (per_page is capped well under SQL Server's 2100 parameters)
+    matched_users: Dict[uuid.UUID, List[Dict[str, Any]]] = {row.id: [] for row in rows}
+    if rows:
+        request_id, username, phone = _counterparty_columns(request_model)
+        pairs = db.execute(
+            select(
+                request_id.label("request_id"),
+                username.label("username"),
+                phone.label("phone"),
+                FundingMatchPair.id,
+                FundingMatchPair.amount,
+                FundingMatchPair.proof_uploaded,
+                FundingMatchPair.proof_confirmed,
+            ).where(request_id.in_(list(matched_users))).order_by(FundingMatchPair.created_at)
+        ).all()
+        for pair in pairs:
+            matched_users[pair.request_id].append({
+                "username": pair.username,
+                "phone": pair.phone,
+                "amount": str(pair.amount),
+                "proof_uploaded": pair.proof_uploaded,
+                "proof_confirmed": pair.proof_confirmed,
+                "pair_id": str(pair.id)
+            })
+
+    data = [
+        {
+            "id": str(row.id),
+            "amount": str(row.amount),
+            "amount_remaining": str(row.amount_remaining),
+            "currency": row.currency,
+            "is_fully_matched": row.is_fully_matched,
+            "is_completed": row.is_completed,
+            "matched_users": matched_users[row.id],
+            "requested_at": row.requested_at.isoformat(),
+            "matched_at": row.matched_at.isoformat() if row.matched_at else None
+        }
+        for row in rows
+    ]
+    return data, next_cursor
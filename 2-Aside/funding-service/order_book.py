@@ -0,0 +1,356 @@
+"""
+In-memory per-currency order book of pending funding and withdrawal requests.
+
+Kept up to date by the API as requests are created, cancelled and re-queued
+with priority, so the auto matcher reads a ready-sorted book at merge time
+instead of re-querying the whole backlog. The book is rebuilt from the
+database on startup and reconciled against it before every merge.
+
+Every write to a currency's pending requests bumps that currency's row in
+order_book_versions in the same transaction (bump_version), and the lifecycle
+events below carry the version the write produced. A book that has seen every
+write since it was loaded holds the database's current version, so
+reconciling it is a single-row read; any write it missed - from another
+worker process or a Celery task, or an event that never arrived - leaves it
+behind, and that currency is rebuilt from the database.
+
+Opting in does not change what or how requests are matched, so it does not
+touch the book.
+"""
+
+from bisect import bisect_left, insort
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import uuid
+
+from sqlalchemy import func, case, update
+from sqlalchemy.orm import Session
+
+from shared import FundingRequest, WithdrawalRequest, OrderBookVersion
+from matching_kernel import to_minor_units
+
+logger = logging.getLogger(__name__)
+
+# Entries sort by amount first, then by precedence among equal amounts:
+# priority withdrawals (by priority_timestamp) before regular requests (by requested_at).
+# The matching kernel's stable sort by amount then keeps that precedence.
+BookEntry = namedtuple("BookEntry", ["amount", "rank", "order_time", "request_id", "requested_at"])
+
+PRIORITY_RANK = 0
+REGULAR_RANK = 1
+
+# (count, total amount in minor units, priority count)
+Fingerprint = Tuple[int, int, int]
+
+
+def _currency_key(currency: Any) -> str:
+    """Accept CurrencyEnum members or plain strings"""
+    return getattr(currency, "value", currency)
+
+
+def make_entry(
+    request_id: uuid.UUID,
+    amount_remaining: Decimal,
+    requested_at: Optional[datetime],
+    is_priority: bool = False,
+    priority_timestamp: Optional[datetime] = None
+) -> BookEntry:
+    requested_at = requested_at or datetime.min
+    if is_priority:
+        return BookEntry(to_minor_units(amount_remaining), PRIORITY_RANK, priority_timestamp or requested_at, request_id, requested_at)
+    return BookEntry(to_minor_units(amount_remaining), REGULAR_RANK, requested_at, request_id, requested_at)
+
+
+class BookSide:
+    """Pending requests of one side of one currency, kept sorted"""
+
+    def __init__(self, entries: Iterable[BookEntry] = ()):
+        self._by_id: Dict[uuid.UUID, BookEntry] = {}
+        self._sorted: List[BookEntry] = []
+        self.total = 0
+        self.priority_count = 0
+        self.replace(entries)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, request_id):
+        return request_id in self._by_id
+
+    def replace(self, entries: Iterable[BookEntry]):
+        self._by_id = {entry.request_id: entry for entry in entries}
+        self._sorted = sorted(self._by_id.values())
+        self.total = sum(entry.amount for entry in self._sorted)
+        self.priority_count = sum(1 for entry in self._sorted if entry.rank == PRIORITY_RANK)
+
+    def upsert(self, entry: BookEntry):
+        self.remove(entry.request_id)
+        if entry.amount <= 0:
+            return
+        insort(self._sorted, entry)
+        self._by_id[entry.request_id] = entry
+        self.total += entry.amount
+        self.priority_count += entry.rank == PRIORITY_RANK
+
+    def remove(self, request_id: uuid.UUID) -> Optional[BookEntry]:
+        entry = self._by_id.pop(request_id, None)
+        if entry is not None:
+            del self._sorted[bisect_left(self._sorted, entry)]
+            self.total -= entry.amount
+            self.priority_count -= entry.rank == PRIORITY_RANK
+        return entry
+
+    def consume(self, request_id: uuid.UUID, amount: int):
+        """Reduce a request's remaining amount after a match, dropping it when fully matched"""
+        entry = self._by_id.get(request_id)
+        if entry is not None:
+            self.upsert(entry._replace(amount=entry.amount - amount))
+
+    def entries(self, cutoff_time: Optional[datetime] = None) -> List[BookEntry]:
+        if cutoff_time is None:
+            return list(self._sorted)
+        return [entry for entry in self._sorted if entry.requested_at < cutoff_time]
+
+
+class CurrencyBook:
+    """Funding and withdrawal sides of one currency"""
+
+    def __init__(self):
+        self.lock = RLock()
+        self.funding = BookSide()
+        self.withdrawals = BookSide()
+        self.loaded_at: Optional[datetime] = None
+        self.version: Optional[int] = None  # order_book_versions.version the book reflects
+
+    def advance(self, version: Optional[int]):
+        """Take on the version of a write just applied to the book, if it is the only write since the book's version"""
+        if version is not None and self.version is not None and version == self.version + 1:
+            self.version = version
+
+
+# ========================================
+# DATABASE LOADING
+# ========================================
+
+def bump_version(db: Session, currency) -> int:
+    """
+    Record a write to a currency's pending requests (caller commits, with the write).
+
+    Returns: The version the write produces - pass it to the book's lifecycle event
+    """
+    currency = _currency_key(currency)
+    bumped = db.execute(
+        update(OrderBookVersion)
+        .where(OrderBookVersion.currency == currency)
+        .values(version=OrderBookVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not bumped:
+        # Schema made by create_all rather than the migration, which seeds a row per currency
+        db.add(OrderBookVersion(currency=currency, version=1))
+        db.flush()
+        return 1
+    return db.query(OrderBookVersion.version).filter(OrderBookVersion.currency == currency).scalar()
+
+
+def load_version(db: Session, currency) -> int:
+    version = db.query(OrderBookVersion.version).filter(
+        OrderBookVersion.currency == _currency_key(currency)
+    ).scalar()
+    return version or 0
+
+
+def _pending_filter(model, currency: str, cutoff_time: Optional[datetime] = None):
+    conditions = (
+        model.currency == currency,
+        model.is_fully_matched == False,
+        model.is_completed == False
+    )
+    if cutoff_time is not None:
+        conditions += (model.requested_at < cutoff_time,)
+    return conditions
+
+
+def load_book_entries(
+    db: Session,
+    currency: str,
+    cutoff_time: Optional[datetime] = None
+) -> Tuple[List[BookEntry], List[BookEntry]]:
+    """Load every pending request of one currency (made before cutoff_time, if given) as book entries"""
+    funding = [
+        make_entry(row.id, row.amount_remaining, row.requested_at)
+        for row in db.query(
+            FundingRequest.id, FundingRequest.amount_remaining, FundingRequest.requested_at
+        ).filter(*_pending_filter(FundingRequest, currency, cutoff_time))
+    ]
+    withdrawals = [
+        make_entry(row.id, row.amount_remaining, row.requested_at, row.is_priority, row.priority_timestamp)
+        for row in db.query(
+            WithdrawalRequest.id,
+            WithdrawalRequest.amount_remaining,
+            WithdrawalRequest.requested_at,
+            WithdrawalRequest.is_priority,
+            WithdrawalRequest.priority_timestamp
+        ).filter(*_pending_filter(WithdrawalRequest, currency, cutoff_time))
+    ]
+    return funding, withdrawals
+
+
+def load_fingerprints(
+    db: Session,
+    currency: str,
+    cutoff_time: Optional[datetime] = None
+) -> Tuple[Fingerprint, Fingerprint]:
+    """Count, total and priority count of pending requests per side - two aggregate queries"""
+    funding = db.query(
+        func.count(FundingRequest.id),
+        func.sum(FundingRequest.amount_remaining)
+    ).filter(*_pending_filter(FundingRequest, currency, cutoff_time)).one()
+    withdrawals = db.query(
+        func.count(WithdrawalRequest.id),
+        func.sum(WithdrawalRequest.amount_remaining),
+        func.sum(case((WithdrawalRequest.is_priority == True, 1), else_=0))
+    ).filter(*_pending_filter(WithdrawalRequest, currency, cutoff_time)).one()
+
+    return (
+        (funding[0], to_minor_units(funding[1] or 0), 0),
+        (withdrawals[0], to_minor_units(withdrawals[1] or 0), int(withdrawals[2] or 0))
+    )
+
+
+# ========================================
+# ORDER BOOK
+# ========================================
+
+class OrderBook:
+    """Per-currency order books, safe to use from API handlers and matcher threads"""
+
+    def __init__(self):
+        self._books: Dict[str, CurrencyBook] = {}
+        self._books_lock = RLock()
+
+    def _book(self, currency) -> CurrencyBook:
+        currency = _currency_key(currency)
+        with self._books_lock:
+            if currency not in self._books:
+                self._books[currency] = CurrencyBook()
+            return self._books[currency]
+
+    def is_loaded(self, currency) -> bool:
+        return self._book(currency).loaded_at is not None
+
+    def rebuild(self, db: Session, currency):
+        """Replace one currency's book with the pending requests in the database"""
+        book = self._book(currency)
+        with book.lock:
+            # Version first: a write committed in between makes the next reconcile rebuild again, never miss it
+            version = load_version(db, currency)
+            funding, withdrawals = load_book_entries(db, _currency_key(currency))
+            book.funding.replace(funding)
+            book.withdrawals.replace(withdrawals)
+            book.loaded_at = datetime.utcnow()
+            book.version = version
+        logger.info(f"Order book {_currency_key(currency)} rebuilt: {len(funding)} funding, {len(withdrawals)} withdrawal")
+
+    def rebuild_all(self, session_factory, currencies: Iterable):
+        """Rebuild every currency in a fresh session (used on startup)"""
+        db = session_factory()
+        try:
+            for currency in currencies:
+                self.rebuild(db, currency)
+        finally:
+            db.close()
+
+    def reconcile(self, db: Session, currency) -> bool:
+        """
+        Rebuild the book if the database has writes it has not seen.
+
+        Only the currency's version is read while the book is in sync.
+
+        Returns: True if the book was already in sync
+        """
+        book = self._book(currency)
+        with book.lock:
+            if book.version is not None and book.version == load_version(db, currency):
+                return True
+            logger.warning(f"Order book {_currency_key(currency)} out of sync with database - rebuilding")
+            self.rebuild(db, currency)
+        return False
+
+    def snapshot(
+        self,
+        currency,
+        cutoff_time: Optional[datetime] = None
+    ) -> Tuple[List[Tuple[uuid.UUID, int]], List[Tuple[uuid.UUID, int]], int]:
+        """
+        Pending amounts in the shape returned by load_pending_amounts.
+
+        Returns: (funders, withdrawers, priority_withdrawal_count) - priority withdrawers first
+        """
+        book = self._book(currency)
+        with book.lock:
+            funding = book.funding.entries(cutoff_time)
+            # Stable: each rank keeps the book's order, which the kernel's sort by amount preserves
+            withdrawals = sorted(book.withdrawals.entries(cutoff_time), key=lambda entry: entry.rank)
+
+        funders = [(entry.request_id, entry.amount) for entry in funding]
+        withdrawers = [(entry.request_id, entry.amount) for entry in withdrawals]
+        priority_count = sum(1 for entry in withdrawals if entry.rank == PRIORITY_RANK)
+        return funders, withdrawers, priority_count
+
+    # Request lifecycle events - call after the change is committed, with the
+    # version bump_version gave it (without one the book falls behind and the
+    # next reconcile rebuilds it)
+
+    def apply_matches(
+        self,
+        currency,
+        matches: List[Tuple[uuid.UUID, uuid.UUID, Decimal]],
+        version: Optional[int] = None
+    ):
+        """Consume committed matches from the book"""
+        book = self._book(currency)
+        with book.lock:
+            for funding_id, withdrawal_id, amount in matches:
+                units = to_minor_units(amount)
+                book.funding.consume(funding_id, units)
+                book.withdrawals.consume(withdrawal_id, units)
+            book.advance(version)
+
+    def upsert_funding(self, currency, request: FundingRequest, version: Optional[int] = None):
+        book = self._book(currency)
+        with book.lock:
+            book.funding.upsert(make_entry(request.id, request.amount_remaining, request.requested_at))
+            book.advance(version)
+
+    def upsert_withdrawal(self, currency, request: WithdrawalRequest, version: Optional[int] = None):
+        book = self._book(currency)
+        with book.lock:
+            book.withdrawals.upsert(make_entry(
+                request.id,
+                request.amount_remaining,
+                request.requested_at,
+                request.is_priority,
+                request.priority_timestamp
+            ))
+            book.advance(version)
+
+    def remove_funding(self, currency, request_id: uuid.UUID, version: Optional[int] = None):
+        book = self._book(currency)
+        with book.lock:
+            book.funding.remove(request_id)
+            book.advance(version)
+
+    def remove_withdrawal(self, currency, request_id: uuid.UUID, version: Optional[int] = None):
+        book = self._book(currency)
+        with book.lock:
+            book.withdrawals.remove(request_id)
+            book.advance(version)
+
+
+# Singleton instance
+order_book = OrderBook()
@@ -0,0 +1,178 @@
+"""
+Database lease electing the one instance that runs a scheduler's jobs.
+
+Every gunicorn worker and Function host starts the APScheduler schedulers on
+startup, so without coordination each merge time would start one matching
+run per process. All instances keep their schedulers running; a heartbeat job
+takes or renews a row in scheduler_leases, and scheduled jobs only run on
+the instance holding it. The others stay hot standbys - when the leader stops
+renewing (crash, scale-in, deploy) the first standby to see the lease expire
+takes it over, at the latest one TTL later.
+
+Taking the lease is a single conditional UPDATE (ours, or expired) that the
+database serializes, falling back to an INSERT on first use, so two instances
+can never both believe they hold it. Expiry uses the instances' own clocks,
+so the TTL must stay well above any clock skew between them.
+"""
+
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Callable, Optional
+import logging
+import os
+import socket
+import uuid
+
+from sqlalchemy import update, or_, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from shared import SessionLocal, SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+LEASE_TTL_SECONDS = int(os.getenv("SCHEDULER_LEASE_TTL_SECONDS", "60"))
+
+# Identifies this process as lease holder
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def try_acquire_lease(
+    db: Session,
+    name: str,
+    holder: str,
+    ttl_seconds: int,
+    now: Optional[datetime] = None
+) -> bool:
+    """
+    Take or renew a lease (commits).
+
+    Returns: True if holder now holds the lease until now + ttl_seconds
+    """
+    now = now or datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    renewed = db.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at <= now)
+        )
+        .values(
+            holder=holder,
+            expires_at=expires_at,
+            # Keep the takeover time while renewing our own lease
+            acquired_at=case((SchedulerLease.holder == holder, SchedulerLease.acquired_at), else_=now)
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if renewed:
+        db.commit()
+        return True
+
+    db.rollback()
+    exists = db.query(SchedulerLease.name).filter(SchedulerLease.name == name).first()
+    if exists:
+        return False
+
+    # First use of this lease
+    try:
+        db.add(SchedulerLease(name=name, holder=holder, acquired_at=now, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()  # Another instance created it first
+        return False
+
+
+def release_lease(db: Session, name: str, holder: str):
+    """Give up a lease we hold so a standby can take over without waiting for expiry (commits)"""
+    db.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+        .values(expires_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+class LeaderLease:
+    """One named lease as seen from this process"""
+
+    def __init__(
+        self,
+        name: str,
+        session_factory=None,
+        ttl_seconds: Optional[int] = None,
+        holder: Optional[str] = None
+    ):
+        self.name = name
+        self.session_factory = session_factory or SessionLocal
+        self.ttl_seconds = ttl_seconds or LEASE_TTL_SECONDS
+        self.holder = holder or INSTANCE_ID
+        self.is_leader = False
+
+    @property
+    def renew_seconds(self) -> int:
+        """Heartbeat interval - renews well before the lease runs out"""
+        return max(1, self.ttl_seconds // 3)
+
+    def heartbeat(self) -> bool:
+        """
+        Take or renew the lease.
+
+        Returns: True if this process is the leader
+        """
+        db = self.session_factory()
+        try:
+            leader = try_acquire_lease(db, self.name, self.holder, self.ttl_seconds)
+        except Exception as e:
+            # Can't prove we still hold it - stand down until the database is back
+            logger.error(f"Lease {self.name}: heartbeat failed: {e}")
+            leader = False
+        finally:
+            db.close()
+
+        if leader != self.is_leader:
+            logger.info(f"Lease {self.name}: {self.holder} is {'now the leader' if leader else 'now a standby'}")
+        self.is_leader = leader
+        return leader
+
+    def release(self):
+        if not self.is_leader:
+            return
+        db = self.session_factory()
+        try:
+            release_lease(db, self.name, self.holder)
+        except Exception as e:
+            logger.warning(f"Lease {self.name}: release failed: {e}")
+        finally:
+            db.close()
+        self.is_leader = False
+
+    def run_if_leader(self, func: Callable) -> Callable:
+        """
+        Wrap a scheduled job so it only runs on the leader.
+
+        The lease is re-checked when the job fires, so a standby whose
+        leader has just expired takes over without waiting for its heartbeat.
+        """
+        @wraps(func)
+        def job(*args, **kwargs):
+            if not self.heartbeat():
+                logger.info(f"Lease {self.name}: standby, skipping {func.__name__}")
+                return None
+            return func(*args, **kwargs)
+        return job
+
+    def attach(self, scheduler):
+        """Add the heartbeat job to a scheduler, running once immediately"""
+        scheduler.add_job(
+            self.heartbeat,
+            'interval',
+            seconds=self.renew_seconds,
+            id=f"{self.name}_lease",
+            name=f"Lease heartbeat ({self.name})",
+            next_run_time=datetime.now(scheduler.timezone),
+            replace_existing=True
+        )
@@ -0,0 +1,52 @@
+"""
+Funding Service - Test Fixtures
+Every test runs on a fresh in-memory database (shared/tests/support.py);
+funding_client signs a TestClient for the service in as a user
+"""
+
+import pytest
+import sys
+import os
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(SERVICE_DIR))
+sys.path.insert(0, SERVICE_DIR)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from shared.database import Base
+from shared.tests.support import engine, TestingSessionLocal
+
+
+@pytest.fixture(autouse=True)
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def funding_client(tmp_path, monkeypatch):
+    """funding_client(user_id): TestClient for the funding service on the test database, signed in as user_id"""
+    from fastapi.testclient import TestClient
+    from shared.database import get_db, get_read_db
+    from shared.auth import get_current_user_id
+
+    # main mounts ./uploads at import time
+    (tmp_path / "uploads").mkdir(exist_ok=True)
+    monkeypatch.chdir(tmp_path)
+    import main
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def client_for(user_id):
+        overrides = {get_db: override_get_db, get_read_db: override_get_db, get_current_user_id: lambda: str(user_id)}
+        for dependency, override in overrides.items():
+            monkeypatch.setitem(main.app.dependency_overrides, dependency, override)
+        return TestClient(main.app)
+
+    return client_for
@@ -0,0 +1,113 @@
+"""
+Funding Service - Test Factories
+Rows, populations and the reference matcher shared by the funding service's tests
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from shared.models import User, Wallet, FundingRequest, WithdrawalRequest, FundingMatchPair
+from shared.tests.support import create_pending_request, create_cycle
+from match_persistence import counterparty_snapshot
+
+
+def assert_counterparty_snapshot(db, pair):
+    """The pair's snapshot names both requests' owners and the withdrawer's wallet"""
+    funder_wallet = db.get(Wallet, db.get(FundingRequest, pair.funding_request_id).wallet_id)
+    withdrawer_wallet = db.get(Wallet, db.get(WithdrawalRequest, pair.withdrawal_request_id).wallet_id)
+    funder, withdrawer = db.get(User, funder_wallet.user_id), db.get(User, withdrawer_wallet.user_id)
+    assert (pair.funder_user_id, pair.funder_username, pair.funder_phone) == (funder.id, funder.username, funder.phone)
+    assert (pair.withdrawer_user_id, pair.withdrawer_username, pair.withdrawer_phone) == (
+        withdrawer.id, withdrawer.username, withdrawer.phone
+    )
+    assert (pair.currency, pair.payee_wallet_address) == (withdrawer_wallet.currency, withdrawer_wallet.wallet_address)
+
+
+def reference_smart_match(funders, withdrawers):
+    """The original Decimal two-pointer loop from smart_match_requests, kept as an oracle"""
+    matches = []
+    funders = [list(f) for f in sorted(funders, key=lambda x: x[1])]
+    withdrawers = [list(w) for w in sorted(withdrawers, key=lambda x: x[1])]
+    i, j = 0, 0
+    while i < len(funders) and j < len(withdrawers):
+        match_amount = min(funders[i][1], withdrawers[j][1])
+        matches.append((funders[i][0], withdrawers[j][0], match_amount))
+        funders[i][1] -= match_amount
+        withdrawers[j][1] -= match_amount
+        if funders[i][1] == 0:
+            i += 1
+        if withdrawers[j][1] == 0:
+            j += 1
+    return matches
+
+
+def random_population(rng, count):
+    """(id, Decimal amount) pairs with a mix of round and odd amounts"""
+    return [
+        (uuid.uuid4(), Decimal(rng.choice([1000 * rng.randint(1, 20), rng.randint(100000, 5000000) / 100])).quantize(Decimal("0.01")))
+        for _ in range(count)
+    ]
+
+
+def seed_both_currencies(db):
+    """NAIRA: 5000 vs 3000 + 2000, USDT: 100 vs 40"""
+    create_pending_request(db, FundingRequest, "5000", "NAIRA")
+    create_pending_request(db, WithdrawalRequest, "3000", "NAIRA")
+    create_pending_request(db, WithdrawalRequest, "2000", "NAIRA")
+    create_pending_request(db, FundingRequest, "100", "USDT")
+    create_pending_request(db, WithdrawalRequest, "40", "USDT")
+    db.commit()
+
+
+def seed_priority_mix(db):
+    """Equal-amount withdrawals where a later priority request must beat earlier regular ones"""
+    now = datetime.utcnow()
+    create_pending_request(db, FundingRequest, "1000", requested_at=now - timedelta(hours=3))
+    create_pending_request(db, FundingRequest, "4000", requested_at=now - timedelta(hours=2))
+    create_pending_request(db, WithdrawalRequest, "1000", requested_at=now - timedelta(hours=5))
+    create_pending_request(db, WithdrawalRequest, "2000", requested_at=now - timedelta(hours=4))
+    create_pending_request(
+        db, WithdrawalRequest, "1000",
+        requested_at=now - timedelta(hours=1),
+        is_priority=True,
+        priority_timestamp=now - timedelta(days=1)
+    )
+    create_pending_request(db, FundingRequest, "500", "USDT")
+    db.commit()
+
+
+def create_pair(db, funding, withdrawal, cycle, **kwargs):
+    pair = FundingMatchPair(
+        id=uuid.uuid4(),
+        funding_request_id=funding.id,
+        withdrawal_request_id=withdrawal.id,
+        merge_cycle_id=cycle.id,
+        amount=funding.amount,
+        **counterparty_snapshot(funding, withdrawal),
+        **kwargs
+    )
+    db.add(pair)
+    db.flush()
+    return pair
+
+
+def wallet_of(db, request):
+    return db.get(Wallet, request.wallet_id)
+
+
+def seed_matched_requests(db, wallet, count, pairs_per_request=3):
+    """count funding and withdrawal requests on wallet, each matched with its own counterparties"""
+    cycle = create_cycle(db)
+    for _ in range(count):
+        for model, other in ((FundingRequest, WithdrawalRequest), (WithdrawalRequest, FundingRequest)):
+            request = model(
+                id=uuid.uuid4(), wallet_id=wallet.id, currency="NAIRA",
+                amount=Decimal("3000"), amount_remaining=Decimal("0"), requested_at=datetime.utcnow()
+            )
+            db.add(request)
+            for _ in range(pairs_per_request):
+                counterparty = create_pending_request(db, other, "1000")
+                funding, withdrawal = (request, counterparty) if model is FundingRequest else (counterparty, request)
+                create_pair(db, funding, withdrawal, cycle)
+    db.commit()
@@ -0,0 +1,102 @@
+"""
+Funding Service - Active Matches Tests
+Tests for a user's active matches, as funder and as withdrawer
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from shared.models import FundingRequest, WithdrawalRequest, FundingMatchPair
+from shared.query_stats import query_budget
+from shared.tests.support import TestingSessionLocal, create_test_wallet, create_pending_request, create_cycle
+from tests.factories import create_pair, wallet_of, seed_matched_requests
+
+
+def test_async_endpoints_fall_back_to_sync_sessions_without_async_driver(funding_client, monkeypatch):
+    import shared.database as database
+
+    # No ODBC driver by that name on this host (and no aioodbc, if it is not installed)
+    assert database.async_driver_available("mssql+aioodbc://u:p@host/db?driver=No+Such+ODBC+Driver") is False
+
+    monkeypatch.setattr(database, "_async_engine", None)
+    monkeypatch.setattr(database, "_async_unavailable", False)
+    monkeypatch.setattr(database, "async_driver_available", lambda url: False)
+    monkeypatch.setattr(database, "ReadSessionLocal", TestingSessionLocal)
+    db = TestingSessionLocal()
+    wallet = create_test_wallet(db)
+    seed_matched_requests(db, wallet, 2)
+    client = funding_client(wallet.user_id)
+
+    response = client.get("/my-active-matches")
+
+    assert response.status_code == 200
+    assert response.json()["data"]["total_active"] == 12
+    assert database.get_async_engine() is None
+    db.close()
+
+
+def test_active_matches_are_one_join_free_query_per_role():
+    from active_matches import funder_pairs_query, withdrawer_pairs_query, format_funder_pairs, format_withdrawer_pairs
+    from shared.models import BankDetails
+
+    db = TestingSessionLocal()
+    cycle = create_cycle(db)
+    mine = create_test_wallet(db)
+    now = datetime.utcnow()
+
+    def active_matches(user_id):
+        with query_budget(2) as stats:
+            funder = format_funder_pairs(db.execute(funder_pairs_query(user_id)).all(), now)
+            withdrawer = format_withdrawer_pairs(db.execute(withdrawer_pairs_query(user_id)).all(), now)
+        assert stats.count == 2
+        assert not any("JOIN" in statement for statement in stats.statements)
+        return funder, withdrawer
+
+    # The first withdrawer to pay has a bank account on file when matched
+    payee = create_pending_request(db, WithdrawalRequest, "1000")
+    bank = BankDetails(id=uuid.uuid4(), account_number="0123456789", account_name="Payee", bank_name="Test Bank")
+    db.add(bank)
+    wallet_of(db, payee).bank_details_id = bank.id
+    db.flush()
+
+    for pairs in (1, 10):
+        funding = FundingRequest(
+            id=uuid.uuid4(), wallet_id=mine.id, currency="NAIRA",
+            amount=Decimal("1000") * pairs, amount_remaining=Decimal("0"), requested_at=now
+        )
+        withdrawal = WithdrawalRequest(
+            id=uuid.uuid4(), wallet_id=mine.id, currency="NAIRA",
+            amount=Decimal("1000") * pairs, amount_remaining=Decimal("0"), requested_at=now
+        )
+        db.add_all([funding, withdrawal])
+        db.flush()
+        for _ in range(pairs):
+            create_pair(db, funding, payee or create_pending_request(db, WithdrawalRequest, "1000"), cycle,
+                        proof_deadline=now + timedelta(hours=4))
+            create_pair(db, create_pending_request(db, FundingRequest, "1000"), withdrawal, cycle,
+                        proof_uploaded=True, confirmation_deadline=now + timedelta(hours=2))
+            payee = None
+    db.commit()
+
+    funder, withdrawer = active_matches(mine.user_id)
+    assert (len(funder), len(withdrawer)) == (11, 11)
+    assert {entry["role"] for entry in funder} == {"funder"}
+    assert all(entry["matched_user"]["username"].startswith("testuser") for entry in funder + withdrawer)
+    assert all(entry["awaiting_confirmation"] for entry in withdrawer)
+    bank_details = {
+        "type": "bank", "account_number": "0123456789", "account_name": "Payee", "bank_name": "Test Bank"
+    }
+    assert [entry["matched_user"]["payment_details"] for entry in funder].count(bank_details) == 1
+
+    # Later bank detail edits don't redirect matched payments; confirmed pairs drop out
+    bank.account_number = "9999999999"
+    db.get(FundingMatchPair, uuid.UUID(withdrawer[0]["pair_id"])).proof_confirmed = True
+    db.commit()
+
+    funder, withdrawer = active_matches(mine.user_id)
+    assert len(withdrawer) == 10
+    details = [entry["matched_user"]["payment_details"] for entry in funder]
+    assert details.count(bank_details) == 1
+    assert details.count({}) == 10
+    db.close()
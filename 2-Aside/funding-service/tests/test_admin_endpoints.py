@@ -0,0 +1,64 @@
+"""
+Funding Service - Admin Endpoint Tests
+Query budgets of the admin endpoints, and the order book kept by admin matches
+"""
+
+from datetime import datetime, timedelta
+import uuid
+
+from shared.models import User, FundingRequest, WithdrawalRequest, MergeCycle
+from shared.query_stats import query_budget
+from shared.tests.support import TestingSessionLocal, create_test_wallet, create_pending_request
+from order_book import OrderBook
+
+
+def test_blocked_users_load_owners_with_their_wallets(funding_client):
+    db = TestingSessionLocal()
+    admin = create_test_wallet(db)
+    db.get(User, admin.user_id).is_admin = True
+    blocked = [create_test_wallet(db) for _ in range(8)]
+    for wallet in blocked:
+        wallet.is_blocked = True
+    admin_id = admin.user_id
+    db.commit()
+    db.close()
+
+    client = funding_client(admin_id)
+    # Admin check + blocked wallets joined with their owners
+    with query_budget(2):
+        response = client.get("/admin/blocked-users")
+    assert response.status_code == 200
+    assert response.json()["data"]["total_count"] == 8
+
+
+def test_manual_match_keeps_the_order_book_in_sync(funding_client, monkeypatch):
+    import main
+
+    db = TestingSessionLocal()
+    admin = create_test_wallet(db)
+    db.get(User, admin.user_id).is_admin = True
+    funding = create_pending_request(db, FundingRequest, "3000")
+    withdrawal = create_pending_request(db, WithdrawalRequest, "1000")
+    now = datetime.utcnow()
+    db.add(MergeCycle(
+        id=uuid.uuid4(),
+        scheduled_time=now + timedelta(minutes=30),
+        cutoff_time=now + timedelta(minutes=20),
+        status="pending"
+    ))
+    db.commit()
+    client = funding_client(admin.user_id)
+    book = OrderBook()
+    book.rebuild(db, "NAIRA")
+    monkeypatch.setattr(main, "order_book", book)
+
+    response = client.post("/admin/manual-match", params={
+        "funding_request_id": str(funding.id),
+        "withdrawal_request_id": str(withdrawal.id),
+        "amount": "1000",
+    })
+
+    assert response.status_code == 200
+    assert book.snapshot("NAIRA")[:2] == ([(funding.id, 200000)], [])
+    assert book.reconcile(db, "NAIRA") is True
+    db.close()
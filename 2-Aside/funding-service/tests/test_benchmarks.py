@@ -0,0 +1,21 @@
+"""
+Funding Service - Benchmark Suite Tests
+Runs the matching benchmark suite at a small size
+"""
+
+import sys
+import os
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+
+def test_benchmark_suite_runs_at_small_size():
+    sys.path.insert(0, BENCHMARKS_DIR)
+    import bench_matching_suite
+
+    results = bench_matching_suite.run_suite([200], "sqlite://", trace_memory=False)
+
+    assert [r.scenario for r in results] == list(bench_matching_suite.SCENARIOS)
+    assert all(r.matches > 0 for r in results)
+    # Drivers must issue a bounded number of statements regardless of population size
+    assert all(r.statements < 50 for r in results)
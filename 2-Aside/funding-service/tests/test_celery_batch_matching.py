@@ -0,0 +1,211 @@
+"""
+Funding Service - Merge Cycle Tests
+Tests for run_merge_cycle and the per-currency merges it runs
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from shared.database import Base
+from shared.models import FundingRequest, WithdrawalRequest, FundingMatchPair, MergeCycle
+from shared.tests.support import TestingSessionLocal, create_cycle
+import celery_batch_matching
+from merge_plan import load_plans, batch_fits
+from tests.factories import seed_both_currencies
+
+
+def test_run_merge_cycle_aggregates_currency_stats(monkeypatch):
+    monkeypatch.setattr(celery_batch_matching, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(celery_batch_matching, "MERGE_PARALLELISM", 1)
+    db = TestingSessionLocal()
+    seed_both_currencies(db)
+    cycle_id = create_cycle(db, status="pending").id
+    db.commit()
+
+    celery_batch_matching.run_merge_cycle(str(cycle_id))
+    db.expire_all()
+
+    cycle = db.get(MergeCycle, cycle_id)
+    assert cycle.status == "completed"
+    assert cycle.total_funding_requests == 2
+    assert cycle.total_withdrawal_requests == 3
+    assert cycle.matched_pairs == 3
+    assert cycle.unmatched_funding == 1  # USDT funder has 60 left
+    assert cycle.unmatched_withdrawal == 0
+    db.close()
+
+
+def test_match_all_currencies_runs_currencies_in_separate_sessions(tmp_path):
+    # A file database so each thread gets its own connection
+    file_engine = create_engine(f"sqlite:///{tmp_path / 'merge.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=file_engine)
+    FileSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=file_engine)
+    db = FileSessionLocal()
+    seed_both_currencies(db)
+    cycle_id = create_cycle(db).id
+    db.commit()
+
+    stats, errors = celery_batch_matching.match_all_currencies(cycle_id, session_factory=FileSessionLocal, parallelism=2)
+
+    assert errors == {}
+    assert stats["NAIRA"]["matched_pairs"] == 2
+    assert stats["USDT"] == {
+        "total_funding_requests": 1,
+        "total_withdrawal_requests": 1,
+        "matched_pairs": 1,
+        "unmatched_funding": 1,
+        "unmatched_withdrawal": 0,
+    }
+    assert db.query(FundingMatchPair).count() == 3
+    db.close()
+    file_engine.dispose()
+
+
+def test_failed_currency_does_not_roll_back_other_currencies(monkeypatch):
+    monkeypatch.setattr(celery_batch_matching, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(celery_batch_matching, "MERGE_PARALLELISM", 1)
+    load_pending_amounts = celery_batch_matching.load_pending_amounts
+
+    def fail_for_usdt(db, currency, cutoff_time=None):
+        if currency == "USDT":
+            raise RuntimeError("USDT book unavailable")
+        return load_pending_amounts(db, currency, cutoff_time)
+
+    monkeypatch.setattr(celery_batch_matching, "load_pending_amounts", fail_for_usdt)
+    db = TestingSessionLocal()
+    seed_both_currencies(db)
+    cycle_id = create_cycle(db, status="pending").id
+    db.commit()
+
+    celery_batch_matching.run_merge_cycle(str(cycle_id))
+    db.expire_all()
+
+    cycle = db.get(MergeCycle, cycle_id)
+    assert cycle.status == "failed"
+    assert cycle.matched_pairs == 2
+    assert db.query(FundingMatchPair).count() == 2
+    db.close()
+
+
+def test_killed_cycle_resumes_from_last_committed_batch(monkeypatch):
+    monkeypatch.setattr(celery_batch_matching, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(celery_batch_matching, "MERGE_PARALLELISM", 1)
+    monkeypatch.setattr(celery_batch_matching, "MERGE_BATCH_SIZE", 1)
+    db = TestingSessionLocal()
+    seed_both_currencies(db)
+    cycle_id = create_cycle(db, status="pending").id
+    db.commit()
+
+    apply_batch = celery_batch_matching.apply_batch
+
+    def killed_on_second_batch(db, plan, batch, *args):
+        if batch == 1:
+            raise RuntimeError("worker killed")
+        return apply_batch(db, plan, batch, *args)
+
+    monkeypatch.setattr(celery_batch_matching, "apply_batch", killed_on_second_batch)
+    celery_batch_matching.run_merge_cycle(str(cycle_id))
+    db.expire_all()
+
+    cycle = db.get(MergeCycle, cycle_id)
+    assert cycle.status == "failed"
+    assert db.query(FundingMatchPair).count() == 2  # First NAIRA batch and USDT
+    assert load_plans(db, cycle_id)["NAIRA"].batches_applied == 1
+
+    # Retried once cooled down - from the checkpoints, without re-matching
+    monkeypatch.setattr(celery_batch_matching, "apply_batch", apply_batch)
+    monkeypatch.setattr(celery_batch_matching, "get_matcher", lambda engine=None: pytest.fail("re-matched"))
+    cycle.started_at -= timedelta(seconds=celery_batch_matching.MERGE_RETRY_AFTER_SECONDS + 1)
+    db.commit()
+    celery_batch_matching.run_merge_cycle(str(cycle_id))
+    db.expire_all()
+
+    cycle = db.get(MergeCycle, cycle_id)
+    assert (cycle.status, cycle.retries) == ("completed", 1)
+    assert (cycle.matched_pairs, cycle.unmatched_funding, cycle.unmatched_withdrawal) == (3, 1, 0)
+    assert db.query(FundingMatchPair).count() == 3
+    naira_funder = db.query(FundingRequest).filter(FundingRequest.amount == Decimal("5000")).one()
+    assert (naira_funder.amount_remaining, naira_funder.is_fully_matched) == (0, True)
+    db.close()
+
+
+def test_batch_of_a_cancelled_request_is_not_applied(monkeypatch):
+    monkeypatch.setattr(celery_batch_matching, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(celery_batch_matching, "MERGE_PARALLELISM", 1)
+    db = TestingSessionLocal()
+    seed_both_currencies(db)
+    cycle_id = create_cycle(db, status="pending").id
+    db.commit()
+    celery_batch_matching.plan_merge_cycle(str(cycle_id))
+
+    # Cancelled after cutoff: the endpoint deletes the request outright
+    cancelled = db.query(WithdrawalRequest).filter(WithdrawalRequest.amount == Decimal("3000")).one()
+    db.delete(cancelled)
+    db.commit()
+    plan = load_plans(db, cycle_id)["NAIRA"]
+    assert batch_fits(db, plan, 0) is False
+
+    celery_batch_matching.run_merge_cycle(str(cycle_id))
+    db.expire_all()
+
+    assert db.get(MergeCycle, cycle_id).status == "completed"
+    assert db.query(FundingMatchPair).filter(FundingMatchPair.withdrawal_request_id == cancelled.id).count() == 0
+    db.close()
+
+
+def test_cycle_out_of_time_queues_its_continuation(monkeypatch):
+    monkeypatch.setattr(celery_batch_matching, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(celery_batch_matching, "MERGE_PARALLELISM", 1)
+    monkeypatch.setattr(celery_batch_matching, "MERGE_TIME_BUDGET_SECONDS", 0)
+    queued = []
+    monkeypatch.setattr(celery_batch_matching.run_merge_cycle, "delay", lambda *args: queued.append(args))
+    db = TestingSessionLocal()
+    seed_both_currencies(db)
+    cycle_id = create_cycle(db, status="pending").id
+    db.commit()
+
+    celery_batch_matching.run_merge_cycle(str(cycle_id))
+    db.expire_all()
+
+    # Matches staged, nothing applied, continuation queued
+    assert db.get(MergeCycle, cycle_id).status == "pending"
+    assert queued == [(str(cycle_id), None)]
+    assert db.query(FundingMatchPair).count() == 0
+    assert {p.match_count for p in load_plans(db, cycle_id).values()} == {2, 1}
+
+    monkeypatch.setattr(celery_batch_matching, "MERGE_TIME_BUDGET_SECONDS", 180)
+    celery_batch_matching.run_merge_cycle(str(cycle_id))
+    db.expire_all()
+
+    cycle = db.get(MergeCycle, cycle_id)
+    assert (cycle.status, cycle.retries, cycle.matched_pairs) == ("completed", 0, 3)
+    assert db.query(FundingMatchPair).count() == 3
+    db.close()
+
+
+def test_merge_cycle_is_claimed_by_one_run():
+    db = TestingSessionLocal()
+    cycle = create_cycle(db, status="pending")
+    db.commit()
+    now = datetime.utcnow()
+    stalled = now + timedelta(seconds=celery_batch_matching.MERGE_RETRY_AFTER_SECONDS + 1)
+
+    assert celery_batch_matching.claim_merge_cycle(db, cycle.id, now)
+    assert not celery_batch_matching.claim_merge_cycle(db, cycle.id, now)
+
+    # A run that died while processing is taken over once stalled
+    assert celery_batch_matching.claim_merge_cycle(db, cycle.id, stalled)
+    db.expire_all()
+    assert (cycle.status, cycle.retries) == ("processing", 1)
+
+    cycle.retries = celery_batch_matching.MERGE_MAX_RETRIES
+    db.commit()
+    assert not celery_batch_matching.claim_merge_cycle(db, cycle.id, stalled + timedelta(hours=1))
+
+    cycle.status = "completed"
+    db.commit()
+    assert not celery_batch_matching.claim_merge_cycle(db, cycle.id, stalled + timedelta(hours=1))
+    db.close()
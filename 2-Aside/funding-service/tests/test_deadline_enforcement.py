@@ -0,0 +1,170 @@
+"""
+Funding Service - Deadline Enforcement Tests
+Tests for enforcing expired proof and confirmation deadlines
+"""
+
+from sqlalchemy import event
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from shared.models import FundingRequest, WithdrawalRequest
+from shared.tests.support import engine, TestingSessionLocal, create_pending_request, create_cycle
+from matching_kernel import to_minor_units
+import celery_batch_matching
+from merge_plan import HALF_MINOR_UNIT
+from deadline_enforcement import enforce_expired_deadlines
+from deadline_scheduler import load_open_deadlines
+from order_book import load_version
+from tests.factories import create_pair, wallet_of
+
+
+def test_expired_deadlines_are_enforced_in_bulk():
+    db = TestingSessionLocal()
+    cycle = create_cycle(db)
+    now = datetime.utcnow()
+    past, future = now - timedelta(minutes=1), now + timedelta(hours=1)
+
+    late_funder = create_pending_request(db, FundingRequest, "1000")
+    late_withdrawer = create_pending_request(db, WithdrawalRequest, "1000")
+    on_time_funder = create_pending_request(db, FundingRequest, "500")
+    blocked_funder = create_pending_request(db, FundingRequest, "700")
+    wallet_of(db, blocked_funder).is_blocked = True
+
+    # Two missed proofs by the same funder block one wallet
+    missed_proof = create_pair(db, late_funder, late_withdrawer, cycle, proof_deadline=past)
+    create_pair(db, late_funder, late_withdrawer, cycle, proof_deadline=past - timedelta(hours=1))
+    create_pair(db, blocked_funder, late_withdrawer, cycle, proof_deadline=past)
+    pending_proof = create_pair(db, on_time_funder, late_withdrawer, cycle, proof_deadline=future)
+    missed_confirmation = create_pair(
+        db, on_time_funder, late_withdrawer, cycle,
+        proof_deadline=past, proof_uploaded=True, confirmation_deadline=past
+    )
+    db.commit()
+
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        summary = enforce_expired_deadlines(db, now)
+        db.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert summary == {
+        "proof_deadlines_missed": 3,
+        "funders_blocked": 1,
+        "withdrawals_requeued": 1,
+        "confirmation_deadlines_missed": 1,
+        "withdrawers_blocked": 1,
+    }
+    updates = [s for s in statements if s.lstrip().upper().startswith("UPDATE")]
+    assert len([s for s in updates if "order_book_versions" not in s]) == 5
+    # The re-queued withdrawal's currency is marked changed for the order book
+    assert load_version(db, "NAIRA") == 1
+
+    db.expire_all()
+    assert wallet_of(db, late_funder).is_blocked
+    assert wallet_of(db, late_withdrawer).is_blocked
+    assert not wallet_of(db, on_time_funder).is_blocked
+    assert missed_proof.funder_missed_deadline and not missed_proof.withdrawer_missed_deadline
+    assert missed_confirmation.withdrawer_missed_deadline and not missed_confirmation.funder_missed_deadline
+    assert not pending_proof.funder_missed_deadline
+
+    # Already flagged pairs are not counted again
+    assert set(enforce_expired_deadlines(db, now).values()) == {0}
+    db.close()
+
+
+def test_deadline_queries_read_open_deadline_indexes():
+    db = TestingSessionLocal()
+    executed = []
+
+    def capture(conn, cursor, statement, parameters, *args):
+        if "funding_match_pairs" in statement:
+            executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        enforce_expired_deadlines(db, datetime.utcnow())
+        load_open_deadlines(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    db.rollback()
+
+    # The pairs are only ever scanned through an open-deadline index, never as a whole table
+    assert len(executed) == 7
+    with engine.connect() as conn:
+        for statement, parameters in executed:
+            plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+            pair_steps = [step for step in plan if "funding_match_pairs" in step]
+            assert any("idx_match_pair_open_" in step for step in pair_steps), plan
+            assert not [step for step in pair_steps if step.startswith("SCAN") and "idx_match_pair_open_" not in step], plan
+    db.close()
+
+
+def test_failed_funders_withdrawals_are_requeued_with_priority():
+    db = TestingSessionLocal()
+    cycle = create_cycle(db)
+    now = datetime.utcnow()
+    opted_in_at = now - timedelta(hours=6)
+
+    # One withdrawal fully matched by three funders, two of whom miss the deadline
+    withdrawal = create_pending_request(db, WithdrawalRequest, "3000")
+    withdrawal.amount_remaining = Decimal("0")
+    withdrawal.is_fully_matched = True
+    withdrawal.opted_in, withdrawal.opted_in_at = True, opted_in_at
+    withdrawal.merge_cycle_id, withdrawal.matched_at = cycle.id, now - timedelta(hours=5)
+    late_funders = [create_pending_request(db, FundingRequest, amount) for amount in ("1000", "1500")]
+    paying_funder = create_pending_request(db, FundingRequest, "500")
+    for funder in late_funders:
+        create_pair(db, funder, withdrawal, cycle, proof_deadline=now - timedelta(minutes=1))
+    create_pair(db, paying_funder, withdrawal, cycle, proof_deadline=now - timedelta(minutes=1), proof_uploaded=True)
+
+    # A withdrawal whose funder is still within the deadline stays as it is
+    waiting = create_pending_request(db, WithdrawalRequest, "800")
+    create_pair(db, paying_funder, waiting, cycle, proof_deadline=now + timedelta(hours=1))
+    db.commit()
+
+    summary = enforce_expired_deadlines(db, now)
+    db.commit()
+    assert summary["withdrawals_requeued"] == 1
+
+    db.expire_all()
+    assert abs(withdrawal.amount_remaining - Decimal("2500")) < HALF_MINOR_UNIT
+    assert withdrawal.is_priority and withdrawal.priority_timestamp == opted_in_at
+    assert withdrawal.failed_match_count == 2
+    assert not withdrawal.is_fully_matched and not withdrawal.opted_in
+    assert withdrawal.merge_cycle_id is None and withdrawal.matched_at is None
+    assert not waiting.is_priority and waiting.failed_match_count == 0
+
+    # Visible to the next cycle's priority queue
+    _, withdrawers, priority_count = celery_batch_matching.load_pending_amounts(db, "NAIRA")
+    assert priority_count == 1 and withdrawers[0] == (withdrawal.id, to_minor_units(Decimal("2500")))
+
+    # Flagged pairs are never re-queued twice
+    assert enforce_expired_deadlines(db, now)["withdrawals_requeued"] == 0
+    db.close()
+
+
+def test_granted_extension_replaces_proof_deadline():
+    db = TestingSessionLocal()
+    cycle = create_cycle(db)
+    now = datetime.utcnow()
+    funder = create_pending_request(db, FundingRequest, "1000")
+    withdrawer = create_pending_request(db, WithdrawalRequest, "1000")
+    extended = create_pair(
+        db, funder, withdrawer, cycle, proof_deadline=now - timedelta(minutes=5),
+        extension_requested=True, extension_granted=True, extended_deadline=now + timedelta(minutes=55)
+    )
+    db.commit()
+
+    assert enforce_expired_deadlines(db, now)["proof_deadlines_missed"] == 0
+    summary = enforce_expired_deadlines(db, now + timedelta(hours=1), pair_ids=[extended.id])
+    db.commit()
+    assert summary["proof_deadlines_missed"] == 1
+    db.expire_all()
+    assert wallet_of(db, funder).is_blocked and wallet_of(db, funder).block_reason
+    db.close()
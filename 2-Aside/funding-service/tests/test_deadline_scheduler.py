@@ -0,0 +1,97 @@
+"""
+Funding Service - Deadline Scheduler Tests
+Tests for the in-process engine that fires deadlines as they fall due
+"""
+
+from datetime import datetime, timedelta
+
+from shared.models import FundingRequest, WithdrawalRequest
+from shared.tests.support import TestingSessionLocal, create_pending_request, create_cycle
+from order_book import OrderBook
+from scheduler_lease import LeaderLease
+from deadline_scheduler import DeadlineScheduler, PROOF, CONFIRMATION
+from tests.factories import create_pair, wallet_of
+
+
+def test_deadline_engine_fires_only_due_deadlines():
+    db = TestingSessionLocal()
+    cycle = create_cycle(db)
+    now = datetime.utcnow()
+    funder = create_pending_request(db, FundingRequest, "1000")
+    withdrawer = create_pending_request(db, WithdrawalRequest, "1000")
+    due = create_pair(db, funder, withdrawer, cycle, proof_deadline=now - timedelta(seconds=1))
+    later = create_pair(db, funder, withdrawer, cycle, proof_deadline=now + timedelta(hours=1))
+    uploaded = create_pair(
+        db, funder, withdrawer, cycle, proof_deadline=now - timedelta(hours=1),
+        proof_uploaded=True, confirmation_deadline=now + timedelta(minutes=80)
+    )
+    create_pair(db, funder, withdrawer, cycle, proof_deadline=now - timedelta(hours=1), funder_missed_deadline=True)
+    db.commit()
+
+    lease = LeaderLease("deadline_engine", session_factory=TestingSessionLocal, holder="a")
+    book = OrderBook()
+    deadlines = DeadlineScheduler(session_factory=TestingSessionLocal, lease=lease, book=book)
+    assert deadlines.load(db) == 3
+    assert deadlines.next_due() == due.proof_deadline
+
+    summary = deadlines.fire(now)
+    assert summary["proof_deadlines_missed"] == 1 and summary["funders_blocked"] == 1
+    # The re-queued withdrawal is in the book with priority
+    assert summary["withdrawals_requeued"] == 1
+    assert book.snapshot("NAIRA")[2] == 1
+    assert deadlines.fire(now) is None
+    assert deadlines.next_due() == later.proof_deadline
+
+    # An extension granted before the deadline moves the entry instead of firing it
+    later.extension_requested = later.extension_granted = True
+    later.extended_deadline = later.proof_deadline + timedelta(hours=1)
+    db.commit()
+    deadlines.track(later)
+    assert deadlines.pop_due(now + timedelta(hours=1, minutes=30)) == [
+        (uploaded.confirmation_deadline, uploaded.id, CONFIRMATION)
+    ]
+    assert deadlines.next_due() == later.extended_deadline
+    db.close()
+
+
+def test_deadline_engine_recovers_state_from_database():
+    db = TestingSessionLocal()
+    cycle = create_cycle(db)
+    now = datetime.utcnow()
+    funder = create_pending_request(db, FundingRequest, "1000")
+    withdrawer = create_pending_request(db, WithdrawalRequest, "1000")
+    pair = create_pair(
+        db, funder, withdrawer, cycle, proof_deadline=now + timedelta(hours=1),
+        extension_requested=True, extension_granted=True, extended_deadline=now + timedelta(hours=2)
+    )
+    db.commit()
+
+    lease = LeaderLease("deadline_engine", session_factory=TestingSessionLocal, holder="a")
+    before_restart = DeadlineScheduler(session_factory=TestingSessionLocal, lease=lease)
+    before_restart.track(pair)
+    after_restart = DeadlineScheduler(session_factory=TestingSessionLocal, lease=lease)
+    after_restart.reload()
+    assert after_restart.pop_due(now + timedelta(hours=3)) == before_restart.pop_due(now + timedelta(hours=3)) == [
+        (pair.extended_deadline, pair.id, PROOF)
+    ]
+    db.close()
+
+
+def test_deadline_engine_standby_retries_after_lease_ttl():
+    db = TestingSessionLocal()
+    cycle = create_cycle(db)
+    now = datetime.utcnow()
+    funder = create_pending_request(db, FundingRequest, "1000")
+    withdrawer = create_pending_request(db, WithdrawalRequest, "1000")
+    create_pair(db, funder, withdrawer, cycle, proof_deadline=now - timedelta(seconds=1))
+    db.commit()
+
+    assert LeaderLease("deadline_engine", session_factory=TestingSessionLocal, holder="a").heartbeat()
+    standby_lease = LeaderLease("deadline_engine", session_factory=TestingSessionLocal, holder="b", ttl_seconds=60)
+    standby = DeadlineScheduler(session_factory=TestingSessionLocal, lease=standby_lease)
+    standby.reload()
+
+    assert standby.fire(now) is None
+    assert standby.next_due() == now + timedelta(seconds=60)
+    assert not wallet_of(db, funder).is_blocked
+    db.close()
@@ -0,0 +1,21 @@
+"""
+Funding Service - Match Persistence Tests
+Tests for the helpers every writer of match pairs shares
+"""
+
+import uuid
+from decimal import Decimal
+
+from match_persistence import apply_matches_to_remaining
+
+
+def test_apply_matches_to_remaining():
+    f1, f2, w1 = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    funding_after, withdrawal_after = apply_matches_to_remaining(
+        [(f1, w1, Decimal("1000")), (f2, w1, Decimal("500"))],
+        {f1: Decimal("1000"), f2: Decimal("2000")},
+        {w1: Decimal("1500")}
+    )
+
+    assert funding_after == {f1: Decimal("0"), f2: Decimal("1500")}
+    assert withdrawal_after == {w1: Decimal("0")}
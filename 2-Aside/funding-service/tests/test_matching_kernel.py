@@ -0,0 +1,54 @@
+"""
+Funding Service - Matching Kernel Tests
+Tests for the integer minor-unit matching kernel
+"""
+
+import pytest
+import random
+from decimal import Decimal
+
+from matching_kernel import match_minor_units, to_minor_units, from_minor_units
+from tests.factories import reference_smart_match, random_population
+
+
+def test_minor_unit_round_trip():
+    assert to_minor_units(Decimal("1500.25")) == 150025
+    assert to_minor_units(Decimal("1000")) == 100000
+    assert from_minor_units(150025) == Decimal("1500.25")
+    assert str(from_minor_units(100000)) == "1000.00"
+
+
+def test_to_minor_units_rejects_sub_kobo_amounts():
+    with pytest.raises(ValueError):
+        to_minor_units(Decimal("10.001"))
+
+
+def test_kernel_splits_amounts():
+    matches = match_minor_units([("f1", 300000)], [("w1", 100000), ("w2", 500000)])
+    assert matches == [("f1", "w1", 100000), ("f1", "w2", 200000)]
+
+
+def test_kernel_empty_side_returns_no_matches():
+    assert match_minor_units([], [("w1", 100000)]) == []
+    assert match_minor_units([("f1", 100000)], []) == []
+
+
+def test_kernel_keeps_input_order_for_equal_amounts():
+    # Priority withdrawals are passed first and must win ties
+    matches = match_minor_units([("f1", 100000)], [("priority", 100000), ("regular", 100000)])
+    assert matches == [("f1", "priority", 100000)]
+
+
+def test_kernel_matches_reference_algorithm():
+    rng = random.Random(7)
+    for _ in range(50):
+        funders = random_population(rng, rng.randint(0, 40))
+        withdrawers = random_population(rng, rng.randint(0, 40))
+
+        expected = reference_smart_match(funders, withdrawers)
+        actual = match_minor_units(
+            [(i, to_minor_units(a)) for i, a in funders],
+            [(i, to_minor_units(a)) for i, a in withdrawers]
+        )
+
+        assert [(f, w, from_minor_units(a)) for f, w, a in actual] == expected
@@ -0,0 +1,107 @@
+"""
+Funding Service - Merge Plan Tests
+Tests for plans staged at cutoff and applied at merge time
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from shared.models import FundingRequest, WithdrawalRequest, FundingMatchPair, MergeCycle, MergePlan, MergePlanPair
+from shared.tests.support import TestingSessionLocal, create_cycle
+import celery_batch_matching
+from merge_plan import load_plans, plan_is_current
+from tests.factories import assert_counterparty_snapshot, seed_both_currencies, seed_priority_mix
+
+
+def test_plan_round_trips_and_is_committed_at_merge(monkeypatch):
+    monkeypatch.setattr(celery_batch_matching, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(celery_batch_matching, "MERGE_PARALLELISM", 1)
+    db = TestingSessionLocal()
+    seed_both_currencies(db)
+    cycle_id = create_cycle(db, status="pending").id
+    db.commit()
+
+    celery_batch_matching.plan_merge_cycle(str(cycle_id))
+    plans = load_plans(db, cycle_id)
+    assert set(plans) == {"NAIRA", "USDT"}
+    assert plans["NAIRA"].match_count == 2
+    assert (plans["USDT"].unmatched_funding, plans["USDT"].unmatched_withdrawal) == (1, 0)
+    staged = db.query(MergePlanPair).filter(MergePlanPair.merge_plan_id == plans["NAIRA"].id).all()
+    assert sorted(p.amount for p in staged) == [Decimal("2000"), Decimal("3000")]
+    staged_ids = {p.id for p in staged}
+
+    # The merge must not run the matcher when the plan is still valid
+    monkeypatch.setattr(celery_batch_matching, "get_matcher", lambda engine=None: pytest.fail("plan not used"))
+    celery_batch_matching.run_merge_cycle(str(cycle_id))
+    db.expire_all()
+
+    cycle = db.get(MergeCycle, cycle_id)
+    assert cycle.status == "completed"
+    assert (cycle.total_funding_requests, cycle.total_withdrawal_requests) == (2, 3)
+    assert (cycle.matched_pairs, cycle.unmatched_funding, cycle.unmatched_withdrawal) == (3, 1, 0)
+    # NAIRA pairs keep the ids they were staged with
+    naira_pairs = db.query(FundingMatchPair).join(FundingRequest).filter(FundingRequest.amount == Decimal("5000")).all()
+    assert {p.id for p in naira_pairs} == staged_ids
+    assert all(p.proof_deadline is not None for p in db.query(FundingMatchPair))
+    for pair in db.query(FundingMatchPair):
+        assert_counterparty_snapshot(db, pair)
+
+    naira_funder = db.query(FundingRequest).filter(FundingRequest.amount == Decimal("5000")).one()
+    assert naira_funder.amount_remaining == 0
+    assert naira_funder.is_fully_matched is True
+    assert naira_funder.merge_cycle_id == cycle_id
+    usdt_funder = db.query(FundingRequest).filter(FundingRequest.amount == Decimal("100")).one()
+    assert usdt_funder.amount_remaining == Decimal("60")
+    assert usdt_funder.is_fully_matched is False
+
+    assert db.query(MergePlan).count() == 0
+    assert db.query(MergePlanPair).count() == 0
+    db.close()
+
+
+def test_stale_plan_is_rematched_from_database(monkeypatch):
+    monkeypatch.setattr(celery_batch_matching, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(celery_batch_matching, "MERGE_PARALLELISM", 1)
+    db = TestingSessionLocal()
+    seed_priority_mix(db)
+    cycle_id = create_cycle(db, status="pending").id
+    db.commit()
+    celery_batch_matching.plan_merge_cycle(str(cycle_id))
+
+    # Re-queued with priority after cutoff (missed proof deadline)
+    regular = db.query(WithdrawalRequest).filter(
+        WithdrawalRequest.is_priority == False,
+        WithdrawalRequest.amount == Decimal("1000")
+    ).one()
+    regular.is_priority = True
+    regular.priority_timestamp = datetime.utcnow() - timedelta(days=2)
+    db.commit()
+
+    celery_batch_matching.run_merge_cycle(str(cycle_id))
+    db.expire_all()
+
+    # Oldest priority timestamp wins the tie for the 1000 funder
+    pair = db.query(FundingMatchPair).join(FundingRequest).filter(FundingRequest.amount == Decimal("1000")).one()
+    assert pair.withdrawal_request_id == regular.id
+    assert db.get(MergeCycle, cycle_id).status == "completed"
+    db.close()
+
+
+def test_plan_goes_stale_when_requests_change_under_equal_totals(monkeypatch):
+    monkeypatch.setattr(celery_batch_matching, "SessionLocal", TestingSessionLocal)
+    db = TestingSessionLocal()
+    seed_priority_mix(db)
+    cycle = create_cycle(db, status="pending")
+    db.commit()
+    celery_batch_matching.plan_merge_cycle(str(cycle.id))
+    plan = load_plans(db, cycle.id)["NAIRA"]
+    assert plan_is_current(db, plan, "NAIRA", cycle.cutoff_time)
+
+    # Same counts and totals on both sides, different requests behind them
+    small, large = db.query(FundingRequest).filter(FundingRequest.currency == "NAIRA").order_by(FundingRequest.amount).all()
+    small.amount_remaining, large.amount_remaining = large.amount_remaining, small.amount_remaining
+    db.commit()
+
+    assert not plan_is_current(db, plan, "NAIRA", cycle.cutoff_time)
+    db.close()
@@ -0,0 +1,76 @@
+"""
+Funding Service - My Requests Tests
+Tests for a user's funding and withdrawal request history
+"""
+
+import pytest
+from datetime import datetime
+
+from shared.models import FundingRequest
+from shared.query_stats import query_budget
+from shared.tests.support import TestingSessionLocal, create_test_wallet
+from tests.factories import seed_matched_requests
+
+
+@pytest.mark.parametrize("path", ["/funding/my-requests", "/withdrawal/my-requests"])
+def test_my_requests_load_matches_in_constant_queries(funding_client, path):
+    db = TestingSessionLocal()
+    few, many = create_test_wallet(db), create_test_wallet(db)
+    seed_matched_requests(db, few, 1)
+    seed_matched_requests(db, many, 10)
+    few_user, many_user = few.user_id, many.user_id
+    db.close()
+
+    counts = []
+    for user_id, expected in ((few_user, 1), (many_user, 10)):
+        client = funding_client(user_id)
+        # Requests (joined with their wallet for the owner) + pairs (counterparty from the pair's snapshot)
+        with query_budget(2) as stats:
+            response = client.get(path)
+        assert response.status_code == 200
+        requests = response.json()["data"]
+        assert len(requests) == expected
+        assert all(request["currency"] == "NAIRA" for request in requests)
+        assert all(len(request["matched_users"]) == 3 for request in requests)
+        assert all(user["username"].startswith("testuser") for request in requests for user in request["matched_users"])
+        counts.append(stats.count)
+    assert counts[0] == counts[1]
+
+
+def test_my_requests_pages_cover_history_once_in_two_queries_each(funding_client):
+    db = TestingSessionLocal()
+    wallet = create_test_wallet(db)
+    seed_matched_requests(db, wallet, 25, pairs_per_request=2)
+    # Same-instant requests must not be skipped or repeated at page boundaries
+    tied = datetime(2024, 1, 1)
+    db.query(FundingRequest).filter(FundingRequest.wallet_id == wallet.id).update(
+        {FundingRequest.requested_at: tied}, synchronize_session=False
+    )
+    completed = db.query(FundingRequest).filter(FundingRequest.wallet_id == wallet.id).limit(4).all()
+    for request in completed:
+        request.is_fully_matched = request.is_completed = True
+    user_id, completed_ids = wallet.user_id, {str(r.id) for r in completed}
+    db.commit()
+    everything = {str(r.id) for r in db.query(FundingRequest).filter(FundingRequest.wallet_id == wallet.id)}
+    db.close()
+
+    client = funding_client(user_id)
+    seen, cursor = [], None
+    while True:
+        with query_budget(2):
+            response = client.get("/funding/my-requests", params={"per_page": 10, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        assert all(len(request["matched_users"]) == 2 for request in body["data"])
+        seen.extend(request["id"] for request in body["data"])
+        cursor = body["meta"]["next_cursor"]
+        assert body["meta"]["has_next"] == (cursor is not None)
+        if not cursor:
+            break
+    assert len(seen) == 25 and set(seen) == everything
+
+    response = client.get("/funding/my-requests", params={"status": "completed"})
+    assert {request["id"] for request in response.json()["data"]} == completed_ids
+    assert len(client.get("/funding/my-requests", params={"status": "pending", "per_page": 100}).json()["data"]) == 21
+    assert client.get("/funding/my-requests", params={"status": "lost"}).status_code == 400
+    assert client.get("/withdrawal/my-requests", params={"cursor": "not-a-cursor"}).status_code == 400
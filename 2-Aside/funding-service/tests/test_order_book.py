@@ -0,0 +1,163 @@
+"""
+Funding Service - Order Book Tests
+Tests for the in-memory order book and the pending-request loads behind it
+"""
+
+from sqlalchemy import event
+from decimal import Decimal
+
+from shared.models import FundingRequest, WithdrawalRequest
+from shared.tests.support import engine, TestingSessionLocal, create_pending_request, create_cycle
+from matching_kernel import match_minor_units
+import celery_batch_matching
+from order_book import OrderBook, load_fingerprints, bump_version
+from tests.factories import seed_both_currencies, seed_priority_mix
+
+
+def test_pending_request_queries_do_not_join_wallets():
+    db = TestingSessionLocal()
+    seed_both_currencies(db)
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        funders, withdrawers, _ = celery_batch_matching.load_pending_amounts(db, "USDT")
+        OrderBook().rebuild(db, "USDT")
+        load_fingerprints(db, "USDT")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert (len(funders), len(withdrawers)) == (1, 1)
+    assert statements and not any("JOIN" in statement.upper() for statement in statements)
+    db.close()
+
+
+def test_order_book_snapshot_matches_database_load():
+    db = TestingSessionLocal()
+    seed_priority_mix(db)
+    book = OrderBook()
+    book.rebuild(db, "NAIRA")
+
+    funders, withdrawers, priority_count = book.snapshot("NAIRA")
+    db_funders, db_withdrawers, db_priority_count = celery_batch_matching.load_pending_amounts(db, "NAIRA")
+
+    assert priority_count == db_priority_count == 1
+    assert sorted(funders) == sorted(db_funders)
+    # Same matches once the kernel has sorted by amount
+    assert match_minor_units(funders, withdrawers) == match_minor_units(db_funders, db_withdrawers)
+    assert book.reconcile(db, "NAIRA") is True
+    db.close()
+
+
+def test_order_book_lifecycle_events():
+    db = TestingSessionLocal()
+    book = OrderBook()
+    book.rebuild(db, "NAIRA")
+    funding = create_pending_request(db, FundingRequest, "3000")
+    withdrawal = create_pending_request(db, WithdrawalRequest, "3000")
+    db.commit()
+
+    book.upsert_funding("NAIRA", funding)
+    book.upsert_withdrawal("NAIRA", withdrawal)
+    assert book.snapshot("NAIRA")[:2] == ([(funding.id, 300000)], [(withdrawal.id, 300000)])
+
+    book.apply_matches("NAIRA", [(funding.id, withdrawal.id, Decimal("1000"))])
+    assert book.snapshot("NAIRA")[:2] == ([(funding.id, 200000)], [(withdrawal.id, 200000)])
+
+    book.remove_funding("NAIRA", funding.id)
+    withdrawal.is_priority = True
+    withdrawal.priority_timestamp = withdrawal.requested_at
+    book.upsert_withdrawal("NAIRA", withdrawal)
+    assert book.snapshot("NAIRA") == ([], [(withdrawal.id, 300000)], 1)
+    db.close()
+
+
+def test_in_sync_order_book_is_reconciled_from_its_version_alone():
+    db = TestingSessionLocal()
+    seed_priority_mix(db)
+    book = OrderBook()
+    book.rebuild(db, "NAIRA")
+
+    # Created through the API: the version is bumped with the request and handed to the book
+    funding = create_pending_request(db, FundingRequest, "3000")
+    version = bump_version(db, "NAIRA")
+    db.commit()
+    book.upsert_funding("NAIRA", funding, version)
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert book.reconcile(db, "NAIRA") is True
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert len(statements) == 1 and "order_book_versions" in statements[0]
+    assert (funding.id, 300000) in book.snapshot("NAIRA")[0]
+    db.close()
+
+
+def test_order_book_rebuilds_on_drift():
+    db = TestingSessionLocal()
+    seed_priority_mix(db)
+    book = OrderBook()
+    book.rebuild(db, "NAIRA")
+
+    # Created by another process - the book never heard about it
+    late = create_pending_request(db, WithdrawalRequest, "7000")
+    bump_version(db, "NAIRA")
+    db.commit()
+
+    assert book.reconcile(db, "NAIRA") is False
+    assert (late.id, 700000) in book.snapshot("NAIRA")[1]
+    assert book.reconcile(db, "NAIRA") is True
+    db.close()
+
+
+def test_order_book_detects_cancel_and_create_of_same_amount():
+    db = TestingSessionLocal()
+    cancelled = create_pending_request(db, FundingRequest, "5000")
+    db.commit()
+    book = OrderBook()
+    book.rebuild(db, "NAIRA")
+
+    # Another process cancels it and a new request of the same amount arrives - counts and totals still agree
+    db.delete(cancelled)
+    bump_version(db, "NAIRA")
+    db.commit()
+    replacement = create_pending_request(db, FundingRequest, "5000")
+    bump_version(db, "NAIRA")
+    db.commit()
+
+    assert book.reconcile(db, "NAIRA") is False
+    assert book.snapshot("NAIRA")[0] == [(replacement.id, 500000)]
+    assert book.reconcile(db, "NAIRA") is True
+    db.close()
+
+
+def test_match_currency_reads_and_consumes_order_book(monkeypatch):
+    monkeypatch.setattr(celery_batch_matching, "SessionLocal", TestingSessionLocal)
+    db = TestingSessionLocal()
+    seed_priority_mix(db)
+    cycle_id = create_cycle(db).id
+    db.commit()
+    book = OrderBook()
+    book.rebuild(db, "NAIRA")
+
+    stats = celery_batch_matching.match_currency(cycle_id, "NAIRA", book=book)
+
+    assert stats["matched_pairs"] == 3
+    priority = db.query(WithdrawalRequest).filter(WithdrawalRequest.is_priority == True).one()
+    db.expire_all()
+    assert db.get(WithdrawalRequest, priority.id).is_fully_matched is True
+    # Book and database agree after the commit
+    assert book.reconcile(db, "NAIRA") is True
+    # 4000 funder is left with 1000 after covering 1000 + 2000
+    assert [amount for _, amount in book.snapshot("NAIRA")[0]] == [100000]
+    assert book.snapshot("NAIRA")[1] == []
+    db.close()
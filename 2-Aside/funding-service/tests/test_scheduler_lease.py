@@ -0,0 +1,63 @@
+"""
+Funding Service - Scheduler Lease Tests
+Tests for electing the one instance that runs the in-process schedulers
+"""
+
+from datetime import datetime, timedelta
+
+from shared.models import SchedulerLease
+from shared.tests.support import TestingSessionLocal
+from scheduler_lease import LeaderLease, try_acquire_lease
+
+
+def test_only_one_instance_holds_the_lease():
+    db = TestingSessionLocal()
+    now = datetime.utcnow()
+
+    assert try_acquire_lease(db, "auto_matcher", "a", 60, now=now)
+    assert not try_acquire_lease(db, "auto_matcher", "b", 60, now=now + timedelta(seconds=10))
+
+    # Renewing keeps the takeover time and pushes the expiry
+    assert try_acquire_lease(db, "auto_matcher", "a", 60, now=now + timedelta(seconds=20))
+    lease = db.query(SchedulerLease).one()
+    assert (lease.holder, lease.acquired_at) == ("a", now)
+    assert lease.expires_at == now + timedelta(seconds=80)
+
+    # Other leases are independent
+    assert try_acquire_lease(db, "blob_cleanup", "b", 60, now=now)
+    db.close()
+
+
+def test_standby_takes_over_expired_lease():
+    db = TestingSessionLocal()
+    now = datetime.utcnow()
+
+    assert try_acquire_lease(db, "auto_matcher", "a", 60, now=now)
+    assert not try_acquire_lease(db, "auto_matcher", "b", 60, now=now + timedelta(seconds=59))
+    assert try_acquire_lease(db, "auto_matcher", "b", 60, now=now + timedelta(seconds=60))
+    assert not try_acquire_lease(db, "auto_matcher", "a", 60, now=now + timedelta(seconds=61))
+
+    lease = db.query(SchedulerLease).one()
+    assert (lease.holder, lease.acquired_at) == ("b", now + timedelta(seconds=60))
+    db.close()
+
+
+def test_scheduled_job_runs_on_leader_only():
+    runs = []
+    leader = LeaderLease("auto_matcher", session_factory=TestingSessionLocal, holder="a")
+    standby = LeaderLease("auto_matcher", session_factory=TestingSessionLocal, holder="b")
+    leader_job = leader.run_if_leader(lambda: runs.append("a"))
+    standby_job = standby.run_if_leader(lambda: runs.append("b"))
+
+    assert leader.heartbeat()
+    standby_job()
+    leader_job()
+    assert runs == ["a"]
+    assert not standby.is_leader
+
+    # A released lease is taken over at the standby's next firing
+    leader.release()
+    standby_job()
+    leader_job()
+    assert runs == ["a", "b"]
+    assert standby.is_leader and not leader.is_leader
@@ -0,0 +1,86 @@
+"""
+Funding Service - Unmatched Backlog Tests
+Tests for the admin view of unmatched requests and its export
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from shared.models import User, FundingRequest, WithdrawalRequest
+from shared.query_stats import query_budget
+from shared.tests.support import TestingSessionLocal, create_test_wallet, create_pending_request
+
+
+def test_unmatched_backlog_pages_in_one_query_and_exports_in_batches(funding_client, monkeypatch):
+    import csv
+    import io
+    import json
+
+    db = TestingSessionLocal()
+    admin = create_test_wallet(db)
+    db.get(User, admin.user_id).is_admin = True
+    start = datetime(2024, 1, 1)
+    for i in range(14):
+        # Pairs of requests share a timestamp; the USDT and matched ones stay out
+        create_pending_request(db, FundingRequest if i % 2 else WithdrawalRequest, str(1000 * (i + 1)),
+                               requested_at=start + timedelta(minutes=i // 2))
+    create_pending_request(db, FundingRequest, "50", currency="USDT")
+    create_pending_request(db, FundingRequest, "500", is_fully_matched=True)
+    admin_id = admin.user_id
+    db.commit()
+    db.close()
+
+    client = funding_client(admin_id)
+    for sort, order in (("requested_at", "asc"), ("amount_remaining", "desc")):
+        seen, cursor = [], None
+        while True:
+            params = {"currency": "naira", "sort": sort, "order": order, "per_page": 4}
+            # Admin check + the page
+            with query_budget(2):
+                response = client.get("/admin/unmatched-requests/page", params={**params, **({"cursor": cursor} if cursor else {})})
+            assert response.status_code == 200
+            seen.extend(response.json()["data"])
+            cursor = response.json()["meta"]["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == 14 and len({row["id"] for row in seen}) == 14
+        keys = [row[sort] if sort == "requested_at" else Decimal(row[sort]) for row in seen]
+        assert keys == sorted(keys, reverse=order == "desc")
+        assert {row["type"] for row in seen} == {"funding", "withdrawal"}
+        assert all(row["user"]["username"].startswith("testuser") for row in seen)
+
+    response = client.get("/admin/unmatched-requests/page", params={"currency": "NAIRA", "type": "funding", "include_total": True})
+    assert response.json()["meta"]["total_items"] == 7
+    assert {row["type"] for row in response.json()["data"]} == {"funding"}
+    # A cursor only continues the sort it was made for
+    first = client.get("/admin/unmatched-requests/page", params={"currency": "NAIRA", "per_page": 2}).json()["meta"]["next_cursor"]
+    assert client.get("/admin/unmatched-requests/page", params={"currency": "NAIRA", "order": "desc", "cursor": first}).status_code == 400
+
+    # The grouped view: the whole backlog by type, oldest first, in one query
+    with query_budget(2):
+        response = client.get("/admin/unmatched-requests", params={"currency": "naira"})
+    grouped = response.json()["data"]
+    assert grouped["currency"] == "NAIRA"
+    assert [len(grouped["funding"]), len(grouped["withdrawal"])] == [7, 7]
+    assert {row["type"] for row in grouped["withdrawal"]} == {"withdrawal"}
+    assert [row["requested_at"] for row in grouped["funding"]] == sorted(row["requested_at"] for row in grouped["funding"])
+
+    # Exports stream the whole backlog off a cursor, EXPORT_BATCH_SIZE rows per chunk
+    import main
+    import unmatched_requests
+    monkeypatch.setattr(main, "ReadSessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(unmatched_requests, "EXPORT_BATCH_SIZE", 5)
+    chunks = list(unmatched_requests.export_backlog(TestingSessionLocal, "NAIRA", "ndjson"))
+    assert [chunk.count("\n") for chunk in chunks] == [5, 5, 4]
+
+    response = client.get("/admin/unmatched-requests/export", params={"currency": "NAIRA"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in lines] == [row["id"] for row in sorted(lines, key=lambda r: (r["requested_at"], r["id"]))]
+    assert len(lines) == 14
+
+    response = client.get("/admin/unmatched-requests/export", params={"currency": "NAIRA", "format": "csv", "type": "withdrawal"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 7 and {row["type"] for row in rows} == {"withdrawal"} and rows[0]["currency"] == "NAIRA"
+    assert client.get("/admin/unmatched-requests/export", params={"currency": "NAIRA", "format": "xml"}).status_code == 400
@@ -0,0 +1,56 @@
+"""
+Funding Service - Vectorized Matcher Tests
+Tests for the NumPy matching engine against the kernel it replaces
+"""
+
+import pytest
+import random
+import uuid
+
+from matching_kernel import match_minor_units, to_minor_units, from_minor_units
+from vector_matcher import match_minor_units_vectorized, is_available as vector_engine_available
+from tests.factories import reference_smart_match, random_population
+
+
+requires_numpy = pytest.mark.skipif(not vector_engine_available(), reason="numpy not installed")
+
+
+@requires_numpy
+def test_vectorized_engine_matches_kernel_on_random_populations():
+    rng = random.Random(11)
+    for _ in range(200):
+        # Small amount ranges force lots of equal amounts and shared cumulative-sum boundaries
+        max_units = rng.choice([3, 20, 1000000])
+        funders = [(uuid.uuid4(), rng.randint(1, max_units) * 100) for _ in range(rng.randint(0, 60))]
+        withdrawers = [(uuid.uuid4(), rng.randint(1, max_units) * 100) for _ in range(rng.randint(0, 60))]
+
+        assert match_minor_units_vectorized(funders, withdrawers) == match_minor_units(funders, withdrawers)
+
+
+@requires_numpy
+def test_vectorized_engine_matches_reference_algorithm():
+    rng = random.Random(13)
+    for _ in range(50):
+        funders = random_population(rng, rng.randint(1, 40))
+        withdrawers = random_population(rng, rng.randint(1, 40))
+
+        actual = match_minor_units_vectorized(
+            [(i, to_minor_units(a)) for i, a in funders],
+            [(i, to_minor_units(a)) for i, a in withdrawers]
+        )
+
+        assert [(f, w, from_minor_units(a)) for f, w, a in actual] == reference_smart_match(funders, withdrawers)
+
+
+@requires_numpy
+def test_vectorized_engine_returns_python_ints():
+    matches = match_minor_units_vectorized([("f1", 300000)], [("w1", 100000), ("w2", 500000)])
+    assert matches == [("f1", "w1", 100000), ("f1", "w2", 200000)]
+    assert all(type(amount) is int for _, _, amount in matches)
+
+
+@requires_numpy
+def test_vectorized_engine_handles_zero_amounts_like_kernel():
+    funders = [("f0", 0), ("f1", 500)]
+    withdrawers = [("w0", 500), ("w1", 0)]
+    assert match_minor_units_vectorized(funders, withdrawers) == match_minor_units(funders, withdrawers)
@@ -0,0 +1,202 @@
+"""
+The unmatched backlog behind GET /admin/unmatched-requests, its paged form and its export.
+
+Funding and withdrawal requests still waiting for a match are one projection:
+a UNION ALL of both tables, each joined to its wallet's user, with only the
+columns the view shows. Both branches read the per-currency pending indexes
+(idx_funding_currency_pending / idx_withdrawal_currency_pending).
+
+/admin/unmatched-requests returns it grouped by type in one statement. The
+paged form (/admin/unmatched-requests/page) pages it with keyset cursors on
+(sort column, id). The export streams the whole backlog as NDJSON or CSV
+through a server-side cursor, yield_per rows at a time, so neither holds the
+backlog in memory.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import csv
+import io
+import json
+import uuid
+import sys
+import os
+
+from sqlalchemy import select, union_all, literal, func, asc, desc
+from sqlalchemy.orm import Session
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from shared import FundingRequest, WithdrawalRequest, Wallet, User
+from shared.utils import encode_cursor, decode_cursor, keyset_condition
+
+REQUEST_TYPES = {"funding": FundingRequest, "withdrawal": WithdrawalRequest}
+# sort parameter -> type of its values in a cursor
+SORT_KEYS = {"requested_at": datetime, "amount_remaining": Decimal}
+SORT_ORDERS = ("asc", "desc")
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# Rows fetched per round trip while exporting
+EXPORT_BATCH_SIZE = int(os.getenv("UNMATCHED_EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = ("type", "id", "currency", "amount", "amount_remaining", "username", "phone", "requested_at")
+
+
+def backlog_query(currency: str, request_type: Optional[str] = None):
+    """Unmatched requests of a currency (one type, or both) as a subquery named backlog"""
+    branches = []
+    for name, model in REQUEST_TYPES.items():
+        if request_type and name != request_type:
+            continue
+        branches.append(
+            select(
+                literal(name).label("type"),
+                model.id.label("id"),
+                model.currency.label("currency"),
+                model.amount.label("amount"),
+                model.amount_remaining.label("amount_remaining"),
+                model.requested_at.label("requested_at"),
+                User.username.label("username"),
+                User.phone.label("phone"),
+            )
+            .join(Wallet, model.wallet_id == Wallet.id)
+            .join(User, Wallet.user_id == User.id)
+            .where(model.currency == currency, model.is_fully_matched == False, model.is_completed == False)
+        )
+    backlog = union_all(*branches) if len(branches) > 1 else branches[0]
+    return backlog.subquery("backlog")
+
+
+def _ordered(backlog, sort: str, order: str):
+    direction = desc if order == "desc" else asc
+    return select(backlog).order_by(direction(backlog.c[sort]), direction(backlog.c.id))
+
+
+def _currency(row) -> str:
+    return getattr(row.currency, "value", row.currency)
+
+
+def format_row(row) -> Dict[str, Any]:
+    return {
+        "type": row.type,
+        "id": str(row.id),
+        "currency": _currency(row),
+        "amount": str(row.amount),
+        "amount_remaining": str(row.amount_remaining),
+        "user": {
+            "username": row.username,
+            "phone": row.phone
+        },
+        "requested_at": row.requested_at.isoformat()
+    }
+
+
+def load_backlog_grouped(db: Session, currency: str) -> Dict[str, List[Dict[str, Any]]]:
+    """The whole backlog as {type: formatted rows}, oldest first - one statement"""
+    grouped = {name: [] for name in REQUEST_TYPES}
+    for row in db.execute(_ordered(backlog_query(currency), "requested_at", "asc")):
+        grouped[row.type].append(format_row(row))
+    return grouped
+
+
+def decode_backlog_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, uuid.UUID]:
+    """
+    (sort value, id) from a cursor of load_backlog_page.
+
+    Raises:
+        ValueError: If the cursor is malformed or was made for another sort
+    """
+    cursor_sort, cursor_order, value, request_id = decode_cursor(cursor, str, str, SORT_KEYS[sort], uuid.UUID)
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError("Cursor belongs to another sort order")
+    return value, request_id
+
+
+def load_backlog_page(
+    db: Session,
+    currency: str,
+    per_page: int,
+    request_type: Optional[str] = None,
+    sort: str = "requested_at",
+    order: str = "asc",
+    after: Optional[Tuple[Any, uuid.UUID]] = None,
+    offset: int = 0
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of the backlog - one statement.
+
+    Args:
+        after: (sort value, id) from decode_backlog_cursor
+        offset: Rows to skip when paging by number instead of cursor
+
+    Returns: (formatted rows, next cursor or None)
+    """
+    backlog = backlog_query(currency, request_type)
+    query = _ordered(backlog, sort, order)
+    if after:
+        query = query.where(keyset_condition((backlog.c[sort], backlog.c.id), after, descending=order == "desc"))
+    elif offset:
+        query = query.offset(offset)
+
+    # One extra row tells whether there is a next page
+    rows = db.execute(query.limit(per_page + 1)).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        last = rows[per_page - 1]
+        next_cursor = encode_cursor(sort, order, last._mapping[sort], last.id)
+    return [format_row(row) for row in rows[:per_page]], next_cursor
+
+
+def count_backlog(db: Session, currency: str, request_type: Optional[str] = None) -> Dict[str, int]:
+    """Unmatched requests per type"""
+    backlog = backlog_query(currency, request_type)
+    counts = dict(db.execute(select(backlog.c.type, func.count()).group_by(backlog.c.type)).all())
+    return {name: counts.get(name, 0) for name in REQUEST_TYPES if not request_type or name == request_type}
+
+
+def _export_rows(session_factory, currency: str, request_type: Optional[str], sort: str, order: str) -> Iterator[Any]:
+    """Backlog rows off a server-side cursor, EXPORT_BATCH_SIZE per fetch, on a session of its own"""
+    db = session_factory()
+    try:
+        query = _ordered(backlog_query(currency, request_type), sort, order)
+        result = db.execute(query.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def export_backlog(
+    session_factory,
+    currency: str,
+    export_format: str,
+    request_type: Optional[str] = None,
+    sort: str = "requested_at",
+    order: str = "asc"
+) -> Iterator[str]:
+    """
+    The whole backlog as NDJSON lines or CSV (with a header), one chunk per batch.
+
+    session_factory: a session is opened when the first chunk is pulled and
+    closed after the last, since a streaming body outlives the request's
+    dependencies.
+    """
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+    for partition in _export_rows(session_factory, currency, request_type, sort, order):
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in partition:
+                writer.writerow([
+                    row.type, row.id, _currency(row), row.amount, row.amount_remaining,
+                    row.username, row.phone, row.requested_at.isoformat()
+                ])
+            yield buffer.getvalue()
+        else:
+            yield "".join(json.dumps(format_row(row)) + "\n" for row in partition)
@@ -0,0 +1,89 @@
+"""
+NumPy vectorized matching engine (optional - requires numpy).
+
+The greedy split in matching_kernel.match_minor_units walks both sorted sides
+with two pointers. Every match it emits is one segment between consecutive
+boundaries of the merged cumulative sums of the sorted funder and withdrawer
+amounts, so all triples can be computed at once with np.cumsum, a sorted merge
+of the boundaries and np.searchsorted instead of a Python loop. Output is
+identical to the kernel.
+"""
+
+from typing import Any, List, Sequence, Tuple
+
+from matching_kernel import match_minor_units
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional - the Python kernel is always available
+    np = None
+
+
+def is_available() -> bool:
+    """True if numpy is installed"""
+    return np is not None
+
+
+def _sorted_side(side: Sequence[Tuple[Any, int]]):
+    """Split (id, amount) pairs into stably sorted ids and cumulative amounts"""
+    ids = np.empty(len(side), dtype=object)
+    ids[:] = [request_id for request_id, _ in side]
+    amounts = np.fromiter((amount for _, amount in side), dtype=np.int64, count=len(side))
+    order = np.argsort(amounts, kind="stable")
+    return ids[order], amounts[order]
+
+
+def match_minor_units_vectorized(
+    funders: Sequence[Tuple[Any, int]],
+    withdrawers: Sequence[Tuple[Any, int]]
+) -> List[Tuple[Any, Any, int]]:
+    """
+    Vectorized equivalent of matching_kernel.match_minor_units.
+
+    Args:
+        funders: (funding_id, amount_remaining in minor units)
+        withdrawers: (withdrawal_id, amount_remaining in minor units)
+
+    Returns: List of (funding_id, withdrawal_id, amount in minor units) triples
+    """
+    if np is None:
+        raise RuntimeError("numpy is not installed - use the python matching engine")
+
+    if not funders or not withdrawers:
+        return []
+
+    funder_ids, funder_amounts = _sorted_side(funders)
+    withdrawer_ids, withdrawer_amounts = _sorted_side(withdrawers)
+
+    # Zero-amount requests produce zero-amount matches in the greedy loop,
+    # which have no segment here - let the kernel handle that degenerate case
+    if funder_amounts[0] <= 0 or withdrawer_amounts[0] <= 0:
+        return match_minor_units(funders, withdrawers)
+
+    funder_cumsum = np.cumsum(funder_amounts)
+    withdrawer_cumsum = np.cumsum(withdrawer_amounts)
+
+    # Matching stops as soon as either side runs out
+    total = min(funder_cumsum[-1], withdrawer_cumsum[-1])
+
+    # Union of the boundaries up to total. Both cumsums are already strictly
+    # increasing, so a stable sort (timsort for int64, which finds the two
+    # runs) merges them in linear time; np.union1d would unique() the
+    # concatenation with a full O(n log n) quicksort
+    boundaries = np.concatenate((
+        funder_cumsum[:np.searchsorted(funder_cumsum, total, side="right")],
+        withdrawer_cumsum[:np.searchsorted(withdrawer_cumsum, total, side="right")]
+    ))
+    boundaries.sort(kind="stable")
+    ends = boundaries[np.concatenate(([True], boundaries[1:] != boundaries[:-1]))]
+    starts = np.concatenate((np.zeros(1, dtype=np.int64), ends[:-1]))
+
+    # The request covering [start, end) is the first whose cumulative sum exceeds start
+    funder_index = np.searchsorted(funder_cumsum, starts, side="right")
+    withdrawer_index = np.searchsorted(withdrawer_cumsum, starts, side="right")
+
+    return list(zip(
+        funder_ids[funder_index].tolist(),
+        withdrawer_ids[withdrawer_index].tolist(),
+        (ends - starts).tolist()
+    ))
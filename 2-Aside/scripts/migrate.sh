@@ -133,11 +133,26 @@ EOF
     echo -e "${GREEN}✓ Alembic initialized${NC}"
 fi
 
-# Create initial migration
+# Bring the schema under the migration chain (alembic/versions)
 echo ""
-echo -e "${YELLOW}[3/4] Creating migration...${NC}"
-alembic revision --autogenerate -m "Initial migration - all tables"
-echo -e "${GREEN}✓ Migration created${NC}"
+echo -e "${YELLOW}[3/4] Checking schema version...${NC}"
+SCHEMA_STATE=$(python -c "
+import os
+from sqlalchemy import create_engine, inspect
+tables = inspect(create_engine(os.getenv('DATABASE_URL'))).get_table_names()
+print('versioned' if 'alembic_version' in tables else 'unversioned' if tables else 'empty')
+")
+if [ "$SCHEMA_STATE" = "empty" ]; then
+    # Creates the current schema and stamps it at head
+    python create_tables.py
+    echo -e "${GREEN}✓ Schema created${NC}"
+elif [ "$SCHEMA_STATE" = "unversioned" ]; then
+    # Built by create_tables.py before the migrations existed
+    alembic stamp 2a7f5c9e1d04
+    echo -e "${GREEN}✓ Existing schema stamped at the baseline revision${NC}"
+else
+    echo -e "${GREEN}✓ Schema already versioned${NC}"
+fi
 
 # Run migrations
 echo ""
@@ -5,7 +5,28 @@ Shared utilities and models for 2-Aside Platform
 __version__ = "1.0.0"
 
 # Export commonly used modules for easy imports
-from .database import Base, SessionLocal, get_db, engine
+from .database import (
+    Base,
+    SessionLocal,
+    get_db,
+    engine,
+    pool_status,
+    AsyncSessionLocal,
+    get_async_db,
+    get_async_engine,
+    get_read_db,
+    get_async_read_db,
+    ReadSessionLocal,
+)
+from .read_routing import ReadYourWritesMiddleware, PIN_HEADER
+from .loaders import (
+    WALLET_WITH_OWNER,
+    PAIR_WITH_PARTIES,
+    FUNDING_REQUEST_WITH_MATCHES,
+    WITHDRAWAL_REQUEST_WITH_MATCHES,
+)
+from .query_stats import QueryStatsMiddleware, query_budget
+from .slow_query_log import recent_slow_queries, query_source, set_query_source
 from .models import (
     User,
     Wallet,
@@ -20,6 +41,10 @@ from .models import (
     WithdrawalRequest,
     FundingMatchPair,
     MergeCycle,
+    MergePlan,
+    MergePlanPair,
+    SchedulerLease,
+    OrderBookVersion,
     AdminWallet,
 )
 
@@ -117,6 +142,9 @@ from .utils import (
     validate_referral_code,
     calculate_pagination,
     get_offset_limit,
+    encode_cursor,
+    decode_cursor,
+    keyset_condition,
     generate_transaction_reference,
 )
 
@@ -126,6 +154,25 @@ __all__ = [
     "SessionLocal",
     "get_db",
     "engine",
+    "pool_status",
+    "AsyncSessionLocal",
+    "get_async_db",
+    "get_async_engine",
+    "get_read_db",
+    "get_async_read_db",
+    "ReadSessionLocal",
+    "ReadYourWritesMiddleware",
+    "PIN_HEADER",
+    # Eager-loading bundles
+    "WALLET_WITH_OWNER",
+    "PAIR_WITH_PARTIES",
+    "FUNDING_REQUEST_WITH_MATCHES",
+    "WITHDRAWAL_REQUEST_WITH_MATCHES",
+    "QueryStatsMiddleware",
+    "query_budget",
+    "recent_slow_queries",
+    "query_source",
+    "set_query_source",
     # Models
     "User",
     "Wallet",
@@ -227,5 +274,8 @@ __all__ = [
     "validate_referral_code",
     "calculate_pagination",
     "get_offset_limit",
+    "encode_cursor",
+    "decode_cursor",
+    "keyset_condition",
     "generate_transaction_reference",
 ]
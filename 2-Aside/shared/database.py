@@ -4,13 +4,22 @@ Provides database connection and session management for all microservices
 """
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import NullPool
-from typing import Generator
+from starlette.concurrency import run_in_threadpool
+from typing import Any, AsyncGenerator, Dict, Generator, Optional
+import logging
 import os
+import threading
 from dotenv import load_dotenv
 
+from .pool_metrics import MeteredQueuePool, MeteredAsyncQueuePool, pool_status as _pool_status
+from .read_routing import RoutingSession
+from .slow_query_log import enable_slow_query_log
+
 load_dotenv()
 
 # Database URL from environment
@@ -19,15 +28,50 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
+# Optional read replica for read-only endpoints (get_read_db), e.g. the Azure SQL
+# read scale-out: the primary's URL with ApplicationIntent=ReadOnly (pyodbc)
+READ_REPLICA_URL = os.getenv("READ_REPLICA_URL") or None
+
+# Connection pool
+# "null" (default) opens a new connection per session, as the Azure Functions
+# apps need - they are frozen between invocations; "queue" keeps connections
+# open between requests (pool_size per process, plus max_overflow under load)
+# and is set by the long-running container deployments (docker-compose*.yml)
+DB_POOL = os.getenv("DB_POOL", "null").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Azure SQL closes connections idle for 30 minutes
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+def pool_options(queue_pool=MeteredQueuePool) -> Dict[str, Any]:
+    """create_engine arguments for the configured pool"""
+    if DB_POOL == "null":
+        return {"poolclass": NullPool}
+    if DB_POOL != "queue":
+        raise ValueError(f"DB_POOL must be 'queue' or 'null', got {DB_POOL!r}")
+    return {
+        "poolclass": queue_pool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
 # Create engine
-# For Azure SQL, use NullPool to avoid connection pooling issues
 engine = create_engine(
     DATABASE_URL,
-    poolclass=NullPool,
     echo=os.getenv("DEBUG", "false").lower() == "true",
-    future=True
+    future=True,
+    **pool_options()
 )
 
+# Opt-in slow query log (SLOW_QUERY_MS) - times statements on every engine
+enable_slow_query_log(plan_engine=engine)
+
 # Session factory
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -36,10 +80,180 @@ SessionLocal = sessionmaker(
     future=True
 )
 
+# Read replica engine - None without READ_REPLICA_URL, and reads stay on the primary
+read_engine = create_engine(
+    READ_REPLICA_URL,
+    echo=os.getenv("DEBUG", "false").lower() == "true",
+    future=True,
+    **pool_options()
+) if READ_REPLICA_URL else None
+
+# Session factory for read-only endpoints - replica unless the request has written
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replica=read_engine,
+    future=True
+)
+
 # Base class for all models
 Base = declarative_base()
 
 
+# ========================================
+# ASYNC ENGINE
+# ========================================
+# For endpoints that await their queries instead of holding a threadpool
+# worker while the database answers. Created on first use, so services and
+# Celery workers that never touch it do not need an async driver installed.
+# Where the async driver is missing (aioodbc, or the ODBC driver it needs, on a
+# pymssql-only host) async endpoints get the sync session run in the threadpool.
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    "mssql": "mssql+aioodbc",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+MSSQL_ODBC_DRIVER = os.getenv("MSSQL_ODBC_DRIVER", "ODBC Driver 18 for SQL Server")
+
+
+def async_database_url(database_url: str) -> str:
+    """The async-driver form of a database URL (mssql+pymssql -> mssql+aioodbc, ...)"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if url.get_driver_name() in ("aioodbc", "asyncpg", "aiosqlite"):
+        return database_url
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend} databases - set ASYNC_DATABASE_URL")
+    if backend == "mssql" and "driver" not in url.query:
+        # pymssql URLs do not name an ODBC driver
+        url = url.update_query_dict({"driver": MSSQL_ODBC_DRIVER})
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def async_driver_available(database_url: str) -> bool:
+    """True if the async DBAPI of a URL is installed (and, for mssql, the ODBC driver it names)"""
+    url = make_url(database_url)
+    try:
+        url.get_dialect().import_dbapi()
+    except ImportError:
+        return False
+    if url.get_backend_name() == "mssql":
+        import pyodbc
+        return url.query.get("driver") in pyodbc.drivers()
+    return True
+
+
+# Session factory for the async engine - bound by get_async_engine().
+# Objects stay loaded after commit: an AsyncSession cannot lazy-load them again.
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+_async_engine: Optional[AsyncEngine] = None
+_async_read_engine: Optional[AsyncEngine] = None
+_async_unavailable = False
+_async_engine_lock = threading.Lock()
+
+
+class ThreadedSession:
+    """
+    The part of the AsyncSession API the async endpoints use, over a sync
+    Session whose calls run in the threadpool - the fallback of get_async_db.
+    Results are fetched in the thread (frozen), so reading rows never blocks the event loop.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def execute(self, statement, params=None, **kwargs):
+        def execute():
+            return self.sync_session.execute(statement, params, **kwargs).freeze()
+        return (await run_in_threadpool(execute))()
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return (await self.execute(statement, params, **kwargs)).scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+
+def _create_async_engine(database_url: str) -> AsyncEngine:
+    async_engine = create_async_engine(
+        database_url,
+        echo=os.getenv("DEBUG", "false").lower() == "true",
+        **pool_options(MeteredAsyncQueuePool)
+    )
+    if async_engine.dialect.name == "mssql":
+        event.listen(async_engine.sync_engine, "connect", set_isolation_level)
+    return async_engine
+
+
+def get_async_engine() -> Optional[AsyncEngine]:
+    """
+    The async engine, created on first call from ASYNC_DATABASE_URL
+    (default: DATABASE_URL with its async driver). Uses the same pool settings
+    as the sync engine, so each process can hold up to twice the connections.
+    The async replica engine (ASYNC_READ_REPLICA_URL, default READ_REPLICA_URL
+    with its async driver) is created alongside it.
+
+    Returns: None if the async driver is not installed here
+    """
+    global _async_engine, _async_read_engine, _async_unavailable
+    if _async_engine is None and not _async_unavailable:
+        with _async_engine_lock:
+            if _async_engine is None and not _async_unavailable:
+                database_url = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+                replica_url = None
+                if READ_REPLICA_URL:
+                    replica_url = os.getenv("ASYNC_READ_REPLICA_URL") or async_database_url(READ_REPLICA_URL)
+                if not all(async_driver_available(url) for url in (database_url, replica_url) if url):
+                    logger.warning(
+                        f"Async driver for {make_url(database_url).drivername} is not installed - "
+                        f"async endpoints run on sync sessions in the threadpool"
+                    )
+                    _async_unavailable = True
+                    return None
+
+                async_engine = _create_async_engine(database_url)
+                if replica_url:
+                    _async_read_engine = _create_async_engine(replica_url)
+                AsyncSessionLocal.configure(bind=async_engine)
+                AsyncReadSessionLocal.configure(
+                    bind=async_engine,
+                    replica=_async_read_engine.sync_engine if _async_read_engine else None
+                )
+                _async_engine = async_engine
+    return _async_engine
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency for FastAPI to get database session.
@@ -56,6 +270,78 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for FastAPI to get an async database session.
+
+    Usage:
+        @app.get("/users")
+        async def get_users(db: AsyncSession = Depends(get_async_db)):
+            return (await db.execute(select(User))).scalars().all()
+
+    Without an async driver it yields a ThreadedSession over SessionLocal.
+    """
+    if get_async_engine() is None:
+        async for db in _threaded_session(SessionLocal):
+            yield db
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def _threaded_session(session_factory) -> AsyncGenerator[ThreadedSession, None]:
+    db = session_factory()
+    try:
+        yield ThreadedSession(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    Dependency for read-only endpoints - queries go to the read replica when
+    one is configured, and to the primary once the request has written or
+    the client wrote within the last REPLICA_PIN_SECONDS (needs
+    ReadYourWritesMiddleware). Data may lag the primary by a few seconds.
+
+    Usage:
+        @app.get("/users")
+        def get_users(db: Session = Depends(get_read_db)):
+            return db.query(User).all()
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """get_read_db for async endpoints"""
+    if get_async_engine() is None:
+        async for db in _threaded_session(ReadSessionLocal):
+            yield db
+        return
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+def pool_status() -> Dict[str, Any]:
+    """
+    Pool size, saturation and checkout wait times of the shared engine
+    (and of the replica and async engines, when there are any).
+    Reported by each service's /health endpoint.
+    """
+    status = _pool_status(engine)
+    if read_engine is not None:
+        status["replica"] = _pool_status(read_engine)
+    if _async_engine is not None:
+        status["async"] = _pool_status(_async_engine.sync_engine)
+    if _async_read_engine is not None:
+        status["async_replica"] = _pool_status(_async_read_engine.sync_engine)
+    return status
+
+
 def init_db():
     """
     Initialize database - create all tables.
@@ -78,7 +364,12 @@ def set_isolation_level(dbapi_conn, connection_record):
     """
     Set SQL Server transaction isolation level to READ COMMITTED
     to prevent dirty reads while allowing concurrent access.
+    Runs once per physical connection, not per checkout.
     """
     cursor = dbapi_conn.cursor()
     cursor.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
     cursor.close()
+
+
+if read_engine is not None:
+    event.listen(read_engine, "connect", set_isolation_level)
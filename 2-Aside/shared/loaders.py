@@ -0,0 +1,52 @@
+"""
+2-Aside Platform - Eager Loading Bundles
+Named loader options for the funding domain's object graphs, so a handler
+loads pair -> request -> wallet -> user -> bank details in a fixed number
+of queries instead of one query per hop
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from .models import Wallet, FundingRequest, WithdrawalRequest, FundingMatchPair
+
+# Many-to-one hops are JOINed into the parent query; collections are loaded
+# with one extra SELECT ... WHERE id IN (...) per level (selectinload).
+#
+# Usage:
+#     db.query(FundingRequest).options(*FUNDING_REQUEST_WITH_MATCHES).filter(...).all()
+#     select(FundingMatchPair).options(*PAIR_WITH_PARTIES)
+
+
+def _owner(wallet_path):
+    """The wallet's user and bank details, joined"""
+    return (
+        wallet_path.joinedload(Wallet.user),
+        wallet_path.joinedload(Wallet.bank_details),
+    )
+
+
+# Wallet with its owner and payout details - 1 query
+WALLET_WITH_OWNER = (
+    joinedload(Wallet.user),
+    joinedload(Wallet.bank_details),
+)
+
+# Pair with both sides' request, wallet, user and bank details - 1 query
+PAIR_WITH_PARTIES = (
+    *_owner(joinedload(FundingMatchPair.funding_request).joinedload(FundingRequest.wallet)),
+    *_owner(joinedload(FundingMatchPair.withdrawal_request).joinedload(WithdrawalRequest.wallet)),
+)
+
+# Funding request with its wallet and pairs - each pair carries its withdrawer's
+# snapshot, so 2 queries for any number of requests and pairs, with no joins
+# past the pairs
+FUNDING_REQUEST_WITH_MATCHES = (
+    joinedload(FundingRequest.wallet),
+    selectinload(FundingRequest.match_pairs),
+)
+
+# Withdrawal request with its wallet and pairs (funder's snapshot on each) - 2 queries
+WITHDRAWAL_REQUEST_WITH_MATCHES = (
+    joinedload(WithdrawalRequest.wallet),
+    selectinload(WithdrawalRequest.match_pairs),
+)
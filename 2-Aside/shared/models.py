@@ -3,7 +3,7 @@
 Core models used across all microservices
 """
 
-from sqlalchemy import Column, String, Integer, Numeric, Boolean, DateTime, ForeignKey, Enum, UniqueConstraint, Index
+from sqlalchemy import Column, String, Integer, BigInteger, Numeric, Boolean, DateTime, ForeignKey, Enum, UniqueConstraint, Index, and_
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
 import uuid
@@ -16,6 +16,12 @@ from .database import Base
 UUID = UNIQUEIDENTIFIER
 
 
+def _partial_index_where(*conditions) -> dict:
+    """Index keyword arguments for a filtered/partial index on every dialect that has one"""
+    where = and_(*conditions)
+    return {"mssql_where": where, "postgresql_where": where, "sqlite_where": where}
+
+
 # ========================================
 # ENUMS
 # ========================================
@@ -172,7 +178,7 @@ class WalletLog(Base):
     wallet = relationship("Wallet", back_populates="wallet_logs")
 
     __table_args__ = (
-        Index('idx_wallet_log_wallet_created', 'wallet_id', 'created_at'),
+        Index('idx_wallet_log_wallet_created', 'wallet_id', 'created_at', 'id'),
     )
 
     def __repr__(self):
@@ -211,6 +217,7 @@ class FundingRequest(Base):
 
     id = Column(UUID(), primary_key=True, default=uuid.uuid4)
     wallet_id = Column(UUID(), ForeignKey("wallets.id"), nullable=False)
+    currency = Column(Enum(CurrencyEnum), nullable=False)  # Copied from the wallet - matching queries skip the join
     amount = Column(Numeric(18, 2), nullable=False)
     amount_remaining = Column(Numeric(18, 2), nullable=False)  # For partial matching
     is_fully_matched = Column(Boolean, default=False, nullable=False)
@@ -228,8 +235,20 @@ class FundingRequest(Base):
     match_time = Column(DateTime, nullable=True)
     matched_to_withdrawal_id = Column(UUID(), nullable=True)
 
+    # Relationships (eager-loading bundles in shared/loaders.py)
+    wallet = relationship("Wallet")
+    match_pairs = relationship("FundingMatchPair", back_populates="funding_request")
+
     __table_args__ = (
         Index('idx_funding_wallet_match', 'wallet_id', 'is_fully_matched'),
+        # A user's requests newest first - keyset pages of GET /funding/my-requests
+        Index('idx_funding_wallet_requested', 'wallet_id', 'requested_at', 'id'),
+        # Matching candidates: range scan per currency in arrival order, amount read from the index
+        Index(
+            'idx_funding_currency_pending',
+            'currency', 'is_fully_matched', 'is_completed', 'requested_at',
+            mssql_include=['amount_remaining', 'wallet_id']
+        ),
     )
 
     def __repr__(self):
@@ -242,6 +261,7 @@ class WithdrawalRequest(Base):
 
     id = Column(UUID(), primary_key=True, default=uuid.uuid4)
     wallet_id = Column(UUID(), ForeignKey("wallets.id"), nullable=False)
+    currency = Column(Enum(CurrencyEnum), nullable=False)  # Copied from the wallet - matching queries skip the join
     amount = Column(Numeric(18, 2), nullable=False)
     amount_remaining = Column(Numeric(18, 2), nullable=False)  # For partial matching
     is_fully_matched = Column(Boolean, default=False, nullable=False)
@@ -262,8 +282,20 @@ class WithdrawalRequest(Base):
     matched_to_funder_id = Column(UUID(), nullable=True)
     match_time = Column(DateTime, nullable=True)
 
+    # Relationships (eager-loading bundles in shared/loaders.py)
+    wallet = relationship("Wallet")
+    match_pairs = relationship("FundingMatchPair", back_populates="withdrawal_request")
+
     __table_args__ = (
         Index('idx_withdrawal_wallet_match', 'wallet_id', 'is_fully_matched'),
+        # A user's requests newest first - keyset pages of GET /withdrawal/my-requests
+        Index('idx_withdrawal_wallet_requested', 'wallet_id', 'requested_at', 'id'),
+        # Matching candidates: priority queue first, then arrival order, amount read from the index
+        Index(
+            'idx_withdrawal_currency_pending',
+            'currency', 'is_fully_matched', 'is_completed', 'is_priority', 'priority_timestamp', 'requested_at',
+            mssql_include=['amount_remaining', 'wallet_id']
+        ),
     )
 
     def __repr__(self):
@@ -305,12 +337,47 @@ class FundingMatchPair(Base):
     in_dispute = Column(Boolean, default=False, nullable=False)  # Admin needs to review
     dispute_reason = Column(String(500), nullable=True)
 
+    # Counterparty snapshot - both parties and where to pay, frozen when the pair is
+    # created so polls read the pair alone and later profile edits can't redirect a payment
+    funder_user_id = Column(UUID(), nullable=True)
+    funder_username = Column(String(50), nullable=True)
+    funder_phone = Column(String(20), nullable=True)
+    withdrawer_user_id = Column(UUID(), nullable=True)
+    withdrawer_username = Column(String(50), nullable=True)
+    withdrawer_phone = Column(String(20), nullable=True)
+    currency = Column(Enum(CurrencyEnum), nullable=True)
+    payee_account_number = Column(String(20), nullable=True)  # NAIRA: withdrawer's bank account
+    payee_account_name = Column(String(255), nullable=True)
+    payee_bank_name = Column(String(100), nullable=True)
+    payee_wallet_address = Column(String(100), nullable=True)  # USDT: withdrawer's BEP20 address
+
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # Relationships (eager-loading bundles in shared/loaders.py)
+    funding_request = relationship("FundingRequest", back_populates="match_pairs")
+    withdrawal_request = relationship("WithdrawalRequest", back_populates="match_pairs")
+    merge_cycle = relationship("MergeCycle")
+
     __table_args__ = (
         Index('idx_match_pair_funding', 'funding_request_id'),
         Index('idx_match_pair_withdrawal', 'withdrawal_request_id'),
         Index('idx_match_pair_cycle', 'merge_cycle_id'),
+        # Open deadlines only - deadline sweeps read the pairs still running, not the whole history
+        Index(
+            'idx_match_pair_open_proof', 'proof_deadline',
+            mssql_include=['extension_granted', 'extended_deadline', 'funding_request_id'],
+            **_partial_index_where(proof_uploaded == False, funder_missed_deadline == False)
+        ),
+        Index(
+            'idx_match_pair_open_confirmation', 'confirmation_deadline',
+            mssql_include=['withdrawal_request_id'],
+            **_partial_index_where(
+                proof_uploaded == True, proof_confirmed == False, withdrawer_missed_deadline == False
+            )
+        ),
+        # A user's unconfirmed pairs per role - GET /my-active-matches
+        Index('idx_match_pair_funder_open', 'funder_user_id', **_partial_index_where(proof_confirmed == False)),
+        Index('idx_match_pair_withdrawer_open', 'withdrawer_user_id', **_partial_index_where(proof_confirmed == False)),
     )
 
     def __repr__(self):
@@ -326,6 +393,7 @@ class MergeCycle(Base):
     cutoff_time = Column(DateTime, nullable=False)  # 1 hour before scheduled_time (for request creation)
     join_window_closes = Column(DateTime, nullable=True)  # 5 minutes after scheduled_time (when matching starts)
     status = Column(String(20), default="pending", nullable=False)  # pending, processing, completed, failed
+    retries = Column(Integer, default=0, nullable=False)  # Times a failed or stalled run was resumed
 
     # Stats
     total_funding_requests = Column(Integer, default=0, nullable=False)
@@ -344,6 +412,89 @@ class MergeCycle(Base):
         return f"<MergeCycle {self.scheduled_time}>"
 
 
+class MergePlan(Base):
+    """Tentative matches for one currency of a merge cycle, computed at cutoff from a frozen snapshot"""
+    __tablename__ = "merge_plans"
+
+    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    merge_cycle_id = Column(UUID(), ForeignKey("merge_cycles.id"), nullable=False)
+    currency = Column(Enum(CurrencyEnum), nullable=False)
+
+    # Digest of the snapshot's request ids and amounts - the plan is only valid while the database still matches it
+    snapshot_digest = Column(String(64), nullable=True)
+
+    # Snapshot size (amounts in minor units)
+    funding_count = Column(Integer, nullable=False)
+    funding_total = Column(BigInteger, nullable=False)
+    withdrawal_count = Column(Integer, nullable=False)
+    withdrawal_total = Column(BigInteger, nullable=False)
+    priority_count = Column(Integer, nullable=False)
+
+    # Outcome of the plan
+    match_count = Column(Integer, nullable=False)
+    unmatched_funding = Column(Integer, nullable=False)
+    unmatched_withdrawal = Column(Integer, nullable=False)
+
+    # Checkpoint - staged pairs are applied one committed batch at a time
+    batch_count = Column(Integer, default=0, nullable=False)
+    batches_applied = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, nullable=True)  # Last batch applied
+
+    __table_args__ = (
+        UniqueConstraint('merge_cycle_id', 'currency', name='uq_merge_plan_cycle_currency'),
+    )
+
+    def __repr__(self):
+        return f"<MergePlan {self.currency} matches={self.match_count}>"
+
+
+class MergePlanPair(Base):
+    """A staged match pair - copied into funding_match_pairs (same id) when the plan is applied"""
+    __tablename__ = "merge_plan_pairs"
+
+    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    merge_plan_id = Column(UUID(), ForeignKey("merge_plans.id"), nullable=False)
+    funding_request_id = Column(UUID(), nullable=False)
+    withdrawal_request_id = Column(UUID(), nullable=False)
+    amount = Column(Numeric(18, 2), nullable=False)
+    batch = Column(Integer, default=0, nullable=False)  # Commit batch the pair is applied in
+
+    __table_args__ = (
+        # Applying a batch sums its staged amounts per request
+        Index('idx_merge_plan_pair_funding', 'merge_plan_id', 'batch', 'funding_request_id'),
+        Index('idx_merge_plan_pair_withdrawal', 'merge_plan_id', 'batch', 'withdrawal_request_id'),
+    )
+
+    def __repr__(self):
+        return f"<MergePlanPair amount={self.amount}>"
+
+
+class SchedulerLease(Base):
+    """Database lease electing the one instance that runs a scheduler's jobs"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(100), primary_key=True)  # e.g. auto_matcher, blob_cleanup
+    holder = Column(String(200), nullable=False)  # host:pid:nonce of the leader
+    acquired_at = Column(DateTime, nullable=False)  # When the current holder took over
+    expires_at = Column(DateTime, nullable=False)  # Standbys may take over after this
+
+    def __repr__(self):
+        return f"<SchedulerLease {self.name} {self.holder}>"
+
+
+class OrderBookVersion(Base):
+    """Per-currency counter bumped by every write to the pending requests - the in-memory order book's change check"""
+    __tablename__ = "order_book_versions"
+
+    currency = Column(Enum(CurrencyEnum), primary_key=True)
+    version = Column(BigInteger, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<OrderBookVersion {self.currency} {self.version}>"
+
+
 class AdminWallet(Base):
     """Admin wallets for liquidity provision"""
     __tablename__ = "admin_wallets"
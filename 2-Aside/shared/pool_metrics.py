@@ -0,0 +1,106 @@
+"""
+2-Aside Platform - Connection Pool Metrics
+Checkout wait time and saturation of the shared engine's connection pool
+"""
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from threading import Lock
+from typing import Any, Dict
+import time
+
+
+class PoolMetrics:
+    """Thread-safe counters for one connection pool"""
+
+    def __init__(self, capacity: int = 0):
+        self.capacity = capacity  # pool_size + max_overflow
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.peak_checked_out = 0
+
+    def record_checkout(self, wait_seconds: float, checked_out: int):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self, wait_seconds: float):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(1000 * self.wait_seconds_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(1000 * self.wait_seconds_max, 3),
+                "peak_checked_out": self.peak_checked_out,
+                "peak_saturation": round(self.peak_checked_out / self.capacity, 3) if self.capacity else None,
+            }
+
+
+class _MeteredPoolMixin:
+    """
+    Times every checkout of a queue pool.
+
+    The wait covers queueing for a free connection, opening a new one when
+    the pool grows and the pre-ping - the time a request spends before its
+    first query.
+    """
+
+    def __init__(self, creator, pool_size: int = 5, max_overflow: int = 10, **kw):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kw)
+        self.metrics = PoolMetrics(capacity=pool_size + max(max_overflow, 0))
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool - keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    """QueuePool with checkout metrics - the shared engine's pool"""
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    """The same for the async engine"""
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Current state of an engine's pool - what /health reports"""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, _MeteredPoolMixin):
+        checked_out = pool.checkedout()
+        capacity = pool.metrics.capacity
+        status.update({
+            "size": pool.size(),
+            "capacity": capacity,
+            "checked_out": checked_out,
+            "overflow": max(pool.overflow(), 0),
+            "saturation": round(checked_out / capacity, 3) if capacity else None,
+            **pool.metrics.snapshot(),
+        })
+    return status
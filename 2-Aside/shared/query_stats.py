@@ -0,0 +1,172 @@
+"""
+2-Aside Platform - Per-Request SQL Statistics
+Counts the statements each request runs and the time spent in the database,
+and flags the same statement repeating inside one request (an N+1 loop)
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from threading import Lock
+from typing import Iterator, List, Optional
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# The same statement this many times in one request is reported as an N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+REPEATED_QUERY_HEADER = "X-DB-Repeated-Query-Max"
+
+
+class QueryStats:
+    """Statements run by one request (or one query_budget block)"""
+
+    def __init__(self, endpoint: Optional[str] = None):
+        self._lock = Lock()
+        self.endpoint = endpoint  # "GET /path" of the request
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.statements[statement] += 1
+
+    @property
+    def milliseconds(self) -> float:
+        return round(1000 * self.seconds, 3)
+
+    def most_repeated(self):
+        """(statement, times) of the most repeated statement, or (None, 0)"""
+        with self._lock:
+            common = self.statements.most_common(1)
+        return common[0] if common else (None, 0)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[tuple]:
+        """Statements run at least threshold times - likely queries inside a loop"""
+        with self._lock:
+            return [(statement, times) for statement, times in self.statements.most_common() if times >= threshold]
+
+
+# Stats of the current request - shared with the threadpool, so mutated, never replaced
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# query_budget blocks in progress - they count statements from every thread
+_budgets: List[QueryStats] = []
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _request_stats.get()
+
+
+# Every engine - sync, async (through its sync_engine) and replica
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_stats_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_stats_start")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    for budget in list(_budgets):
+        budget.record(statement, seconds)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that counts each request's statements and database time.
+
+    Adds X-DB-Query-Count, X-DB-Time-Ms, X-DB-Repeated-Query-Max and a
+    Server-Timing "db" entry to the response, logs them as fields of one
+    line per request, and warns when a statement repeats N_PLUS_ONE_THRESHOLD
+    times. Statements run after the response has started (streaming bodies)
+    are logged but not in the headers.
+    """
+
+    def __init__(self, app, n_plus_one_threshold: Optional[int] = None):
+        self.app = app
+        self.threshold = n_plus_one_threshold or N_PLUS_ONE_THRESHOLD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(f"{scope['method']} {scope['path']}")
+        token = _request_stats.set(stats)
+        status_code = None
+
+        async def send_with_stats(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                _, repeats = stats.most_repeated()
+                headers = MutableHeaders(scope=message)
+                headers[QUERY_COUNT_HEADER] = str(stats.count)
+                headers[QUERY_TIME_HEADER] = f"{stats.milliseconds:.1f}"
+                headers[REPEATED_QUERY_HEADER] = str(repeats)
+                headers.append("Server-Timing", f'db;dur={stats.milliseconds:.1f};desc="{stats.count} queries"')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _request_stats.reset(token)
+            self._log(status_code, stats)
+
+    def _log(self, status_code, stats: QueryStats):
+        endpoint = stats.endpoint
+        statement, repeats = stats.most_repeated()
+        fields = {
+            "endpoint": endpoint,
+            "status_code": status_code,
+            "db_query_count": stats.count,
+            "db_time_ms": stats.milliseconds,
+            "db_repeated_query_max": repeats,
+        }
+        logger.info(f"{endpoint} {status_code}: {stats.count} queries, {stats.milliseconds:.1f} ms in database", extra=fields)
+        if repeats >= self.threshold:
+            logger.warning(
+                f"Possible N+1 in {endpoint}: statement ran {repeats} times - {' '.join(statement.split())[:300]}",
+                extra=fields
+            )
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Fail (AssertionError) if the block runs more than max_queries statements.
+    Counts statements on every engine and thread, so it also covers requests
+    made with FastAPI's TestClient.
+
+    Usage:
+        with query_budget(3):
+            client.get("/my-active-matches")
+    """
+    stats = QueryStats()
+    _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        _budgets.remove(stats)
+    if stats.count > max_queries:
+        statements = "\n".join(
+            f"  {times} x {' '.join(statement.split())[:200]}" for statement, times in stats.statements.most_common()
+        )
+        raise AssertionError(f"{stats.count} queries, over the budget of {max_queries}:\n{statements}")
@@ -0,0 +1,128 @@
+"""
+2-Aside Platform - Read Replica Routing
+Sends read-only endpoints' queries to the read replica, except after a write
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.datastructures import MutableHeaders
+from typing import Optional
+import os
+import time
+
+# After a request writes, the client's reads stay on the primary this long,
+# so a poll right after a POST sees its own change despite replica lag
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+# Set on responses to writes and echoed back by the client (lib/api.ts) - a header
+# rather than a cookie, since the frontend calls the services cross-origin with
+# bearer tokens. Any instance honours it, so it survives scale-out.
+PIN_HEADER = "X-Read-Primary-Until"
+
+
+@dataclass
+class RequestRouting:
+    """Routing state of one request - shared with the threadpool, so mutated, never replaced"""
+    wrote: bool = False
+    pinned_until: float = 0.0
+
+    def use_primary(self) -> bool:
+        return self.wrote or self.pinned_until > time.time()
+
+
+_routing: ContextVar[Optional[RequestRouting]] = ContextVar("read_routing", default=None)
+
+
+def mark_write():
+    """Pin the rest of the current request (and the client's next reads) to the primary"""
+    routing = _routing.get()
+    if routing is not None:  # Outside a request there is nothing to pin
+        routing.wrote = True
+
+
+def reads_use_primary() -> bool:
+    routing = _routing.get()
+    return routing is not None and routing.use_primary()
+
+
+class RoutingSession(Session):
+    """
+    Session for read-only endpoints (get_read_db).
+
+    Queries go to the replica bind unless the current request has written,
+    the client is pinned after a recent write, or the session itself writes.
+    Without a replica it behaves like a normal primary session.
+    """
+
+    def __init__(self, *args, replica=None, **kw):
+        super().__init__(*args, **kw)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.replica is None
+            or self._flushing
+            or isinstance(clause, UpdateBase)
+            or reads_use_primary()
+        ):
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        return self.replica
+
+
+@event.listens_for(Session, "after_flush")
+def _flush_is_a_write(session, flush_context):
+    mark_write()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _dml_is_a_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mark_write()
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware that gives each request its routing state.
+
+    A response to a request that wrote carries PIN_HEADER (a Unix time);
+    the client's requests echoing it read from the primary until then. A value
+    further ahead than pin_seconds is ignored, so a client cannot pin itself
+    to the primary indefinitely. Browsers only let the frontend read the
+    header if CORS exposes it (expose_headers=[PIN_HEADER]).
+    """
+
+    def __init__(self, app, pin_seconds: Optional[int] = None):
+        self.app = app
+        self.pin_seconds = REPLICA_PIN_SECONDS if pin_seconds is None else pin_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        routing = RequestRouting(pinned_until=self._pinned_until(scope))
+        token = _routing.set(routing)
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and routing.wrote and self.pin_seconds > 0:
+                MutableHeaders(scope=message)[PIN_HEADER] = f"{time.time() + self.pin_seconds:.3f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_pin)
+        finally:
+            _routing.reset(token)
+
+    def _pinned_until(self, scope) -> float:
+        header = PIN_HEADER.lower().encode("latin-1")
+        for name, value in scope.get("headers", []):
+            if name == header:
+                try:
+                    pinned_until = float(value)
+                except ValueError:
+                    return 0.0
+                return pinned_until if pinned_until <= time.time() + self.pin_seconds else 0.0
+        return 0.0
@@ -52,10 +52,11 @@ class PaginationMeta(BaseModel):
     """Pagination metadata"""
     page: int = Field(ge=1, description="Current page number")
     per_page: int = Field(ge=1, le=100, description="Items per page")
-    total_items: int = Field(ge=0, description="Total number of items")
-    total_pages: int = Field(ge=0, description="Total number of pages")
+    total_items: Optional[int] = Field(None, ge=0, description="Total number of items (None when not counted)")
+    total_pages: Optional[int] = Field(None, ge=0, description="Total number of pages (None when not counted)")
     has_next: bool = False
     has_prev: bool = False
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page (keyset pagination)")
 
 
 class PaginatedResponse(BaseModel):
@@ -0,0 +1,231 @@
+"""
+2-Aside Platform - Slow Query Log
+Opt-in record of statements slower than SLOW_QUERY_MS: where they came from
+(endpoint or task, and the calling line of code), the shape of their bound
+parameters, duration, row count and - on SQL Server - the estimated plan
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from threading import Lock
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+
+from .query_stats import current_query_stats
+
+logger = logging.getLogger(__name__)
+
+# Off unless set - statements at or over this many milliseconds are recorded
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+# Entries kept in memory for GET /admin/slow-queries (per process)
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+# Optional JSON-lines file, rotated at SLOW_QUERY_LOG_MAX_BYTES
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE") or None
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+# SQL Server: fetch the estimated plan (SHOWPLAN_XML) of each slow statement, off the request thread
+SLOW_QUERY_CAPTURE_PLAN = os.getenv("SLOW_QUERY_CAPTURE_PLAN", "false").lower() == "true"
+
+MAX_STATEMENT_CHARS = 4000
+MAX_PLAN_CHARS = 64 * 1024
+
+# Frames from these paths are skipped when looking for the calling line
+_LIBRARY_PATHS = (os.sep + "sqlalchemy" + os.sep, os.path.dirname(os.path.abspath(__file__)) + os.sep)
+
+# Name of the Celery task / background job running queries outside a request
+_query_source: ContextVar[Optional[str]] = ContextVar("query_source", default=None)
+
+
+def set_query_source(name: Optional[str]):
+    """Name the task running on this thread from now on (None to clear)"""
+    _query_source.set(name)
+
+
+@contextmanager
+def query_source(name: str):
+    """Attribute the block's slow queries to a task or job, e.g. query_source("celery:run_merge_cycle")"""
+    token = _query_source.set(name)
+    try:
+        yield
+    finally:
+        _query_source.reset(token)
+
+
+def parameter_shape(parameters) -> Any:
+    """Types (and sizes) of bound parameters - never their values"""
+    def shape(value):
+        if value is None:
+            return "None"
+        if isinstance(value, (str, bytes)):
+            return f"{type(value).__name__}({len(value)})"
+        if isinstance(value, (list, tuple, set)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if isinstance(parameters, dict):
+        return {key: shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany - one shape for the batch
+            return {"rows": len(parameters), "row": parameter_shape(parameters[0])}
+        return [shape(value) for value in parameters]
+    return shape(parameters)
+
+
+def _call_site() -> Optional[str]:
+    """The innermost application frame that issued the statement"""
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if not frame.filename.startswith("<") and not any(path in frame.filename for path in _LIBRARY_PATHS):
+            return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+    return None
+
+
+class SlowQueryLog:
+    """
+    Ring buffer (and optional rotating file) of slow statements.
+
+    plan_engine: sync engine used to fetch plans of statements run on an
+    async engine (plans of sync statements use their own engine)
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        buffer_size: int = SLOW_QUERY_BUFFER_SIZE,
+        log_file: Optional[str] = None,
+        capture_plan: bool = False,
+        plan_engine: Optional[Engine] = None
+    ):
+        self.threshold_seconds = threshold_ms / 1000
+        self.entries: deque = deque(maxlen=buffer_size)
+        self._lock = Lock()
+        self.capture_plan = capture_plan
+        self.plan_engine = plan_engine
+        self._plan_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-plan") if capture_plan else None
+        self._file_logger = None
+        if log_file:
+            self._file_logger = logging.getLogger(f"{__name__}.file")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            handler = RotatingFileHandler(log_file, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger.addHandler(handler)
+
+    def install(self):
+        """Start timing statements on every engine"""
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def uninstall(self):
+        event.remove(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", self._after_cursor_execute)
+        if self._plan_executor:
+            self._plan_executor.shutdown(wait=True)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        seconds = time.perf_counter() - starts.pop()
+        if seconds < self.threshold_seconds:
+            return
+
+        stats = current_query_stats()
+        rowcount = getattr(cursor, "rowcount", -1)
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(1000 * seconds, 3),
+            "source": (stats.endpoint if stats else None) or _query_source.get() or threading.current_thread().name,
+            "call_site": _call_site(),
+            "statement": statement[:MAX_STATEMENT_CHARS],
+            "parameters": parameter_shape(parameters),
+            "executemany": executemany,
+            # Affected rows for DML; drivers report -1 for SELECT until fetched
+            "rowcount": rowcount if rowcount is not None and rowcount >= 0 else None,
+            "database": conn.engine.url.database,
+            "plan": None,
+        }
+        with self._lock:
+            self.entries.append(entry)
+        logger.warning(f"Slow query ({entry['duration_ms']:.0f} ms) from {entry['source']} at {entry['call_site']}")
+
+        if self.capture_plan and conn.dialect.name == "mssql" and not executemany:
+            self._plan_executor.submit(self._capture_plan, entry, conn.engine, statement, parameters)
+        elif self._file_logger:
+            self._file_logger.info(json.dumps(entry, default=str))
+
+    def _capture_plan(self, entry: Dict[str, Any], engine: Engine, statement: str, parameters):
+        """Estimated plan via SHOWPLAN_XML - compiled, not executed - on a separate connection"""
+        # An async engine's pool can only be used from its event loop - ask the sync engine
+        plan_engine = self.plan_engine if engine.dialect.is_async else engine
+        try:
+            raw = plan_engine.raw_connection()
+            try:
+                cursor = raw.cursor()
+                cursor.execute("SET SHOWPLAN_XML ON")
+                try:
+                    cursor.execute(statement, parameters)
+                    row = cursor.fetchone()
+                    entry["plan"] = row[0][:MAX_PLAN_CHARS] if row else None
+                finally:
+                    cursor.execute("SET SHOWPLAN_XML OFF")
+                    cursor.close()
+            finally:
+                raw.close()
+        except Exception as e:
+            entry["plan"] = f"unavailable: {e}"
+        if self._file_logger:
+            self._file_logger.info(json.dumps(entry, default=str))
+
+    def recent(self, limit: Optional[int] = None, min_ms: float = 0) -> List[Dict[str, Any]]:
+        """Buffered entries, newest first"""
+        with self._lock:
+            entries = [entry for entry in reversed(self.entries) if entry["duration_ms"] >= min_ms]
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+# Process-wide log, installed by shared.database when SLOW_QUERY_MS is set
+slow_query_log: Optional[SlowQueryLog] = None
+
+
+def enable_slow_query_log(plan_engine: Optional[Engine] = None) -> Optional[SlowQueryLog]:
+    global slow_query_log
+    if SLOW_QUERY_MS > 0 and slow_query_log is None:
+        slow_query_log = SlowQueryLog(
+            SLOW_QUERY_MS,
+            log_file=SLOW_QUERY_LOG_FILE,
+            capture_plan=SLOW_QUERY_CAPTURE_PLAN,
+            plan_engine=plan_engine
+        ).install()
+    return slow_query_log
+
+
+def recent_slow_queries(limit: Optional[int] = None, min_ms: float = 0) -> Dict[str, Any]:
+    """What GET /admin/slow-queries returns"""
+    if slow_query_log is None:
+        return {"enabled": False, "threshold_ms": None, "queries": []}
+    return {
+        "enabled": True,
+        "threshold_ms": SLOW_QUERY_MS,
+        "buffer_size": slow_query_log.entries.maxlen,
+        "queries": slow_query_log.recent(limit, min_ms),
+    }
@@ -0,0 +1,23 @@
+"""
+Shared - Test Fixtures
+Every test runs on a fresh in-memory database (support.py)
+"""
+
+import pytest
+import sys
+import os
+
+# No __init__.py in this directory: as a package (shared.tests) it would import
+# shared, which needs DATABASE_URL, before this file could set it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from shared.database import Base
+from shared.tests.support import engine
+
+
+@pytest.fixture(autouse=True)
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
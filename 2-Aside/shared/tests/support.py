@@ -0,0 +1,72 @@
+"""
+2-Aside Platform - Test Support
+An in-memory SQLite database standing in for Azure SQL, and factories for the
+rows most tests start from. Test-only: imported by each tests/conftest.py
+(after it sets DATABASE_URL) and by the test modules, never by services.
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from shared.models import User, Wallet, MergeCycle
+
+
+@compiles(UNIQUEIDENTIFIER, "sqlite")
+def _uniqueidentifier_on_sqlite(type_, compiler, **kw):
+    return "CHAR(36)"
+
+
+# One connection shared by every session, so all of them see the same database
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def create_test_wallet(db, currency="NAIRA"):
+    """Helper to create a user with one wallet"""
+    user_id = uuid.uuid4()
+    db.add(User(
+        id=user_id,
+        email=f"test{user_id}@example.com",
+        username=f"testuser{user_id.hex[:12]}",
+        first_name="Test",
+        last_name="User",
+        phone="+2348012345678",
+        password_hash="x",
+        referral_code=f"U{user_id.hex[:10]}"
+    ))
+    wallet = Wallet(id=uuid.uuid4(), user_id=user_id, currency=currency, referral_code=f"W{user_id.hex[:10]}")
+    db.add(wallet)
+    db.flush()
+    return wallet
+
+
+def create_pending_request(db, model, amount, currency="NAIRA", **kwargs):
+    """Helper to create a pending funding or withdrawal request"""
+    wallet = create_test_wallet(db, currency)
+    req = model(
+        id=uuid.uuid4(),
+        wallet_id=wallet.id,
+        currency=currency,
+        amount=Decimal(amount),
+        amount_remaining=Decimal(amount),
+        requested_at=kwargs.pop("requested_at", datetime.utcnow() - timedelta(hours=1)),
+        **kwargs
+    )
+    db.add(req)
+    db.flush()
+    return req
+
+
+def create_cycle(db, status="processing"):
+    now = datetime.utcnow()
+    cycle = MergeCycle(id=uuid.uuid4(), scheduled_time=now, cutoff_time=now, status=status)
+    db.add(cycle)
+    db.flush()
+    return cycle
@@ -0,0 +1,43 @@
+"""
+Shared - Database Tests
+Tests for the async engine's driver URLs and pool
+"""
+
+import pytest
+
+from shared.pool_metrics import MeteredAsyncQueuePool, pool_status
+from shared.database import async_database_url
+
+
+def test_async_engine_uses_async_drivers_and_metered_pool(tmp_path):
+    assert async_database_url("mssql+pymssql://u:p@db.example.com:1433/twoaside") == (
+        "mssql+aioodbc://u:p@db.example.com:1433/twoaside?driver=ODBC+Driver+18+for+SQL+Server"
+    )
+    assert async_database_url("mssql+pyodbc://u:p@host/db?driver=ODBC+Driver+17+for+SQL+Server").startswith(
+        "mssql+aioodbc://u:p@host/db?driver=ODBC+Driver+17"
+    )
+    assert async_database_url("sqlite:///app.db") == "sqlite+aiosqlite:///app.db"
+
+    pytest.importorskip("aiosqlite")
+    import asyncio
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async def query_concurrently():
+        async_engine = create_async_engine(
+            async_database_url(f"sqlite:///{tmp_path / 'async.db'}"),
+            poolclass=MeteredAsyncQueuePool, pool_size=2, max_overflow=0
+        )
+
+        async def one():
+            async with async_engine.connect() as connection:
+                return (await connection.execute(text("SELECT 1"))).scalar()
+
+        results = await asyncio.gather(*(one() for _ in range(6)))
+        status = pool_status(async_engine.sync_engine)
+        await async_engine.dispose()
+        return results, status
+
+    results, status = asyncio.run(query_concurrently())
+    assert results == [1] * 6
+    assert (status["pool"], status["checkouts"], status["peak_checked_out"]) == ("MeteredAsyncQueuePool", 6, 2)
@@ -0,0 +1,35 @@
+"""
+Shared - Connection Pool Metrics Tests
+"""
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from shared.pool_metrics import MeteredQueuePool, pool_status
+
+
+def test_pool_reports_checkout_waits_and_saturation(tmp_path):
+    pooled = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MeteredQueuePool, pool_size=2, max_overflow=1, pool_timeout=0.05
+    )
+    connections = [pooled.connect() for _ in range(3)]
+    status = pool_status(pooled)
+    assert (status["capacity"], status["checked_out"], status["overflow"], status["saturation"]) == (3, 3, 1, 1.0)
+
+    # A saturated pool makes the next request wait, then time out
+    with pytest.raises(exc.TimeoutError):
+        pooled.connect()
+    for connection in connections:
+        connection.close()
+
+    status = pool_status(pooled)
+    assert (status["checkouts"], status["timeouts"], status["peak_checked_out"]) == (3, 1, 3)
+    assert status["wait_max_ms"] >= 50 and status["checked_out"] == 0
+
+    # Connections are reused, and counting survives dispose()
+    pooled.connect().close()
+    pooled.dispose()
+    pooled.connect().close()
+    assert pool_status(pooled)["checkouts"] == 5
+    pooled.dispose()
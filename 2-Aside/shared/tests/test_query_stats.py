@@ -0,0 +1,54 @@
+"""
+Shared - Per-Request SQL Statistics Tests
+"""
+
+import pytest
+
+from shared.models import Wallet
+from shared.query_stats import QueryStatsMiddleware, query_budget
+from shared.tests.support import TestingSessionLocal, create_test_wallet
+
+
+def test_requests_report_query_counts_and_repeated_statements(caplog):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    db = TestingSessionLocal()
+    wallet_ids = [create_test_wallet(db).id for _ in range(6)]
+    db.commit()
+    db.close()
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, n_plus_one_threshold=5)
+
+    @app.get("/wallets/loop")
+    def wallets_in_a_loop():
+        db = TestingSessionLocal()
+        try:
+            return {"found": sum(db.query(Wallet).filter(Wallet.id == wallet_id).count() for wallet_id in wallet_ids)}
+        finally:
+            db.close()
+
+    @app.get("/wallets/batch")
+    def wallets_at_once():
+        db = TestingSessionLocal()
+        try:
+            return {"found": db.query(Wallet).filter(Wallet.id.in_(wallet_ids)).count()}
+        finally:
+            db.close()
+
+    client = TestClient(app)
+    with caplog.at_level("INFO", logger="shared.query_stats"):
+        response = client.get("/wallets/loop")
+    assert response.json() == {"found": 6}
+    assert (response.headers["X-DB-Query-Count"], response.headers["X-DB-Repeated-Query-Max"]) == ("6", "6")
+    assert float(response.headers["X-DB-Time-Ms"]) > 0 and "db;dur=" in response.headers["Server-Timing"]
+    assert [r.db_query_count for r in caplog.records if hasattr(r, "db_query_count")] == [6, 6]
+    assert "Possible N+1 in GET /wallets/loop" in caplog.text
+
+    # Budgets lock in the fix
+    with query_budget(1):
+        assert client.get("/wallets/batch").headers["X-DB-Query-Count"] == "1"
+    with pytest.raises(AssertionError, match="6 queries, over the budget of 1"):
+        with query_budget(1):
+            client.get("/wallets/loop")
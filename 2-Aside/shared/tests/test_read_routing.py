@@ -0,0 +1,78 @@
+"""
+Shared - Read Replica Routing Tests
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import time
+
+from shared.database import Base
+from shared.models import User
+from shared.read_routing import RoutingSession, ReadYourWritesMiddleware, PIN_HEADER
+from shared.tests.support import engine, TestingSessionLocal, create_test_wallet
+
+
+def test_reads_go_to_replica_until_the_client_writes():
+    from fastapi import FastAPI, Depends
+    from fastapi.testclient import TestClient
+
+    replica = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=replica)
+    ReadSession = sessionmaker(class_=RoutingSession, bind=engine, replica=replica, autoflush=False)
+
+    def get_read_db():
+        db = ReadSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def users_seen(db) -> int:
+        return db.query(User).count()
+
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, pin_seconds=60)
+
+    @app.get("/users")
+    def list_users(db=Depends(get_read_db)):
+        return {"users": users_seen(db)}
+
+    @app.post("/users")
+    def add_user(db=Depends(get_db), read_db=Depends(get_read_db)):
+        before = users_seen(read_db)
+        create_test_wallet(db)
+        db.commit()
+        # Same request after the write: primary
+        return {"before": before, "after": users_seen(read_db)}
+
+    client = TestClient(app)
+    # The replica has not caught up with the primary's user
+    db = TestingSessionLocal()
+    create_test_wallet(db)
+    db.commit()
+    db.close()
+    assert client.get("/users").json() == {"users": 0}
+
+    response = client.post("/users")
+    assert response.json() == {"before": 0, "after": 2}
+    pinned_until = response.headers[PIN_HEADER]
+    assert float(pinned_until) > time.time()
+
+    # Reads echoing the header are pinned to the primary, other reads go to the replica
+    assert client.get("/users", headers={PIN_HEADER: pinned_until}).json() == {"users": 2}
+    assert client.get("/users").json() == {"users": 0}
+    # A pin further ahead than pin_seconds is not honoured
+    assert client.get("/users", headers={PIN_HEADER: str(time.time() + 3600)}).json() == {"users": 0}
+
+    # Without a replica the read session is a primary session
+    db = sessionmaker(class_=RoutingSession, bind=engine)()
+    assert users_seen(db) == 2
+    db.close()
@@ -0,0 +1,66 @@
+"""
+Shared - Slow Query Log Tests
+"""
+
+import textwrap
+import importlib.util
+import uuid
+
+from shared.models import Wallet
+from shared.slow_query_log import SlowQueryLog, query_source
+from shared.tests.support import TestingSessionLocal, create_test_wallet
+
+
+def load_service_module(tmp_path):
+    """A module outside shared/ (whose frames the log skips) standing in for service code"""
+    path = tmp_path / "wallet_tasks.py"
+    path.write_text(textwrap.dedent("""
+        from sqlalchemy import update
+        from shared.models import Wallet
+
+        def block_wallet(db, wallet_id, reason):
+            db.execute(
+                update(Wallet).where(Wallet.id == wallet_id).values(block_reason=reason)
+                .execution_options(synchronize_session=False)
+            )
+    """))
+    spec = importlib.util.spec_from_file_location("wallet_tasks", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_slow_query_log_records_source_call_site_and_parameter_shapes(tmp_path):
+    import json
+
+    wallet_tasks = load_service_module(tmp_path)
+    log_file = tmp_path / "slow.jsonl"
+    slow_log = SlowQueryLog(threshold_ms=0, buffer_size=2, log_file=str(log_file)).install()
+    try:
+        db = TestingSessionLocal()
+        wallet = create_test_wallet(db)
+        db.commit()
+        wallet_id = wallet.id
+        slow_log.clear()
+
+        with query_source("celery:test_task"):
+            wallet_tasks.block_wallet(db, wallet_id, "x" * 12)
+            db.commit()
+        db.query(Wallet.id).filter(Wallet.id.in_([wallet_id, uuid.uuid4()])).all()
+        db.close()
+    finally:
+        slow_log.uninstall()
+
+    # Buffer keeps the newest entries only
+    select_entry, update_entry = slow_log.recent()
+    assert len(slow_log.entries) == 2
+    assert update_entry["source"] == "celery:test_task" and update_entry["rowcount"] == 1
+    assert "block_reason" in update_entry["statement"]
+    assert update_entry["parameters"] == ["str(12)", "str(32)"]
+    assert update_entry["call_site"].startswith("wallet_tasks.py:")
+    assert update_entry["call_site"].endswith("block_wallet")
+    assert select_entry["source"] == "MainThread" and select_entry["parameters"] == ["str(32)", "str(32)"]
+    assert select_entry["plan"] is None  # Plans are SQL Server only
+
+    logged = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert logged[-2:] == [update_entry, select_entry]
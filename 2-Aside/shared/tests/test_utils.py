@@ -0,0 +1,58 @@
+"""
+Shared - Utility Tests
+Tests for keyset pagination cursors
+"""
+
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from shared.utils import encode_cursor, decode_cursor, keyset_condition
+from shared.tests.support import engine, TestingSessionLocal, create_test_wallet
+
+
+def test_keyset_pages_cover_history_once_including_timestamp_ties():
+    from sqlalchemy import select, desc, text
+    from shared.models import WalletLog, TransactionTypeEnum
+
+    db = TestingSessionLocal()
+    wallet = create_test_wallet(db)
+    other = create_test_wallet(db)
+    start = datetime(2024, 1, 1)
+    for i in range(25):
+        # Every fifth entry shares its timestamp with the next four
+        for wallet_id in (wallet.id, other.id):
+            db.add(WalletLog(
+                id=uuid.uuid4(), wallet_id=wallet_id, amount=Decimal(100 + i),
+                type=TransactionTypeEnum.DEPOSIT, created_at=start + timedelta(minutes=i // 5)
+            ))
+    db.commit()
+
+    order = (desc(WalletLog.created_at), desc(WalletLog.id))
+    everything = db.execute(select(WalletLog.id).where(WalletLog.wallet_id == wallet.id).order_by(*order)).scalars().all()
+
+    pages, cursor = [], None
+    while True:
+        query = select(WalletLog).where(WalletLog.wallet_id == wallet.id)
+        if cursor:
+            query = query.where(keyset_condition((WalletLog.created_at, WalletLog.id), decode_cursor(cursor, datetime, uuid.UUID)))
+        rows = db.execute(query.order_by(*order).limit(8)).scalars().all()
+        pages.append([row.id for row in rows[:7]])
+        if len(rows) <= 7:
+            break
+        cursor = encode_cursor(rows[6].created_at, rows[6].id)
+
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    assert [row_id for page in pages for row_id in page] == everything
+
+    # Each page is a seek on (wallet_id, created_at)
+    compiled = query.order_by(*order).limit(8).compile(engine, compile_kwargs={"literal_binds": True})
+    plan = " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert "idx_wallet_log_wallet_created" in plan
+    db.close()
+
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", datetime, uuid.UUID)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(start), datetime, uuid.UUID)
@@ -4,13 +4,18 @@ Helper functions for formatting, validation, and common operations
 """
 
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional
+from typing import Any, Optional, Sequence
 import string
 import random
 import re
+import base64
+import json
+import uuid
 from datetime import datetime, timedelta
 import hashlib
 
+from sqlalchemy import and_, or_
+
 
 # ========================================
 # DECIMAL & CURRENCY FORMATTING
@@ -527,6 +532,60 @@ def get_offset_limit(page: int, per_page: int) -> tuple[int, int]:
     return offset, limit
 
 
+def encode_cursor(*values: Any) -> str:
+    """
+    Opaque keyset cursor from the sort key of the last row on a page.
+
+    Example:
+        >>> encode_cursor(datetime(2024, 1, 5, 9, 30), uuid.UUID(int=1))
+        'WyIyMDI0LTAxLTA1VDA5OjMwOjAwIiwgIjAwMDAwMDAwLTAwMDAtMDAwMC0wMDAwLTAwMDAwMDAwMDAwMSJd'
+    """
+    payload = [
+        value.isoformat() if isinstance(value, datetime)
+        else str(value) if isinstance(value, (uuid.UUID, Decimal))
+        else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    Sort key values from a cursor made by encode_cursor, converted to types.
+
+    Raises:
+        ValueError: If the cursor is malformed or does not match types
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for value, type_ in zip(payload, types)
+        )
+    except (ValueError, TypeError, ArithmeticError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_condition(columns: Sequence, values: Sequence, descending: bool = True):
+    """
+    WHERE clause for the rows after a cursor in ORDER BY columns (all DESC or all ASC),
+    spelled out as ORs because SQL Server has no row-value comparison:
+    (a, b) < (x, y)  ->  a <= x AND (a < x OR (a = x AND b < y))
+    The redundant a <= x gives the optimizer a range to seek on the index.
+    """
+    def after(column, value):
+        return column < value if descending else column > value
+
+    conditions = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        conditions.append(and_(*equal_prefix, after(column, value)))
+    first = columns[0] <= values[0] if descending else columns[0] >= values[0]
+    return and_(first, or_(*conditions))
+
+
 # ========================================
 # ERROR FORMATTING
 # ========================================
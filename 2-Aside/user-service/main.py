@@ -16,6 +16,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from shared import (
     get_db,
+    QueryStatsMiddleware,
+    pool_status,
     User,
     Wallet,
     UserResponse,
@@ -51,6 +53,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# SQL statement count and database time per request (response headers + log fields)
+app.add_middleware(QueryStatsMiddleware)
+
 
 # ========================================
 # HEALTH CHECK
@@ -58,8 +63,8 @@ app.add_middleware(
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "user-service"}
+    """Health check endpoint (includes database connection pool metrics)"""
+    return {"status": "healthy", "service": "user-service", "database_pool": pool_status()}
 
 
 # ========================================
@@ -5,13 +5,15 @@ Handles wallet management, balance queries, currency switching, and transaction
 
 from fastapi import FastAPI, Depends, HTTPException, status, Query
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select, func
 from pydantic import BaseModel
 import sys
 import os
 import uuid
 from typing import Optional
+from datetime import datetime
 from decimal import Decimal
 
 # Add parent directory to path
@@ -19,6 +21,13 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from shared import (
     get_db,
+    QueryStatsMiddleware,
+    get_async_db,
+    get_read_db,
+    get_async_read_db,
+    ReadYourWritesMiddleware,
+    PIN_HEADER,
+    pool_status,
     User,
     Wallet,
     BankDetails,
@@ -37,7 +46,11 @@ from shared import (
     CurrencyType,
     calculate_pagination,
     get_offset_limit,
+    encode_cursor,
+    decode_cursor,
+    keyset_condition,
     format_currency,
+    ValidationError,
 )
 
 # Import referral reward logic
@@ -59,8 +72,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PIN_HEADER],
 )
 
+# SQL statement count and database time per request (response headers + log fields)
+app.add_middleware(QueryStatsMiddleware)
+
+# Read replica routing - a client's reads stay on the primary right after it writes
+app.add_middleware(ReadYourWritesMiddleware)
+
 
 # ========================================
 # HEALTH CHECK
@@ -68,8 +88,8 @@ app.add_middleware(
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "wallet-service"}
+    """Health check endpoint (includes database connection pool metrics)"""
+    return {"status": "healthy", "service": "wallet-service", "database_pool": pool_status()}
 
 
 # ========================================
@@ -322,14 +342,20 @@ async def switch_currency(
 async def get_transaction_history(
     currency: str,
     user_id: str = Depends(get_current_user_id),
-    page: int = Query(1, ge=1, description="Page number"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page: int = Query(1, ge=1, description="Page number (offset paging, used without a cursor)"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db)
+    include_total: bool = Query(True, description="Count all transactions for total_items/total_pages (pass false when following cursors)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get transaction history for specific currency with pagination.
 
-    Returns paginated list of all transactions (deposits, withdrawals, bets, wins, etc.)
+    Returns paginated list of all transactions (deposits, withdrawals, bets, wins, etc.),
+    newest first. Follow meta.next_cursor for the next page: each page is one
+    seek on idx_wallet_log_wallet_created however far back it is. Page
+    numbers still work but get slower the deeper they go. Totals are counted
+    unless include_total=false.
     """
     try:
         # Validate currency
@@ -338,27 +364,50 @@ async def get_transaction_history(
             raise InvalidCurrencyError(currency=currency)
 
         # Get wallet
-        wallet = db.query(Wallet).filter(
-            Wallet.user_id == uuid.UUID(user_id),
-            Wallet.currency == currency_upper
-        ).first()
+        wallet = (await db.execute(
+            select(Wallet).where(
+                Wallet.user_id == uuid.UUID(user_id),
+                Wallet.currency == currency_upper
+            ).limit(1)
+        )).scalars().first()
 
         if not wallet:
             raise WalletNotFoundError()
 
-        # Count total transactions
-        total_items = db.query(Transaction).filter(
-            Transaction.wallet_id == wallet.id
-        ).count()
-
-        # Calculate pagination
-        pagination = calculate_pagination(page, per_page, total_items)
-        offset, limit = get_offset_limit(page, per_page)
+        # Newest first; id breaks ties between transactions logged in the same instant
+        query = select(Transaction).where(Transaction.wallet_id == wallet.id)
+        if cursor:
+            try:
+                after = decode_cursor(cursor, datetime, uuid.UUID)
+            except ValueError:
+                raise ValidationError(message="Invalid cursor", field="cursor")
+            query = query.where(keyset_condition((Transaction.created_at, Transaction.id), after))
+        else:
+            offset, _ = get_offset_limit(page, per_page)
+            query = query.offset(offset)
+
+        # One extra row tells whether there is a next page
+        transactions = (await db.execute(
+            query.order_by(desc(Transaction.created_at), desc(Transaction.id)).limit(per_page + 1)
+        )).scalars().all()
+        has_next = len(transactions) > per_page
+        transactions = transactions[:per_page]
+
+        pagination = {
+            "page": page,
+            "per_page": per_page,
+            "has_next": has_next,
+            "has_prev": cursor is not None or page > 1,
+            "next_cursor": encode_cursor(transactions[-1].created_at, transactions[-1].id) if has_next else None,
+        }
 
-        # Get transactions
-        transactions = db.query(Transaction).filter(
-            Transaction.wallet_id == wallet.id
-        ).order_by(desc(Transaction.created_at)).offset(offset).limit(limit).all()
+        # Count total transactions
+        if include_total:
+            total_items = await db.scalar(
+                select(func.count()).select_from(Transaction).where(Transaction.wallet_id == wallet.id)
+            )
+            pagination["total_items"] = total_items
+            pagination["total_pages"] = calculate_pagination(page, per_page, total_items)["total_pages"]
 
         # Format transactions
         transaction_data = []
@@ -404,7 +453,7 @@ async def get_transaction_history(
 async def get_wallet_stats(
     currency: str,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get wallet statistics and summary for specific currency.
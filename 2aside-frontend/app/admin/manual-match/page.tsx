@@ -31,8 +31,8 @@ export default function ManualMatchPage() {
       setLoading(true)
       setError('')
       const response = await adminService.getUnmatchedRequests(selectedCurrency)
-      setFundingRequests(response.data.data.funding_requests || [])
-      setWithdrawalRequests(response.data.data.withdrawal_requests || [])
+      setFundingRequests(response.data.data.funding || [])
+      setWithdrawalRequests(response.data.data.withdrawal || [])
     } catch (err) {
       setError(handleApiError(err))
     } finally {
@@ -67,7 +67,7 @@ export default function ManualMatchPage() {
       return
     }
 
-    if (!confirm(`Match ${formatCurrency(amount, selectedCurrency)} between ${selectedFundingRequest?.username} and ${selectedWithdrawalRequest?.username}?`)) {
+    if (!confirm(`Match ${formatCurrency(amount, selectedCurrency)} between ${selectedFundingRequest?.user.username} and ${selectedWithdrawalRequest?.user.username}?`)) {
       return
     }
 
@@ -190,10 +190,10 @@ export default function ManualMatchPage() {
                     >
                       <div className="flex justify-between items-start mb-1">
                         <div>
-                          <p className="font-semibold">{request.username}</p>
+                          <p className="font-semibold">{request.user.username}</p>
                           <div className="flex items-center gap-1 text-xs text-gray-600">
                             <Phone className="h-3 w-3" />
-                            <span>{request.phone}</span>
+                            <span>{request.user.phone}</span>
                           </div>
                         </div>
                         {selectedFunding === request.id && (
@@ -239,10 +239,10 @@ export default function ManualMatchPage() {
                     >
                       <div className="flex justify-between items-start mb-1">
                         <div>
-                          <p className="font-semibold">{request.username}</p>
+                          <p className="font-semibold">{request.user.username}</p>
                           <div className="flex items-center gap-1 text-xs text-gray-600">
                             <Phone className="h-3 w-3" />
-                            <span>{request.phone}</span>
+                            <span>{request.user.phone}</span>
                           </div>
                         </div>
                         {selectedWithdrawal === request.id && (
@@ -278,7 +278,7 @@ export default function ManualMatchPage() {
             <div className="grid grid-cols-3 gap-4 items-center">
               <div className="bg-orange-100 rounded-lg p-4">
                 <p className="text-xs text-gray-600 mb-1">Funding</p>
-                <p className="font-bold text-lg">{selectedFundingRequest?.username}</p>
+                <p className="font-bold text-lg">{selectedFundingRequest?.user.username}</p>
                 <p className="text-sm text-orange-600 mt-1">
                   Available: {formatCurrency(parseFloat(selectedFundingRequest?.amount_remaining || '0'), selectedCurrency)}
                 </p>
@@ -290,7 +290,7 @@ export default function ManualMatchPage() {
 
               <div className="bg-blue-100 rounded-lg p-4">
                 <p className="text-xs text-gray-600 mb-1">Withdrawal</p>
-                <p className="font-bold text-lg">{selectedWithdrawalRequest?.username}</p>
+                <p className="font-bold text-lg">{selectedWithdrawalRequest?.user.username}</p>
                 <p className="text-sm text-blue-600 mt-1">
                   Available: {formatCurrency(parseFloat(selectedWithdrawalRequest?.amount_remaining || '0'), selectedCurrency)}
                 </p>
@@ -25,8 +25,8 @@ export default function UnmatchedUsersPage() {
       setLoading(true)
       setError('')
       const response = await adminService.getUnmatchedRequests(selectedCurrency)
-      setFundingRequests(response.data.data.funding_requests || [])
-      setWithdrawalRequests(response.data.data.withdrawal_requests || [])
+      setFundingRequests(response.data.data.funding || [])
+      setWithdrawalRequests(response.data.data.withdrawal || [])
     } catch (err) {
       setError(handleApiError(err))
     } finally {
@@ -155,10 +155,10 @@ export default function UnmatchedUsersPage() {
                     <div className="flex items-center gap-3 mb-2">
                       <Users className="h-5 w-5 text-gray-500" />
                       <div>
-                        <p className="font-semibold text-lg">{request.username}</p>
+                        <p className="font-semibold text-lg">{request.user.username}</p>
                         <div className="flex items-center gap-2 text-sm text-gray-600">
                           <Phone className="h-3 w-3" />
-                          <span>{request.phone}</span>
+                          <span>{request.user.phone}</span>
                         </div>
                       </div>
                     </div>
@@ -219,10 +219,10 @@ export default function UnmatchedUsersPage() {
                     <div className="flex items-center gap-3 mb-2">
                       <Users className="h-5 w-5 text-gray-500" />
                       <div>
-                        <p className="font-semibold text-lg">{request.username}</p>
+                        <p className="font-semibold text-lg">{request.user.username}</p>
                         <div className="flex items-center gap-2 text-sm text-gray-600">
                           <Phone className="h-3 w-3" />
-                          <span>{request.phone}</span>
+                          <span>{request.user.phone}</span>
                         </div>
                       </div>
                     </div>
@@ -1,4 +1,4 @@
-import axios, { AxiosInstance, AxiosError } from 'axios';
+import axios, { AxiosInstance, AxiosError, AxiosResponse } from 'axios';
 
 // API Base URLs - pointing to Python microservices
 const API_URLS = {
@@ -8,6 +8,11 @@ const API_URLS = {
   funding: process.env.NEXT_PUBLIC_FUNDING_API_URL || 'http://localhost:8003',
 };
 
+// Set by the services on responses to writes; echoed back so reads right after
+// a write go to the primary database instead of a lagging read replica
+const READ_PRIMARY_HEADER = 'X-Read-Primary-Until';
+let readPrimaryUntil: string | null = null;
+
 // Create axios instances for each service
 const createApiClient = (baseURL: string): AxiosInstance => {
   const client = axios.create({
@@ -25,14 +30,23 @@ const createApiClient = (baseURL: string): AxiosInstance => {
       if (token) {
         config.headers.Authorization = `Bearer ${token}`;
       }
+      if (readPrimaryUntil && Number(readPrimaryUntil) * 1000 > Date.now()) {
+        config.headers[READ_PRIMARY_HEADER] = readPrimaryUntil;
+      }
       return config;
     },
     (error) => Promise.reject(error)
   );
 
-  // Response interceptor - handle errors
+  // Response interceptor - remember read pinning, handle errors
   client.interceptors.response.use(
-    (response) => response,
+    (response) => {
+      const pinnedUntil = response.headers[READ_PRIMARY_HEADER.toLowerCase()];
+      if (pinnedUntil) {
+        readPrimaryUntil = pinnedUntil;
+      }
+      return response;
+    },
     (error: AxiosError) => {
       if (error.response?.status === 401) {
         // Unauthorized - clear token
@@ -52,6 +66,26 @@ export const userApi = createApiClient(API_URLS.user);
 export const walletApi = createApiClient(API_URLS.wallet);
 export const fundingApi = createApiClient(API_URLS.funding);
 
+// Paginated list endpoints return { data, meta }; follow meta.next_cursor to the end
+const PAGE_SIZE = 100;
+
+const getAllPages = async <T>(
+  client: AxiosInstance,
+  url: string
+): Promise<AxiosResponse<Paginated<T>>> => {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  let response: AxiosResponse<Paginated<T>>;
+  do {
+    response = await client.get<Paginated<T>>(url, {
+      params: cursor ? { per_page: PAGE_SIZE, cursor } : { per_page: PAGE_SIZE },
+    });
+    items.push(...response.data.data);
+    cursor = response.data.meta.next_cursor;
+  } while (cursor);
+  return { ...response, data: { ...response.data, data: items } };
+};
+
 // Types
 export interface User {
   id: string;
@@ -106,6 +140,22 @@ export interface MatchedUser {
   pair_id: string;
 }
 
+export interface PaginationMeta {
+  page: number;
+  per_page: number;
+  total_items?: number | null;
+  total_pages?: number | null;
+  has_next: boolean;
+  has_prev: boolean;
+  next_cursor: string | null;
+}
+
+export interface Paginated<T> {
+  success: boolean;
+  data: T[];
+  meta: PaginationMeta;
+}
+
 export interface FundingRequest {
   id: string;
   amount: string;
@@ -180,11 +230,14 @@ export interface AdminDashboard {
 
 export interface UnmatchedRequest {
   id: string;
-  user_id: string;
-  username: string;
-  phone: string;
+  type: 'funding' | 'withdrawal';
+  currency: 'NAIRA' | 'USDT';
   amount: string;
   amount_remaining: string;
+  user: {
+    username: string;
+    phone: string;
+  };
   requested_at: string;
 }
 
@@ -258,10 +311,10 @@ export const fundingService = {
     fundingApi.post('/withdrawal/request', null, { params: { amount, currency } }),
 
   getMyFundingRequests: () =>
-    fundingApi.get<{ data: FundingRequest[] }>('/funding/my-requests'),
+    getAllPages<FundingRequest>(fundingApi, '/funding/my-requests'),
 
   getMyWithdrawalRequests: () =>
-    fundingApi.get<{ data: WithdrawalRequest[] }>('/withdrawal/my-requests'),
+    getAllPages<WithdrawalRequest>(fundingApi, '/withdrawal/my-requests'),
 
   getNextMergeCycle: () =>
     fundingApi.get<{ data: MergeCycleInfo }>('/merge-cycle/next'),
@@ -305,7 +358,7 @@ export const adminService = {
     fundingApi.get<{ data: AdminDashboard }>('/admin/dashboard'),
 
   getUnmatchedRequests: (currency: 'NAIRA' | 'USDT') =>
-    fundingApi.get<{ data: { funding_requests: UnmatchedRequest[]; withdrawal_requests: UnmatchedRequest[] } }>(
+    fundingApi.get<{ data: { funding: UnmatchedRequest[]; withdrawal: UnmatchedRequest[]; currency: string } }>(
       '/admin/unmatched-requests',
       { params: { currency } }
     ),